@@ -53,5 +53,6 @@ setup(
         "extrap": ["extrap", "matplotlib"],
         "plotting": ["seaborn"],
         "vis": ["beautifulsoup4"],
+        "parquet": ["pyarrow"],
     },
 )
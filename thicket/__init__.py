@@ -15,7 +15,9 @@ from . import (
     stats as stats,
 )
 
+from .cache import KernelMatchCache, QueryCache, ReaderCache
 from .ensemble import Ensemble
+from .node_index import NodeIndex
 from .thicket import Thicket
 from .thicket import InvalidFilter
 from .thicket import EmptyMetadataTable
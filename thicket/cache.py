@@ -0,0 +1,411 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from collections import OrderedDict
+import json
+import os
+import pickle
+import time
+import weakref
+from hashlib import md5
+
+import pandas as pd
+
+
+def _write_atomic(path, mode, write):
+    """Write a file through a temporary file replacing it at once, so an interrupted
+    or concurrent write never leaves a partial file at path.
+
+    Arguments:
+        path (str): file to write
+        mode (str): mode to open the temporary file with
+        write (function): function writing the contents to an open file
+    """
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ReaderCache:
+    """On-disk cache of the Thickets created from individual files by the Thicket
+    readers.
+
+    Entries are keyed by the path, size and modification time of the file and by the
+    reader and its arguments, so a file is parsed again whenever it changes. The
+    least recently used entries are evicted once the cache grows larger than max_size.
+    """
+
+    index_file = "index.json"
+
+    def __init__(self, cache_dir, max_size=None):
+        """Create or open a cache directory.
+
+        Arguments:
+            cache_dir (str): directory to store the cache entries in
+            max_size (int, optional): maximum size of the cache in bytes. Unlimited
+                if None.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def __contains__(self, key):
+        return key in self._index and os.path.isfile(self._entry_path(key))
+
+    def __len__(self):
+        return len(self._index)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def _load_index(self):
+        index_path = os.path.join(self.cache_dir, ReaderCache.index_file)
+        if not os.path.isfile(index_path):
+            return {}
+        with open(index_path, "r") as f:
+            return json.load(f)
+
+    def _save_index(self):
+        index_path = os.path.join(self.cache_dir, ReaderCache.index_file)
+        _write_atomic(index_path, "w", lambda f: json.dump(self._index, f))
+
+    @staticmethod
+    def key(func, file, extra_args=(), kwargs={}):
+        """Compute the cache key of a file read with a reader function.
+
+        Arguments:
+            func (function): reader function
+            file (str): path of the file
+            extra_args (tuple): extra positional arguments to func
+            kwargs (dict): keyword arguments to func
+
+        Returns:
+            (str): cache key, or None if the arguments can not be cached, like Query
+                objects, whose repr is not stable across runs
+        """
+        try:
+            arguments = (_canonical(extra_args), _canonical(kwargs))
+        except TypeError:
+            return None
+        stat = os.stat(file)
+        identity = (
+            func.__module__,
+            func.__qualname__,
+            file,
+            os.path.abspath(file),
+            stat.st_size,
+            stat.st_mtime_ns,
+        ) + arguments
+        return md5(repr(identity).encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """Load the Thicket stored under key.
+
+        Arguments:
+            key (str): cache key
+
+        Returns:
+            (Thicket): cached Thicket, or None if key is not in the cache or its entry
+                can not be read, in which case the entry is removed
+        """
+        if key not in self:
+            return None
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                tk = pickle.load(f)
+        except Exception:
+            self._remove(key)
+            return None
+        self._index[key]["last_access"] = time.time()
+        return tk
+
+    def store(self, key, tk, file):
+        """Store a Thicket under key.
+
+        Arguments:
+            key (str): cache key
+            tk (Thicket): Thicket read from file
+            file (str): path of the file the Thicket was read from
+        """
+        entry_path = self._entry_path(key)
+        _write_atomic(entry_path, "wb", lambda f: pickle.dump(tk, f))
+        self._index[key] = {
+            "file": file,
+            "size": os.path.getsize(entry_path),
+            "last_access": time.time(),
+        }
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_size and
+        write the index to disk."""
+        if self.max_size is not None:
+            entries = sorted(self._index.items(), key=lambda x: x[1]["last_access"])
+            total = sum(entry["size"] for _, entry in entries)
+            for key, entry in entries:
+                if total <= self.max_size:
+                    break
+                self._remove(key)
+                total -= entry["size"]
+        self._save_index()
+
+    def _remove(self, key):
+        entry_path = self._entry_path(key)
+        if os.path.isfile(entry_path):
+            os.remove(entry_path)
+        self._index.pop(key, None)
+
+    def info(self):
+        """Get the entries in the cache.
+
+        Returns:
+            (DataFrame): one row per entry, indexed by cache key, with the source file,
+                size in bytes and time of last access
+        """
+        info_df = pd.DataFrame.from_dict(
+            self._index, orient="index", columns=["file", "size", "last_access"]
+        )
+        info_df.index.name = "key"
+        info_df["last_access"] = pd.to_datetime(info_df["last_access"], unit="s")
+        return info_df.sort_values("last_access")
+
+    def size(self):
+        """Total size of the cache entries in bytes."""
+        return sum(entry["size"] for entry in self._index.values())
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        for key in list(self._index):
+            self._remove(key)
+        self._save_index()
+
+
+class KernelMatchCache:
+    """On-disk cache of the call tree nodes that NCU kernels were matched to by
+    Thicket.add_ncu.
+
+    Entries are keyed by a fingerprint of the call tree, the demangled kernel name and
+    the variant of the profile, and store the position of the matched node in the
+    traversal order of the call tree, so a rebuilt Thicket with the same call tree
+    reuses the matches without matching the kernels again.
+    """
+
+    cache_file = "kernel_matches.json"
+
+    def __init__(self, cache_dir):
+        """Create or open a cache directory.
+
+        Arguments:
+            cache_dir (str): directory to store the cache in
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, KernelMatchCache.cache_file)
+        self._entries = {}
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                self._entries = json.load(f)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(fingerprint, demangled_kernel_name, variant):
+        """Compute the cache key of a kernel.
+
+        Arguments:
+            fingerprint (str): fingerprint of the call tree, from
+                NodeIndex.fingerprint()
+            demangled_kernel_name (str): demangled kernel name from NCU
+            variant (str): variant of the profile
+
+        Returns:
+            (str): cache key
+        """
+        identity = (fingerprint, demangled_kernel_name, variant)
+        return md5(repr(identity).encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """Get the position of the node matched to a kernel.
+
+        Arguments:
+            key (str): cache key
+
+        Returns:
+            (int): position of the node in traversal order, or None if key is not in
+                the cache
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["position"]
+
+    def store(self, key, position, demangled_kernel_name, variant):
+        """Store the position of the node matched to a kernel.
+
+        Arguments:
+            key (str): cache key
+            position (int): position of the node in traversal order
+            demangled_kernel_name (str): demangled kernel name, kept for reference
+            variant (str): variant of the profile, kept for reference
+        """
+        self._entries[key] = {
+            "position": position,
+            "kernel": demangled_kernel_name,
+            "variant": variant,
+        }
+
+    def save(self):
+        """Write the cache to disk."""
+        path = os.path.join(self.cache_dir, KernelMatchCache.cache_file)
+        _write_atomic(path, "w", lambda f: json.dump(self._entries, f))
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        self._entries = {}
+        self.save()
+
+
+def _canonical(obj):
+    """Convert an object dialect query into a hashable canonical form.
+
+    Scalars keep their type, so equal values of different types (e.g. True and 1) are
+    distinguished, and dictionaries are sorted by key.
+
+    Raises:
+        TypeError: if the query contains objects without a canonical form, like
+            functions
+    """
+    if obj is None or isinstance(obj, (str, bool, int, float)):
+        return (type(obj).__name__, obj)
+    if isinstance(obj, (list, tuple)):
+        return (type(obj).__name__, tuple(_canonical(x) for x in obj))
+    if isinstance(obj, dict):
+        items = sorted((_canonical(k), _canonical(v)) for k, v in obj.items())
+        return ("dict", tuple(items))
+    raise TypeError("No canonical form for {}".format(type(obj)))
+
+
+class QueryCache:
+    """In-memory cache of the nodes matched by queries on a Thicket.
+
+    Caching is disabled by default. Entries are keyed by a canonical fingerprint of
+    the query and a version counter, which is bumped by Thicket operations that modify
+    the Thicket in place. An entry is only used for the same graph and table objects it
+    was computed on, so values modified in place in the tables (e.g., with
+    DataFrame.loc) are not detected, and bump() must be called after such edits. The
+    least recently used entries are evicted once the cache holds more than max_size
+    entries.
+
+    Only string dialect and object dialect queries are cached, since Query objects
+    can hold arbitrary functions and be modified after they are applied.
+    """
+
+    def __init__(self, max_size=0):
+        """Create an empty cache.
+
+        Arguments:
+            max_size (int): maximum number of entries. Caching is disabled if 0.
+        """
+        self.max_size = max_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Entries hold weak references and are only valid for this object's tables
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_size"])
+
+    @staticmethod
+    def fingerprint(query_obj, multi_index_mode="off", target="dataframe"):
+        """Compute the fingerprint of a query.
+
+        Arguments:
+            query_obj (str, list or Query): the query
+            multi_index_mode (str): multi_index_mode the query is applied with
+            target (str): table the query is applied to
+
+        Returns:
+            (tuple): fingerprint, or None if the query can not be cached
+        """
+        if isinstance(query_obj, str):
+            query = ("string", query_obj)
+        elif isinstance(query_obj, list):
+            try:
+                query = ("object", _canonical(query_obj))
+            except TypeError:
+                return None
+        else:
+            return None
+        return (target, multi_index_mode) + query
+
+    def get(self, fingerprint, graph, dataframe):
+        """Get the nodes matched by a query.
+
+        Arguments:
+            fingerprint (tuple): fingerprint of the query
+            graph (hatchet.Graph): graph the query is applied to
+            dataframe (DataFrame): table the query is applied to
+
+        Returns:
+            (list): matched nodes, or None if the query is not in the cache
+        """
+        if self.max_size <= 0:
+            return None
+        key = (fingerprint, self.version)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0]() is graph and entry[1]() is dataframe:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def put(self, fingerprint, graph, dataframe, matches):
+        """Store the nodes matched by a query.
+
+        Arguments:
+            fingerprint (tuple): fingerprint of the query
+            graph (hatchet.Graph): graph the query was applied to
+            dataframe (DataFrame): table the query was applied to
+            matches (list): matched nodes
+        """
+        if self.max_size <= 0:
+            return
+        key = (fingerprint, self.version)
+        self._entries[key] = (weakref.ref(graph), weakref.ref(dataframe), matches)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def bump(self):
+        """Invalidate the entries after the Thicket is modified in place."""
+        self.version += 1
+        self._entries.clear()
+
+    def clear(self):
+        """Remove all entries from the cache and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
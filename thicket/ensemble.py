@@ -3,12 +3,16 @@
 #
 # SPDX-License-Identifier: MIT
 
-from collections import OrderedDict
+from collections import defaultdict, OrderedDict
+import copy
 
 from hatchet import GraphFrame
+from hatchet.graph import Graph
+import numpy as np
 import pandas as pd
 
 import thicket.helpers as helpers
+from .stats.running_stats import _merge_thickets
 from .utils import (
     check_same_frame,
     validate_dataframe,
@@ -43,45 +47,142 @@ class Ensemble:
         # Unify graphs if "self" and "other" do not have the same graph
         union_graph = _thickets[0].graph
         old_to_new = {}
-        for i in range(len(_thickets) - 1):
-            new_dict = {}
-            union_graph = union_graph.union(_thickets[i + 1].graph, new_dict)
-            # Set all graphs to the union graph
-            _thickets[i].graph = union_graph
-            _thickets[i + 1].graph = union_graph
-            # Merge the current old_to_new dictionary with the new mappings.
-            # This is necessary to avoid applying updates to the DataFrames every iteration.
-            # Merge values of new_dict into keys of old_to_new
-            merged_dict = {}
-            seen_keys = set()
-            for old_id, cur_node in old_to_new.items():
-                cur_id = id(cur_node)
-                if cur_id in new_dict:
-                    merged_dict[old_id] = new_dict[cur_id]
-                    seen_keys.add(cur_id)
-            # Add pairs that are left from new_dict into old_to_new
-            for cur_id, new_node in new_dict.items():
-                if cur_id not in seen_keys:
-                    merged_dict[cur_id] = new_node
-            old_to_new = merged_dict
+        if len(_thickets) > 1:
+            union_graph, old_to_new = Ensemble._union_graphs(
+                [th.graph for th in _thickets]
+            )
         # Update the nodes in the dataframe
         for i in range(len(_thickets)):
+            running_stats = _thickets[i].running_stats
+            valid = running_stats.is_valid(_thickets[i].dataframe)
             _thickets[i].graph = union_graph
-            idx_names = _thickets[i].dataframe.index.names
-            _thickets[i].dataframe = _thickets[i].dataframe.reset_index()
-            replace_dict = {}
-            for node in _thickets[i].dataframe["node"]:
-                node_id = id(node)
-                if node_id in old_to_new:
-                    check_same_frame(node, old_to_new[node_id])
-                    replace_dict[node] = old_to_new[node_id]
-            _thickets[i].dataframe["node"] = (
-                _thickets[i].dataframe["node"].replace(replace_dict)
+            _thickets[i].dataframe.index = Ensemble._remap_nodes(
+                _thickets[i].dataframe.index, old_to_new
             )
-            _thickets[i].dataframe = _thickets[i].dataframe.set_index(idx_names)
             _thickets[i].dataframe = _thickets[i].dataframe.sort_index()
+            if len(running_stats) > 0:
+                # Sorting the rows keeps the statistics of each node valid
+                if valid:
+                    running_stats = running_stats.remap(old_to_new)
+                    running_stats.bind(_thickets[i].dataframe)
+                else:
+                    running_stats.clear()
+                _thickets[i].running_stats = running_stats
         return union_graph, _thickets
 
+    @staticmethod
+    def _union_graphs(graphs):
+        """Create the union of a list of graphs in a single pass.
+
+        The nodes of all of the graphs are inserted into a call-path trie, keyed by
+        their parent in the union graph, their frame and their position among the
+        siblings with the same frame. Equal call paths from all of the graphs are
+        mapped to the same union node, which is equivalent to unioning the graphs
+        pairwise with Graph.union, without building the intermediate graphs and
+        merging their mappings.
+
+        Arguments:
+            graphs (list): list of hatchet Graph objects
+
+        Returns:
+            (tuple): tuple containing:
+                (hatchet.Graph): union graph
+                (dict): mapping of id() of the nodes of the graphs to union nodes
+        """
+        old_to_new = {}
+
+        def _merge(children, parent):
+            """Merge the children of the nodes mapped to parent.
+
+            Arguments:
+                children (list): list of the children of each node mapped to parent
+                parent (Node): union node of the parents, or None for the roots
+
+            Returns:
+                (list): list of merged children
+            """
+            groups = {}
+            for nodes in children:
+                occurrences = defaultdict(int)
+                for node in sorted(nodes, key=lambda n: n.frame):
+                    key = (node.frame, occurrences[node.frame])
+                    occurrences[node.frame] += 1
+                    groups.setdefault(key, []).append(node)
+
+            new_children = []
+            for key in sorted(groups):
+                members = groups[key]
+                # Nodes with multiple parents may already be mapped
+                new_node = next(
+                    (old_to_new[id(n)] for n in members if id(n) in old_to_new),
+                    None,
+                )
+                if new_node is None:
+                    new_node = members[0].copy()
+                unmapped = [n for n in members if id(n) not in old_to_new]
+                for node in unmapped:
+                    old_to_new[id(node)] = new_node
+
+                _merge([n.children for n in unmapped], new_node)
+
+                if parent is not None:
+                    parent.add_child(new_node)
+                    new_node.add_parent(parent)
+                new_children.append(new_node)
+            return new_children
+
+        union_graph = Graph(_merge([g.roots for g in graphs], None))
+        union_graph.enumerate_traverse()
+
+        return union_graph, old_to_new
+
+    @staticmethod
+    def _remap_nodes(index, old_to_new):
+        """Replace the nodes in the "node" level of an index with their nodes in the
+        union graph.
+
+        The mapping is computed once per distinct node in the level and applied to the
+        rows through the level codes, instead of once per row.
+
+        Arguments:
+            index (pandas.Index): index with a "node" level
+            old_to_new (dict): mapping of id() of the old nodes to the new nodes
+
+        Returns:
+            (pandas.Index): index with the new nodes
+        """
+        if isinstance(index, pd.MultiIndex):
+            # Unused level values could collide with the new nodes when factorized
+            index = index.remove_unused_levels()
+            level_num = index.names.index("node")
+            level = index.levels[level_num]
+            level_codes = index.codes[level_num]
+        else:
+            level, level_codes = index, np.arange(len(index))
+
+        new_nodes = np.empty(len(level), dtype=object)
+        for j, node in enumerate(level):
+            new_node = old_to_new.get(id(node))
+            if new_node is None:
+                new_nodes[j] = node
+            else:
+                check_same_frame(node, new_node)
+                new_nodes[j] = new_node
+        # Different old nodes can map to the same new node
+        codes, uniques = pd.factorize(new_nodes)
+        new_level = pd.Index(uniques, dtype=object, name="node")
+        new_codes = codes[level_codes]
+
+        if isinstance(index, pd.MultiIndex):
+            levels = list(index.levels)
+            levels[level_num] = new_level
+            codes = list(index.codes)
+            codes[level_num] = new_codes
+            return pd.MultiIndex(
+                levels=levels, codes=codes, names=index.names, verify_integrity=False
+            ).remove_unused_levels()
+        return new_level.take(new_codes)
+
     @staticmethod
     def _columns(
         thickets,
@@ -93,6 +194,11 @@ class Ensemble:
         in the column direction. New column multi-index will be created with columns
         under separate indexer headers.
 
+        The profiles of each thicket are mapped to their new index values with a single
+        lookup per table, the tables are aligned with one join and the "name" column is
+        filled from the unique nodes of the index. The input thickets are not modified
+        or copied.
+
         Arguments:
             headers (list): List of headers to use for the new columnar multi-index
             metadata_key (str): Name of the column from the metadata tables to replace the 'profile'
@@ -131,212 +237,200 @@ class Ensemble:
                     verify_sorted_profile(th.dataframe)
                     verify_sorted_profile(th.metadata)
 
-        def _create_multiindex_columns(df, upper_idx_name):
-            """Helper function to create multi-index column names from a dataframe's
-            current columns.
+        def _unify_graphs():
+            """Create the union graph and remap the performance data tables onto it.
+
+            Returns:
+                (tuple): tuple containing:
+                    (hatchet.Graph): unified graph
+                    (list): list of remapped performance data tables
+            """
+            if len(thickets) == 1:
+                # The result must not share its graph with the input
+                th = thickets[0].deepcopy()
+                helpers._set_node_ordering([th])
+                return th.graph, [th.dataframe]
+            union_graph, old_to_new = Ensemble._union_graphs(
+                [th.graph for th in thickets]
+            )
+            dataframes = []
+            for th in thickets:
+                df = th.dataframe.copy(deep=False)
+                df.index = Ensemble._remap_nodes(df.index, old_to_new)
+                dataframes.append(df)
+            return union_graph, dataframes
+
+        def _header_columns(df, header):
+            """Create the multi-index columns of a table under a header. Headers may
+            be tuples, so they are not passed to pd.concat as keys.
 
             Arguments:
-            df (DataFrame): source dataframe
-            upper_idx_name (String): name of the newly added index in the multi-index.
-                Prepended before each column as a tuple.
+                df (DataFrame): source dataframe
+                header (object): header prepended before each column as a tuple
 
             Returns:
-                (list): list of new indicies generated from the source dataframe
+                (MultiIndex): new columns
             """
-            new_idx = []
-            for column in df.columns:
-                new_tuple = (upper_idx_name, column)
-                new_idx.append(new_tuple)
-            return new_idx
+            return pd.MultiIndex.from_tuples(
+                [(header, column) for column in df.columns]
+            )
 
-        def _handle_metadata():
-            """Handle operations to create new concatenated columnar axis metadata table."""
-            # Update index to reflect performance data table index
-            if metadata_key != inner_idx:
-                for i in range(len(thickets_cp)):
-                    thickets_cp[i].metadata.reset_index(drop=True, inplace=True)
+        def _profile_keys(th):
+            """Map the profiles of a thicket to their values in the new profile index.
+
+            Returns:
+                (Series): new profile index values, indexed by profile
+            """
             if metadata_key is None:
-                for i in range(len(thickets_cp)):
-                    thickets_cp[i].metadata.index.set_names(
-                        thickets_cp[i].profile_idx_name, inplace=True
-                    )
-            else:
-                for i in range(len(thickets_cp)):
-                    if metadata_key != inner_idx:
-                        thickets_cp[i].metadata.set_index(metadata_key, inplace=True)
-                    thickets_cp[i].metadata.sort_index(inplace=True)
+                # Profiles are sorted, so they match up by position
+                return pd.Series(range(len(th.metadata)), index=th.metadata.index)
+            if metadata_key == inner_idx:
+                return th.metadata.index.to_series()
+            return th.metadata[metadata_key]
 
-            # Create multi-index columns
-            for i in range(len(thickets_cp)):
-                thickets_cp[i].metadata.columns = pd.MultiIndex.from_tuples(
-                    _create_multiindex_columns(thickets_cp[i].metadata, headers[i])
+        def _handle_perfdata():
+            """Handle operations to create new concatenated columnar axis performance data table.
+
+            Returns:
+                (DataFrame): concatenated performance data table
+            """
+            tables = []
+            for i, df in enumerate(dataframes):
+                # Hash join of the distinct profiles against the profile keys
+                new_values = profile_keys[i].reindex(df.index.levels[1]).to_numpy()
+                df.index = pd.MultiIndex.from_arrays(
+                    [
+                        df.index.get_level_values(0),
+                        new_values[df.index.codes[1]],
+                    ],
+                    names=[
+                        df.index.names[0],
+                        (
+                            thickets[i].profile_idx_name
+                            if metadata_key is None
+                            else metadata_key
+                        ),
+                    ],
                 )
+                df = df.drop(columns="name")
+                df.columns = _header_columns(df, headers[i])
+                tables.append(df.sort_index())
 
-            # Concat metadata together
-            combined_th.metadata = pd.concat(
-                [thickets_cp[i].metadata for i in range(len(thickets_cp))],
-                axis="columns",
-            )
+            # Align all of the tables in one join
+            combined_df = pd.concat(tables, axis="columns")
 
-        def _handle_misc():
-            """Misceallaneous Thicket object operations."""
-            for i in range(1, len(thickets_cp)):
-                combined_th.profile += thickets_cp[i].profile  # Update "profile" object
-                combined_th.profile_mapping.update(
-                    thickets_cp[i].profile_mapping
-                )  # Update "profile_mapping" object
-            combined_th.profile = [new_mappings[prf] for prf in combined_th.profile]
-            profile_mapping_cp = combined_th.profile_mapping.copy()
-            for k, v in profile_mapping_cp.items():
-                combined_th.profile_mapping[
-                    new_mappings[k]
-                ] = combined_th.profile_mapping.pop(k)
-            combined_th.performance_cols = helpers._get_perf_columns(
-                combined_th.dataframe
-            )
+            # Extract "name" column to upper level
+            nodes = combined_df.index.levels[0]
+            names = np.array([n.frame["name"] for n in nodes], dtype=object)
+            combined_df[("name", "")] = names[combined_df.index.codes[0]]
 
-        def _handle_perfdata():
-            """Handle operations to create new concatenated columnar axis performance data table.
+            return combined_df.sort_index()
+
+        def _handle_metadata():
+            """Handle operations to create new concatenated columnar axis metadata table.
 
             Returns:
-                (dict): dictionary mapping old profiles to new profiles
+                (DataFrame): concatenated metadata table
             """
-            # Create header list if not provided
-            nonlocal headers
-            if headers is None:
-                headers = [i for i in range(len(thickets))]
+            tables = []
+            for i, th in enumerate(thickets):
+                meta = th.metadata
+                # Update index to reflect performance data table index
+                if metadata_key != inner_idx:
+                    meta = meta.reset_index(drop=True)
+                if metadata_key is None:
+                    meta.index.name = th.profile_idx_name
+                else:
+                    if metadata_key != inner_idx:
+                        meta = meta.set_index(metadata_key)
+                    meta = meta.sort_index()
+                meta.columns = _header_columns(meta, headers[i])
+                tables.append(meta)
+
+            return pd.concat(tables, axis="columns")
+
+        def _handle_misc():
+            """Map the metrics, profiles and profile mappings to the new columns and
+            profiles.
 
-            # Update index to reflect performance data table index
+            Returns:
+                (tuple): tuple containing:
+                    (list): exclusive metrics
+                    (list): inclusive metrics
+                    (list): profiles
+                    (dict): profile mapping
+            """
+            exc_metrics = []
+            inc_metrics = []
             new_mappings = {}  # Dictionary mapping old profiles to new profiles
-            if metadata_key is None:  # Create index from scratch
-                new_profiles = [i for i in range(len(thickets_cp[0].profile))]
-                for i in range(len(thickets_cp)):
-                    thickets_cp[i].metadata["new_profiles"] = new_profiles
-                    thickets_cp[i].metadata_columns_to_perfdata(
-                        "new_profiles", drop=True
-                    )
-                    thickets_cp[i].dataframe.reset_index(level=inner_idx, inplace=True)
-                    new_mappings.update(
-                        pd.Series(
-                            thickets_cp[i]
-                            .dataframe["new_profiles"]
-                            .map(lambda x: (x, headers[i]))
-                            .values,
-                            index=thickets_cp[i].dataframe[inner_idx],
-                        ).to_dict()
-                    )
-                    thickets_cp[i].dataframe.drop(inner_idx, axis=1, inplace=True)
-                    thickets_cp[i].dataframe.set_index(
-                        "new_profiles", append=True, inplace=True
-                    )
-                    thickets_cp[i].dataframe.index.rename(
-                        thickets_cp[i].profile_idx_name,
-                        level="new_profiles",
-                        inplace=True,
+            profile_mapping = copy.deepcopy(thickets[0].profile_mapping)
+            for i, th in enumerate(thickets):
+                for column in th.dataframe.columns:
+                    if column in th.exc_metrics:
+                        exc_metrics.append((headers[i], column))
+                    if column in th.inc_metrics:
+                        inc_metrics.append((headers[i], column))
+                new_mappings.update(
+                    (old, (new, headers[i]))
+                    for old, new in zip(
+                        profile_keys[i].index.tolist(), profile_keys[i].tolist()
                     )
-            else:  # Change second-level index to be from metadata's "metadata_key" column
-                for i in range(len(thickets_cp)):
-                    if metadata_key not in thickets_cp[i].dataframe.index.names:
-                        thickets_cp[i].metadata_columns_to_perfdata(metadata_key)
-                    thickets_cp[i].dataframe.reset_index(level=inner_idx, inplace=True)
-                    new_mappings.update(
-                        pd.Series(
-                            thickets_cp[i]
-                            .dataframe[metadata_key]
-                            .map(lambda x: (x, headers[i]))
-                            .values,
-                            index=thickets_cp[i].dataframe[inner_idx],
-                        ).to_dict()
-                    )
-                    if inner_idx != metadata_key:
-                        thickets_cp[i].dataframe.drop(inner_idx, axis=1, inplace=True)
-                    thickets_cp[i].dataframe.set_index(
-                        metadata_key, append=True, inplace=True
-                    )
-                    thickets_cp[i].dataframe.sort_index(inplace=True)
-
-            # Create tuple columns
-            new_columns = [
-                _create_multiindex_columns(th.dataframe, headers[i])
-                for i, th in enumerate(thickets_cp)
-            ]
-            # Clear old metrics (non-tuple)
-            combined_th.exc_metrics.clear()
-            combined_th.inc_metrics.clear()
-            # Update inc/exc metrics
-            for i in range(len(new_columns)):
-                for col_tuple in new_columns[i]:
-                    if col_tuple[1] in thickets_cp[i].exc_metrics:
-                        combined_th.exc_metrics.append(col_tuple)
-                    if col_tuple[1] in thickets_cp[i].inc_metrics:
-                        combined_th.inc_metrics.append(col_tuple)
-            # Update columns
-            for i in range(len(thickets_cp)):
-                thickets_cp[i].dataframe.columns = pd.MultiIndex.from_tuples(
-                    new_columns[i]
                 )
+                if i > 0:
+                    profile_mapping.update(th.profile_mapping)
 
-            # Concat performance data table together
-            combined_th.dataframe = pd.concat(
-                [thickets_cp[i].dataframe for i in range(len(thickets_cp))],
-                axis="columns",
-            )
-
-            # Extract "name" columns to upper level
-            nodes = list(set(combined_th.dataframe.reset_index()["node"]))
-            for node in nodes:
-                combined_th.dataframe.loc[node, "name"] = node.frame["name"]
-            combined_th.dataframe.drop(
-                columns=[(headers[i], "name") for i in range(len(headers))],
-                inplace=True,
-            )
-
-            # Sort DataFrame
-            combined_th.dataframe.sort_index(inplace=True)
-
-            return new_mappings
+            profile = [new_mappings[prf] for th in thickets for prf in th.profile]
+            for k in list(profile_mapping.keys()):
+                profile_mapping[new_mappings[k]] = profile_mapping.pop(k)
 
-        def _handle_statsframe():
-            """Handle operations to create new concatenated columnar axis aggregated statistics table."""
-            # Clear aggregated statistics table
-            combined_th.statsframe = GraphFrame(
-                graph=combined_th.graph,
-                dataframe=helpers._new_statsframe_df(
-                    combined_th.dataframe, multiindex=True
-                ),
-            )
+            return exc_metrics, inc_metrics, profile, profile_mapping
 
         # Step 0A: Variable Initialization
-        combined_th = thickets[0].deepcopy()
-        thickets_cp = [th.deepcopy() for th in thickets]
-        inner_idx = thickets_cp[0].dataframe.index.names[1]
+        if headers is None:
+            headers = [i for i in range(len(thickets))]
+        inner_idx = thickets[0].dataframe.index.names[1]
         # Step 0B: Pre-check of data structures
         _check_structures()
 
-        # Step 1: Unify the thickets. Can be inplace since we are using copies already
-        union_graph, _thickets = Ensemble._unify(
-            thickets_cp, inplace=True, disable_tqdm=disable_tqdm
-        )
-        combined_th.graph = union_graph
-        thickets_cp = _thickets
+        # Step 1: Unify the thickets
+        union_graph, dataframes = _unify_graphs()
+        profile_keys = [_profile_keys(th) for th in thickets]
 
         # Step 2A: Handle performance data tables
-        new_mappings = _handle_perfdata()
+        combined_df = _handle_perfdata()
         # Step 2B: Handle metadata tables
-        _handle_metadata()
-        # Step 2C: Handle statistics table
-        _handle_statsframe()
-        # Step 2D: Handle other Thicket objects.
-        _handle_misc()
+        combined_meta = _handle_metadata()
+        # Step 2C: Handle other Thicket objects.
+        exc_metrics, inc_metrics, profile, profile_mapping = _handle_misc()
 
         # Validate dataframe
-        validate_dataframe(combined_th.dataframe)
-
-        return combined_th
+        validate_dataframe(combined_df)
+
+        # Step 2D: Create the thicket with a new aggregated statistics table. Use the
+        # class of the inputs to avoid a circular import.
+        return type(thickets[0])(
+            graph=union_graph,
+            dataframe=combined_df,
+            exc_metrics=exc_metrics,
+            inc_metrics=inc_metrics,
+            default_metric=thickets[0].default_metric,
+            metadata=combined_meta,
+            profile=profile,
+            profile_mapping=profile_mapping,
+            statsframe=GraphFrame(
+                graph=union_graph,
+                dataframe=helpers._new_statsframe_df(combined_df, multiindex=True),
+            ),
+            statsframe_ops_cache=thickets[0].statsframe_ops_cache.copy(),
+        )
 
     @staticmethod
     def _index(
-        thickets, from_statsframes=False, fill_perfdata=True, disable_tqdm=False
+        thickets,
+        from_statsframes=False,
+        fill_perfdata=True,
+        disable_tqdm=False,
+        running_stats_columns=[],
     ):
         """Unify a list of thickets into a single thicket
 
@@ -345,6 +439,7 @@ class Ensemble:
             from_statsframes (bool): Whether this method was invoked from from_statsframes
             fill_perfdata (bool): whether to fill missing performance data with NaNs
             disable_tqdm (bool): whether to disable tqdm progress bar
+            running_stats_columns (list): columns to merge the running statistics of
 
         Returns:
             unify_graph (hatchet.Graph): unified graph,
@@ -354,17 +449,15 @@ class Ensemble:
             unify_metadata (DataFrame): unified metadata,
             unify_profile (list): profiles,
             unify_profile_mapping (dict): profile mapping
+            unify_running_stats (RunningStats): merged running statistics
         """
 
         # Add missing indicies to thickets
         helpers._resolve_missing_indicies(thickets)
 
         # Initialize attributes
-        unify_graph = None
-        unify_df = pd.DataFrame()
         unify_inc_metrics = []
         unify_exc_metrics = []
-        unify_metadata = pd.DataFrame()
         unify_profile = []
         unify_profile_mapping = OrderedDict()
 
@@ -374,21 +467,24 @@ class Ensemble:
             # Extend metrics
             unify_inc_metrics.extend(th.inc_metrics)
             unify_exc_metrics.extend(th.exc_metrics)
-            # Extend metadata
-            if len(th.metadata) > 0:
-                curr_meta = th.metadata.copy()
-                unify_metadata = pd.concat([curr_meta, unify_metadata])
             # Extend profile
             if th.profile is not None:
                 unify_profile.extend(th.profile)
             # Extend profile mapping
             if th.profile_mapping is not None:
                 unify_profile_mapping.update(th.profile_mapping)
-            # Extend dataframe
-            unify_df = pd.concat([th.dataframe, unify_df])
         # Sort by keys
         unify_profile_mapping = OrderedDict(sorted(unify_profile_mapping.items()))
 
+        # Running statistics of the thickets are merged, and only computed for the
+        # thickets without them
+        unify_running_stats = _merge_thickets(thickets, running_stats_columns)
+
+        # Concatenate all of the tables at once instead of growing them per thicket
+        unify_df = pd.concat([th.dataframe for th in thickets])
+        meta_list = [th.metadata for th in thickets if len(th.metadata) > 0]
+        unify_metadata = pd.concat(meta_list) if meta_list else pd.DataFrame()
+
         # Validate unify_df before next operation
         validate_dataframe(unify_df)
 
@@ -413,5 +509,6 @@ class Ensemble:
             unify_metadata,
             unify_profile,
             unify_profile_mapping,
+            unify_running_stats,
         )
         return unify_parts
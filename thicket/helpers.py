@@ -3,7 +3,14 @@
 #
 # SPDX-License-Identifier: MIT
 
+import itertools
+import json
+
+from hatchet.frame import Frame
+from hatchet.graph import Graph
+from hatchet.node import Node
 from more_itertools import powerset
+import numpy as np
 import pandas as pd
 
 
@@ -65,6 +72,24 @@ def _missing_nodes_to_list(a_df, b_df):
     return missing_nodes
 
 
+def _unique_nodes(index):
+    """Get the distinct nodes in the "node" level of an index.
+
+    For a MultiIndex, the nodes are taken from the level by the codes used in the
+    index, without hashing the node of every row.
+
+    Arguments:
+        index (pandas.Index): index with a "node" level
+
+    Returns:
+        (pandas.Index): distinct nodes
+    """
+    if isinstance(index, pd.MultiIndex):
+        level = index.names.index("node")
+        return index.levels[level].take(np.unique(index.codes[level]))
+    return index.unique()
+
+
 def _new_statsframe_df(df, multiindex=False):
     """Generate new aggregated statistics table from a dataframe. This is most commonly
     needed when changes are made to the performance data table's index.
@@ -77,7 +102,7 @@ def _new_statsframe_df(df, multiindex=False):
     Returns:
         (DataFrame): new aggregated statistics table
     """
-    nodes = list(set(df.reset_index()["node"]))  # List of nodes
+    nodes = list(set(_unique_nodes(df.index)))  # List of nodes
     names = [node.frame["name"] for node in nodes]  # List of names
 
     # Create new dataframe with "node" index and "name" data by default.
@@ -92,6 +117,48 @@ def _new_statsframe_df(df, multiindex=False):
     return new_df
 
 
+def _changed_nodes(old_df, new_df, columns=None):
+    """Find the nodes whose rows in some columns of the performance data table
+    changed. Rows are compared by index, and NaN's are equal.
+
+    Arguments:
+        old_df (DataFrame): performance data table before the change, indexed by the
+            node objects of new_df. Nodes with duplicate rows, like merged nodes, are
+            changed.
+        new_df (DataFrame): performance data table after the change
+        columns (list, optional): columns to compare. All columns if None.
+
+    Returns:
+        (dict): changed nodes of new_df, and nodes with rows in new_df but not in
+            old_df, by id
+    """
+    new_nodes = {id(n): n for n in _unique_nodes(new_df.index)}
+    if columns is None:
+        columns = list(new_df.columns)
+    if any(c not in old_df.columns or c not in new_df.columns for c in columns):
+        return new_nodes
+
+    old = old_df[columns]
+    new = new_df[columns]
+    duplicated = old.index.duplicated(keep=False)
+    aligned = old[~duplicated].reindex(new.index)
+    same = (aligned == new) | (aligned.isna() & new.isna())
+    changed_rows = ~same.all(axis=1).to_numpy() | ~new.index.isin(
+        old.index[~duplicated]
+    )
+    # Rows removed from, or merged in, a node
+    removed_rows = duplicated | ~old.index.isin(new.index)
+
+    changed = {}
+    for node in itertools.chain(
+        new.index.get_level_values("node")[changed_rows],
+        old.index.get_level_values("node")[removed_rows],
+    ):
+        if id(node) in new_nodes:
+            changed[id(node)] = node
+    return changed
+
+
 def _print_graph(graph):
     """Print the nodes in a hatchet graph"""
     i = 0
@@ -168,3 +235,180 @@ def _get_perf_columns(df):
 def _powerset_from_tuple(tup):
     pset = [y for y in powerset(tup)]
     return {x[0] if len(x) == 1 else x for x in pset}
+
+
+def _to_tuples(obj):
+    """Recursively convert lists from JSON back into tuples, so they can be used as
+    profiles, dictionary keys and column names."""
+    if isinstance(obj, list):
+        return tuple(_to_tuples(x) for x in obj)
+    return obj
+
+
+def _nodes_to_nids(index):
+    """Replace the Node objects of the "node" level of an index with their nid's.
+
+    Only the unique nodes are visited, the codes of the index are reused as-is.
+    """
+    if isinstance(index, pd.MultiIndex):
+        level = index.names.index("node")
+        nids = pd.Index(
+            [n._hatchet_nid for n in index.levels[level]], dtype=np.int64, name="node"
+        )
+        return index.set_levels(nids, level=level, verify_integrity=False)
+    return pd.Index([n._hatchet_nid for n in index], dtype=np.int64, name="node")
+
+
+def _has_nid_index(df):
+    """Check if the "node" level of a DataFrame's index holds integer node id's
+    instead of Node objects."""
+    index = df.index
+    if "node" not in index.names:
+        return False
+    if isinstance(index, pd.MultiIndex):
+        index = index.levels[index.names.index("node")]
+    return pd.api.types.is_integer_dtype(index.dtype)
+
+
+def _node_table(graph):
+    """Get an array of the Node objects of a graph indexed by their nid."""
+    nodes = list(graph.traverse())
+    table = np.empty(
+        max(n._hatchet_nid for n in nodes) + 1 if len(nodes) > 0 else 0, dtype=object
+    )
+    for n in nodes:
+        table[n._hatchet_nid] = n
+    return table
+
+
+def _nids_to_nodes(index, nodes):
+    """Inverse of _nodes_to_nids, using the array of Node objects indexed by nid."""
+    if isinstance(index, pd.MultiIndex):
+        level = index.names.index("node")
+        new_level = pd.Index(nodes[index.levels[level].to_numpy()], name="node")
+        return index.set_levels(new_level, level=level, verify_integrity=False)
+    return pd.Index(nodes[index.to_numpy()], dtype=object, name="node")
+
+
+def _column_to_list(values):
+    """Convert an array-like of values to a list of JSON-serializable Python objects,
+    with missing values as None."""
+    values = pd.Series(values)
+    out = values.to_numpy(dtype=object, copy=True)
+    out[values.isna().to_numpy()] = None
+    return out.tolist()
+
+
+def _table_to_json_split(df, chunk_size=65536):
+    """Serialize a DataFrame column by column in the "split" JSON layout.
+
+    The node level of the index is written as nid's. Fragments of the JSON document
+    are generated so that large tables can be streamed to a file.
+
+    Arguments:
+        df (DataFrame): DataFrame to serialize
+        chunk_size (int): number of values per fragment
+
+    Yields:
+        (str): fragments of the JSON object {"index_names", "index", "columns", "data"}
+    """
+    index = _nodes_to_nids(df.index) if "node" in df.index.names else df.index
+
+    def _array_chunks(arrays):
+        for i, arr in enumerate(arrays):
+            yield "[" if i == 0 else ", ["
+            for start in range(0, len(arr), chunk_size):
+                chunk = json.dumps(_column_to_list(arr[start : start + chunk_size]))
+                yield chunk[1:-1] if start == 0 else ", " + chunk[1:-1]
+            yield "]"
+
+    yield '{"index_names": ' + json.dumps(list(index.names)) + ', "index": ['
+    yield from _array_chunks([index.get_level_values(i) for i in range(index.nlevels)])
+    yield '], "columns": ' + json.dumps(df.columns.tolist()) + ', "data": ['
+    yield from _array_chunks([df.iloc[:, i] for i in range(df.shape[1])])
+    yield "]}"
+
+
+def _table_to_json_records(df, chunk_size=65536):
+    """Serialize a DataFrame in the "records" JSON layout, one object per row with the
+    index levels as keys.
+
+    The node level of the index is written as nid's. Fragments of the JSON array are
+    generated so that large tables can be streamed to a file.
+
+    Arguments:
+        df (DataFrame): DataFrame to serialize
+        chunk_size (int): number of rows per fragment
+
+    Yields:
+        (str): fragments of the JSON array of records
+    """
+    index = _nodes_to_nids(df.index) if "node" in df.index.names else df.index
+    keys = list(index.names) + df.columns.tolist()
+    arrays = [index.get_level_values(i) for i in range(index.nlevels)] + [
+        df.iloc[:, i] for i in range(df.shape[1])
+    ]
+
+    yield "["
+    for start in range(0, len(df), chunk_size):
+        columns = [_column_to_list(arr[start : start + chunk_size]) for arr in arrays]
+        records = [dict(zip(keys, row)) for row in zip(*columns)]
+        chunk = json.dumps(records)
+        yield chunk[1:-1] if start == 0 else ", " + chunk[1:-1]
+    yield "]"
+
+
+def _json_split_to_table(table, nodes):
+    """Inverse of _table_to_json_split.
+
+    Arguments:
+        table (dict): table in the "split" JSON layout
+        nodes (ndarray): array of Node objects indexed by nid
+
+    Returns:
+        (DataFrame): DataFrame with Node objects in the "node" level of the index
+    """
+    index_names = [_to_tuples(name) for name in table["index_names"]]
+    arrays = []
+    for name, values in zip(index_names, table["index"]):
+        if name == "node":
+            values = nodes[np.asarray(values, dtype=np.int64)]
+        arrays.append(values)
+    if len(arrays) == 1:
+        index = pd.Index(arrays[0], name=index_names[0])
+    else:
+        index = pd.MultiIndex.from_arrays(arrays, names=index_names)
+
+    columns = [_to_tuples(col) for col in table["columns"]]
+    if any(isinstance(col, tuple) for col in columns):
+        columns = pd.MultiIndex.from_tuples(columns)
+    df = pd.DataFrame(dict(enumerate(table["data"])), index=index)
+    df.columns = columns
+    return df
+
+
+def _graph_from_json(graph_spec):
+    """Build a graph from the JSON graph layout written by Thicket.to_json.
+
+    Arguments:
+        graph_spec (dict): mapping of nid to the frame, parents and children of a node
+
+    Returns:
+        (tuple): tuple containing:
+            (hatchet.Graph): graph
+            (ndarray): array of Node objects indexed by nid
+    """
+    nids = [int(nid) for nid in graph_spec]
+    nodes = np.empty(max(nids) + 1 if len(nids) > 0 else 0, dtype=object)
+    for nid, value in zip(nids, graph_spec.values()):
+        nodes[nid] = Node(Frame(value["data"]), hnid=nid)
+
+    roots = []
+    for nid, value in zip(nids, graph_spec.values()):
+        node = nodes[nid]
+        node.children = list(nodes[value["children"]])
+        node.parents = list(nodes[value["parents"]])
+        if len(node.parents) == 0:
+            roots.append(node)
+
+    return Graph(roots), nodes
@@ -4,10 +4,12 @@
 # SPDX-License-Identifier: MIT
 
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 import re
 
 from hatchet import QueryMatcher
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
@@ -37,7 +39,7 @@ def _match_call_trace_regex(
         call_trace_str = "::".join([s.lower() for s in temp_call_trace])
     if debug:
         print(f"\tKernel Call Trace: {kernel_call_trace}")
-        print(f"\t{action.name()}")
+        print(f"\t{demangled_kernel_name if action is None else action.name()}")
 
     # Pattern ends with ":" if RAJA_CUDA, "<" if Base_CUDA
     kernel_pattern = rf"{call_trace_str}::(\w+)[<:]"
@@ -158,21 +160,205 @@ def _build_query_from_ncu_trace(kernel_call_trace):
     return query
 
 
+def _match_ncu_trace(node_index, kernel_call_trace):
+    """Find the nodes matched by the query from _build_query_from_ncu_trace, by
+    walking the call-path index of the graph instead of applying the query.
+
+    The names of the call trace, except the last, are a chain of nodes found with
+    NodeIndex.by_name_chain. Below the end of each chain, the search descends through
+    nodes whose name does not contain the last name of the trace, and stops at nodes
+    whose name contains it, like the "*" and "." query nodes. Node names are taken
+    from the node frames.
+
+    Arguments:
+        node_index (NodeIndex): index of the nodes of the Thicket graph
+        kernel_call_trace (list): Call trace as seen from NCU, with the kernel name
+            appended
+
+    Returns:
+        (list): matched nodes
+    """
+    *prefix, kernel = kernel_call_trace
+    matched = {}
+    # Whether the search below a node reaches a match
+    reaches_match = {}
+
+    def _descend(node):
+        if id(node) in reaches_match:
+            return reaches_match[id(node)]
+        found = False
+        for child in node.children:
+            name = child.frame.get("name")
+            if name is not None and kernel in name:
+                matched[id(child)] = child
+                found = True
+            elif _descend(child):
+                matched[id(child)] = child
+                found = True
+        reaches_match[id(node)] = found
+        return found
+
+    for chain in node_index.by_name_chain(prefix):
+        if _descend(chain[-1]):
+            matched.update((id(n), n) for n in chain)
+
+    return list(matched.values())
+
+
+def _load_ncu_report(ncu_report_file, chosen_metrics=None):
+    """Load the kernel actions of an NCU report file into preallocated arrays.
+    Defined at module level so it can be pickled and sent to worker processes.
+
+    Arguments:
+        ncu_report_file (str): NCU report file
+        chosen_metrics (set): metrics to read, or None for all metrics
+
+    Returns:
+        (dict): the metric names and their rollup operations, and the demangled
+            kernel name, call trace and metric values of each action with a call
+            trace. Actions without a call trace (warmup kernels) are skipped.
+    """
+    # Lazy import ncu_report
+    import ncu_report
+
+    # Load file
+    report = ncu_report.load_report(ncu_report_file)
+
+    # Error check
+    num_ranges = report.num_ranges()
+    if num_ranges > 1:
+        raise ValueError(
+            "NCU report file "
+            + ncu_report_file
+            + " has multiple ranges. Not supported yet."
+        )
+    elif num_ranges == 0:
+        raise ValueError(
+            "NCU report file " + ncu_report_file + " has no ranges (no data)."
+        )
+    # Loop through ranges in report
+    for ncu_range in report:
+        # Grab first action
+        first_action = ncu_range.action_by_idx(0)
+        # Metric names, only the chosen ones
+        metric_names = [
+            first_action[name].name()
+            for name in first_action.metric_names()
+            if chosen_metrics is None or name in chosen_metrics
+        ]
+        # Setup rollup dict
+        rollup_dict = {
+            name: first_action[name].rollup_operation() for name in metric_names
+        }
+
+        # Preallocate a column per metric, with a row per action
+        num_actions = len(ncu_range)
+        kernel_names = np.empty(num_actions, dtype=object)
+        call_traces = np.empty(num_actions, dtype=object)
+        columns = {name: np.empty(num_actions, dtype=object) for name in metric_names}
+        num_rows = 0
+
+        for action in ncu_range:
+            # Get NCU-side kernel trace
+            kernel_call_trace = list(
+                action.nvtx_state().domain_by_id(0).push_pop_ranges()
+            )
+            # Skip warmup kernels
+            if len(kernel_call_trace) == 0:
+                continue
+            # Demangled name of kernel
+            kernel_names[num_rows] = action.name(ncu_report.IAction.NameBase_DEMANGLED)
+            call_traces[num_rows] = kernel_call_trace
+            for name, column in columns.items():
+                column[num_rows] = action[name].value()
+            num_rows += 1
+
+    return {
+        "metric_names": metric_names,
+        "rollup_dict": rollup_dict,
+        "kernel_names": kernel_names[:num_rows],
+        "call_traces": call_traces[:num_rows],
+        "columns": {name: column[:num_rows] for name, column in columns.items()},
+    }
+
+
+def _load_ncu_reports(ncu_report_files, chosen_metrics, workers=None, executor=None):
+    """Generator loading NCU report files with _load_ncu_report, yielded in the order
+    of ncu_report_files.
+
+    Arguments:
+        ncu_report_files (list): NCU report files
+        chosen_metrics (set): metrics to read, or None for all metrics
+        workers (int, optional): number of processes to load the reports with
+        executor (concurrent.futures.Executor, optional): executor to load the reports
+            with. Takes precedence over workers
+
+    Returns:
+        (generator): loaded reports, one per file
+    """
+    if executor is None and (workers is None or workers <= 1):
+        for ncu_report_file in ncu_report_files:
+            yield _load_ncu_report(ncu_report_file, chosen_metrics)
+        return
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    futures = [
+        executor.submit(_load_ncu_report, ncu_report_file, chosen_metrics)
+        for ncu_report_file in ncu_report_files
+    ]
+    try:
+        # Collect in submission order so the result is deterministic
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
 class NCUReader:
     """Object to interface and pull NCU report data into Thicket"""
 
-    def _read_ncu(self, thicket, ncu_report_mapping, debug=False, disable_tqdm=False):
-        """Read NCU report files and return dictionary of data.
+    def _read_ncu(
+        self,
+        thicket,
+        ncu_report_mapping,
+        chosen_metrics=None,
+        debug=False,
+        disable_tqdm=False,
+        workers=None,
+        executor=None,
+        cache=None,
+    ):
+        """Read NCU report files into one column per metric, with one row per kernel
+        action.
 
         Arguments:
             thicket (Thicket): thicket object to add ncu metrics to
             ncu_report_mapping (dict): mapping from NCU report file to profile
+            chosen_metrics (list): metrics to read. By default, all metrics are read.
             debug (bool): whether to print debug statements
             disable_tqdm (bool): whether to disable tqdm progress bar
+            workers (int, optional): number of processes to load the reports with
+            executor (concurrent.futures.Executor, optional): executor to load the
+                reports with. Takes precedence over workers
+            cache (KernelMatchCache, optional): cache of the nodes matched to kernels
 
         Returns:
-            data_dict (dict): dictionary of NCU data where key is tuple, (node, profile), mapping to list of dictionaries for per-rep data that is aggregated down to one dictionary.
+            (tuple): tuple containing:
+                (ndarray): matched node of each action
+                (list): profile of each action
+                (DataFrame): metric values of each action
+                (dict): rollup operation of each metric
         """
+        if len(ncu_report_mapping) == 0:
+            raise ValueError(
+                "No NCU report files were given (empty ncu_report_mapping)."
+            )
+
         # Lazy import ncu_report
         import ncu_report
 
@@ -185,146 +371,207 @@ class NCUReader:
             ncu_report.IMetric.RollupOperation_SUM: pd.Series.sum,  # 4
         }
 
-        # Initialize dict
-        data_dict = defaultdict(list)
+        chosen_metrics = None if chosen_metrics is None else set(chosen_metrics)
+        profile_mapping_flipped = {v: k for k, v in thicket.profile_mapping.items()}
+
+        nodes = []
+        profiles = []
+        values = []
         rollup_dict = {}
         # Kernel mapping from NCU kernel to thicket node to save re-querying
         kernel_map = {}
 
-        # Loop through NCU files
-        for ncu_report_file in ncu_report_mapping:
-            # Set error check flag
-            call_trace_found = False
-
+        # Reports are loaded independently, possibly in parallel, and matched to the
+        # call tree in order
+        ncu_report_files = list(ncu_report_mapping)
+        pbar = tqdm(
+            zip(
+                ncu_report_files,
+                _load_ncu_reports(ncu_report_files, chosen_metrics, workers, executor),
+            ),
+            total=len(ncu_report_files),
+            disable=disable_tqdm,
+        )
+        for ncu_report_file, loaded in pbar:
+            pbar.set_description(f"Processing {ncu_report_file}")
             # NCU hash
-            profile_mapping_flipped = {v: k for k, v in thicket.profile_mapping.items()}
             ncu_hash = profile_mapping_flipped[ncu_report_mapping[ncu_report_file]]
 
-            # Relevant for kernel matching
-            variant = thicket.metadata.loc[ncu_hash, "variant"]
-            raja_lambda_cuda = (
-                variant.upper() == "RAJA_CUDA" or variant.upper() == "LAMBDA_CUDA"
+            report_nodes = self._match_report(
+                thicket, ncu_report_file, ncu_hash, loaded, kernel_map, cache, debug
+            )
+            # Drop the kernels that could not be matched
+            matched = np.array([node is not None for node in report_nodes], dtype=bool)
+            nodes.append(report_nodes[matched])
+            profiles.extend([ncu_hash] * matched.sum())
+            values.append(
+                pd.DataFrame(
+                    {
+                        name: column[matched]
+                        for name, column in loaded["columns"].items()
+                    },
+                    index=pd.RangeIndex(matched.sum()),
+                    columns=loaded["metric_names"],
+                )
             )
+            rollup_dict.update(loaded["rollup_dict"])
+
+        if cache is not None:
+            cache.save()
+
+        return (
+            np.concatenate(nodes),
+            profiles,
+            pd.concat(values, ignore_index=True).infer_objects(),
+            rollup_dict,
+        )
 
-            # Load file
-            report = ncu_report.load_report(ncu_report_file)
+    def _match_report(
+        self, thicket, ncu_report_file, ncu_hash, loaded, kernel_map, cache, debug
+    ):
+        """Match the kernels of a loaded NCU report to the nodes of the call tree.
 
-            # Error check
-            num_ranges = report.num_ranges()
-            if num_ranges > 1:
-                raise ValueError(
-                    "NCU report file "
-                    + ncu_report_file
-                    + " has multiple ranges. Not supported yet."
+        Arguments:
+            thicket (Thicket): thicket object to add ncu metrics to
+            ncu_report_file (str): NCU report file
+            ncu_hash (str): profile of the report
+            loaded (dict): loaded report, from _load_ncu_report
+            kernel_map (dict): mapping from demangled kernel name to matched node,
+                updated with the kernels of the report
+            cache (KernelMatchCache): cache of the nodes matched to kernels, or None
+            debug (bool): whether to print debug statements
+
+        Returns:
+            (ndarray): matched node of each action, or None for the kernels that are
+                skipped
+        """
+        # Relevant for kernel matching
+        variant = thicket.metadata.loc[ncu_hash, "variant"]
+        raja_lambda_cuda = (
+            variant.upper() == "RAJA_CUDA" or variant.upper() == "LAMBDA_CUDA"
+        )
+
+        if len(loaded["kernel_names"]) == 0:
+            raise ValueError(
+                f"No kernel call traces found in {ncu_report_file}.\nCheck you are enabling the NVTX Caliper service when running NCU."
+            )
+
+        node_index = thicket.node_index
+        matched = np.empty(len(loaded["kernel_names"]), dtype=object)
+        for i, (demangled_kernel_name, kernel_call_trace) in enumerate(
+            zip(loaded["kernel_names"], loaded["call_traces"])
+        ):
+            if debug:
+                print(f"Action: {i}")
+            (
+                kernel_str,
+                demangled_kernel_name,
+                instance_num,
+                instance_exists,
+                skip_kernel,
+            ) = _match_call_trace_regex(kernel_call_trace, demangled_kernel_name, debug)
+            if skip_kernel:
+                continue
+
+            # Add kernel name to the end of the trace tuple
+            kernel_call_trace = kernel_call_trace + [kernel_str]
+
+            # Match ncu kernel to thicket node
+            matched_node = None
+            key = None
+            if demangled_kernel_name in kernel_map:
+                # Skip query building
+                matched_node = kernel_map[demangled_kernel_name]
+            elif cache is not None:  # kernel hasn't been seen yet
+                # Load the node matched in an earlier session
+                key = cache.key(
+                    node_index.fingerprint(), demangled_kernel_name, variant
                 )
-            elif num_ranges == 0:
-                raise ValueError(
-                    "NCU report file " + ncu_report_file + " has no ranges (no data)."
+                position = cache.load(key)
+                if position is not None:
+                    matched_node = node_index.node_at(position)
+            if matched_node is None:
+                # Walk the call-path index with the trace
+                node_set = _match_ncu_trace(node_index, kernel_call_trace)
+                # Find the correct node. This may also get the parent so we take the last one
+                matched_nodes = _match_kernel_str_to_cali(
+                    node_set,
+                    kernel_str,
+                    instance_num,
+                    raja_lambda_cuda,
+                    instance_exists,
                 )
-            # Loop through ranges in report
-            for range in report:
-                # Grab first action
-                first_action = range.action_by_idx(0)
-                # Metric names
-                metric_names = [
-                    first_action[name].name() for name in first_action.metric_names()
-                ]
-                # Setup rollup dict
-                rollup_dict = {
-                    name: first_action[name].rollup_operation() for name in metric_names
-                }
-
-                # Query action in range
-                pbar = tqdm(range, disable=disable_tqdm)
-                for i, action in enumerate(pbar):
-                    pbar.set_description(f"Processing action {i}/{len(range)}")
-                    if debug:
-                        print(f"Action: {i}")
-                    # Demangled name of kernel
-                    demangled_kernel_name = action.name(
-                        ncu_report.IAction.NameBase_DEMANGLED
+                if len(matched_nodes) > 1:
+                    matched_node = _multi_match_fallback_similarity(
+                        matched_nodes, demangled_kernel_name, debug
+                    )
+                elif len(matched_nodes) == 1:
+                    matched_node = matched_nodes[0]
+                else:
+                    raise ValueError("No node found for kernel: " + kernel_str)
+
+                if debug:
+                    if not raja_lambda_cuda or not instance_exists:
+                        instance_num = "NA"
+                    print(
+                        f"\tMatched NCU kernel:\n\t\t{demangled_kernel_name}\n\tto Caliper Node:\n\t\t{matched_node}"
                     )
-                    # Get NCU-side kernel trace
-                    kernel_call_trace = list(
-                        action.nvtx_state().domain_by_id(0).push_pop_ranges()
+                    print(
+                        f"\tAKA:\n\t\t{kernel_str} (instance {instance_num}) == {kernel_str} (#{instance_num})\n"
+                    )
+                    print("\tAll matched nodes:")
+                    for node in matched_nodes:
+                        print("\t", node)
+
+                if key is not None:
+                    cache.store(
+                        key,
+                        node_index.position(matched_node),
+                        demangled_kernel_name,
+                        variant,
                     )
 
-                    # Skip warmup kernels
-                    if len(kernel_call_trace) == 0:
-                        continue
-                    else:
-                        call_trace_found = True
-
-                        (
-                            kernel_str,
-                            demangled_kernel_name,
-                            instance_num,
-                            instance_exists,
-                            skip_kernel,
-                        ) = _match_call_trace_regex(
-                            kernel_call_trace, demangled_kernel_name, debug, action
-                        )
-                        if skip_kernel:
-                            continue
-
-                        # Add kernel name to the end of the trace tuple
-                        kernel_call_trace.append(kernel_str)
-
-                        # Match ncu kernel to thicket node
-                        matched_node = None
-                        if demangled_kernel_name in kernel_map:
-                            # Skip query building
-                            matched_node = kernel_map[demangled_kernel_name]
-                        else:  # kernel hasn't been seen yet
-                            # Build query
-                            query = _build_query_from_ncu_trace(kernel_call_trace)
-                            # Apply the query
-                            node_set = query.apply(thicket)
-                            # Find the correct node. This may also get the parent so we take the last one
-                            matched_nodes = _match_kernel_str_to_cali(
-                                node_set,
-                                kernel_str,
-                                instance_num,
-                                raja_lambda_cuda,
-                                instance_exists,
-                            )
-                            if len(matched_nodes) > 1:
-                                matched_node = _multi_match_fallback_similarity(
-                                    matched_nodes, demangled_kernel_name, debug
-                                )
-                            elif len(matched_nodes) == 1:
-                                matched_node = matched_nodes[0]
-                            else:
-                                raise ValueError(
-                                    "No node found for kernel: " + kernel_str
-                                )
-
-                            if debug:
-                                if not raja_lambda_cuda or not instance_exists:
-                                    instance_num = "NA"
-                                print(
-                                    f"\tMatched NCU kernel:\n\t\t{demangled_kernel_name}\n\tto Caliper Node:\n\t\t{matched_node}"
-                                )
-                                print(
-                                    f"\tAKA:\n\t\t{kernel_str} (instance {instance_num}) == {kernel_str} (#{instance_num})\n"
-                                )
-                                print("\tAll matched nodes:")
-                                for node in matched_nodes:
-                                    print("\t", node)
-
-                        # Set mapping
-                        kernel_map[demangled_kernel_name] = matched_node
-
-                        metric_values = [action[name].value() for name in metric_names]
-
-                        assert len(metric_names) == len(metric_values)
-                        data_dict[(matched_node, ncu_hash)].append(
-                            dict(zip(metric_names, metric_values))
-                        )
-
-            if not call_trace_found:
-                raise ValueError(
-                    f"No kernel call traces found in {ncu_report_file}.\nCheck you are enabling the NVTX Caliper service when running NCU."
-                )
+            # Set mapping
+            kernel_map[demangled_kernel_name] = matched_node
+            matched[i] = matched_node
+
+        return matched
 
-        return data_dict, rollup_dict
+    def _rollup(self, nodes, profiles, values, rollup_dict, index_names):
+        """Aggregate the rows of each (node, profile) with the rollup operation of
+        each metric, using one grouped reduction per rollup operation. Metrics without
+        a rollup operation, or that are not numeric, take the value of the first row.
+
+        Arguments:
+            nodes (ndarray): matched node of each row
+            profiles (list): profile of each row
+            values (DataFrame): metric values of each row
+            rollup_dict (dict): rollup operation of each metric
+            index_names (list): names of the node and profile index levels
+
+        Returns:
+            (DataFrame): aggregated metrics indexed by (node, profile)
+        """
+        node_codes, _ = pd.factorize(nodes)
+        profile_codes, profile_uniques = pd.factorize(pd.Series(profiles, dtype=object))
+        # Groups numbered in order of first appearance
+        groups, _ = pd.factorize(node_codes * len(profile_uniques) + profile_codes)
+        first = np.unique(groups, return_index=True)[1]
+
+        by_operation = defaultdict(list)
+        for name in values.columns:
+            operation = self.rollup_operations[rollup_dict.get(name)]
+            if operation is not None and pd.api.types.is_numeric_dtype(values[name]):
+                by_operation[operation.__name__].append(name)
+
+        first_rows = values.iloc[first]
+        columns = {name: first_rows[name].to_numpy() for name in values.columns}
+        grouped = values.groupby(groups, sort=True)
+        for operation, names in by_operation.items():
+            aggregated = grouped[names].agg(operation)
+            columns.update((name, aggregated[name].to_numpy()) for name in names)
+
+        index = pd.MultiIndex.from_arrays(
+            [nodes[first], [profiles[i] for i in first]], names=index_names
+        )
+        return pd.DataFrame(columns, index=index, columns=values.columns)
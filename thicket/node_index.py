@@ -0,0 +1,262 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from bisect import bisect_left
+from collections import defaultdict
+from hashlib import md5
+import re
+
+from hatchet.node import traversal_order
+
+
+class NodeIndex:
+    """Index of the nodes of a graph by name and by call path.
+
+    The call path of a node is the tuple of the names of the nodes from a root to the
+    node. Nodes with more than one parent are indexed under each of their call paths.
+    Call paths can also be given as strings, with the names joined by sep. Lookups
+    return the nodes in the order of Graph.traverse().
+    """
+
+    def __init__(self, graph, sep="/"):
+        """Index the nodes of a graph.
+
+        Arguments:
+            graph (hatchet.Graph): graph to index
+            sep (str): separator of the names in call path strings
+        """
+        self.graph = graph
+        self.sep = sep
+
+        order = {}
+        self._nodes = []
+        self._names = defaultdict(list)
+        for node in graph.traverse():
+            order[id(node)] = len(order)
+            self._nodes.append(node)
+            self._names[node.frame["name"]].append(node)
+
+        self._paths = defaultdict(list)
+        stack = [
+            (root, (root.frame["name"],))
+            for root in sorted(graph.roots, key=traversal_order, reverse=True)
+        ]
+        while stack:
+            node, path = stack.pop()
+            self._paths[path].append(node)
+            for child in sorted(node.children, key=traversal_order, reverse=True):
+                stack.append((child, path + (child.frame["name"],)))
+        for nodes in self._paths.values():
+            nodes.sort(key=lambda n: order[id(n)])
+
+        self._order = order
+        self._children = None
+        self._fingerprint = None
+        # Prefix lookups bisect the sorted names and paths
+        self._sorted_names = sorted(n for n in self._names if isinstance(n, str))
+        self._sorted_paths = sorted(
+            p for p in self._paths if all(isinstance(n, str) for n in p)
+        )
+
+    def __len__(self):
+        return len(self._order)
+
+    def __reduce__(self):
+        # Rebuilt from the graph when pickled or copied
+        return (NodeIndex, (self.graph, self.sep))
+
+    def _as_path(self, path):
+        if isinstance(path, str):
+            return tuple(path.split(self.sep))
+        return tuple(path)
+
+    def _unique(self, nodes):
+        """Remove duplicate nodes and sort in traversal order."""
+        unique = {id(n): n for n in nodes}
+        return sorted(unique.values(), key=lambda n: self._order[id(n)])
+
+    def position(self, node):
+        """Get the position of a node in traversal order.
+
+        Arguments:
+            node (hatchet.Node): node of the graph
+
+        Returns:
+            (int): position of the node
+        """
+        return self._order[id(node)]
+
+    def node_at(self, position):
+        """Get the node at a position in traversal order.
+
+        Arguments:
+            position (int): position of the node
+
+        Returns:
+            (hatchet.Node): node at position
+        """
+        return self._nodes[position]
+
+    def fingerprint(self):
+        """Get a fingerprint of the graph, from the frames of the nodes and the
+        edges between them. Graphs with the same fingerprint have the same nodes at
+        each position in traversal order.
+
+        Returns:
+            (str): fingerprint of the graph
+        """
+        if self._fingerprint is None:
+            tree = [
+                (
+                    sorted(node.frame.attrs.items()),
+                    sorted(self._order[id(child)] for child in node.children),
+                )
+                for node in self._nodes
+            ]
+            self._fingerprint = md5(repr(tree).encode("utf-8")).hexdigest()
+        return self._fingerprint
+
+    def names(self):
+        """Get the distinct node names, sorted.
+
+        Returns:
+            (list): node names
+        """
+        return list(self._sorted_names)
+
+    def paths(self):
+        """Get the distinct call paths, sorted.
+
+        Returns:
+            (list): call paths, as tuples of names
+        """
+        return list(self._sorted_paths)
+
+    def by_name(self, name):
+        """Get the nodes with a name.
+
+        Arguments:
+            name (str): node name (Node.frame["name"])
+
+        Returns:
+            (list): matching nodes
+        """
+        return list(self._names.get(name, []))
+
+    def by_name_prefix(self, prefix):
+        """Get the nodes whose name starts with a prefix.
+
+        Arguments:
+            prefix (str): name prefix
+
+        Returns:
+            (list): matching nodes
+        """
+        nodes = []
+        i = bisect_left(self._sorted_names, prefix)
+        while i < len(self._sorted_names) and self._sorted_names[i].startswith(prefix):
+            nodes.extend(self._names[self._sorted_names[i]])
+            i += 1
+        return self._unique(nodes)
+
+    def by_name_regex(self, pattern):
+        """Get the nodes whose whole name matches a regular expression.
+
+        Arguments:
+            pattern (str): regular expression
+
+        Returns:
+            (list): matching nodes
+        """
+        regex = re.compile(pattern)
+        return self._unique(
+            n
+            for name in self._sorted_names
+            if regex.fullmatch(name)
+            for n in self._names[name]
+        )
+
+    def by_path(self, path):
+        """Get the nodes at a call path.
+
+        Arguments:
+            path (tuple or str): call path, as a tuple of names or a string of names
+                joined by sep
+
+        Returns:
+            (list): matching nodes
+        """
+        return list(self._paths.get(self._as_path(path), []))
+
+    def by_path_prefix(self, path):
+        """Get the nodes at a call path and in the subtrees below it.
+
+        Arguments:
+            path (tuple or str): call path, as a tuple of names or a string of names
+                joined by sep
+
+        Returns:
+            (list): matching nodes
+        """
+        prefix = self._as_path(path)
+        nodes = []
+        i = bisect_left(self._sorted_paths, prefix)
+        while (
+            i < len(self._sorted_paths)
+            and self._sorted_paths[i][: len(prefix)] == prefix
+        ):
+            nodes.extend(self._paths[self._sorted_paths[i]])
+            i += 1
+        return self._unique(nodes)
+
+    def by_name_chain(self, names):
+        """Get the chains of nodes, each the child of the previous one, with a
+        sequence of names. Chains can start at any node, not only at the roots.
+
+        The children of each node are indexed by name on first use, so a chain is
+        found by walking the index instead of traversing the graph.
+
+        Arguments:
+            names (list): names of the nodes in the chain
+
+        Returns:
+            (list): matching chains, as tuples of nodes
+        """
+        if self._children is None:
+            self._children = {}
+            for node in self._nodes:
+                children = defaultdict(list)
+                for child in sorted(node.children, key=traversal_order):
+                    children[child.frame["name"]].append(child)
+                self._children[id(node)] = children
+
+        if len(names) == 0:
+            return []
+        chains = [(node,) for node in self._names.get(names[0], [])]
+        for name in names[1:]:
+            chains = [
+                chain + (child,)
+                for chain in chains
+                for child in self._children[id(chain[-1])].get(name, [])
+            ]
+        return chains
+
+    def by_path_regex(self, pattern):
+        """Get the nodes whose whole call path string, with the names joined by sep,
+        matches a regular expression.
+
+        Arguments:
+            pattern (str): regular expression
+
+        Returns:
+            (list): matching nodes
+        """
+        regex = re.compile(pattern)
+        return self._unique(
+            n
+            for path in self._sorted_paths
+            if regex.fullmatch(self.sep.join(path))
+            for n in self._paths[path]
+        )
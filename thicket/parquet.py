@@ -0,0 +1,390 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from collections import OrderedDict
+import json
+import os
+
+from hatchet import GraphFrame
+from hatchet.frame import Frame
+from hatchet.graph import Graph
+from hatchet.node import Node
+import numpy as np
+import pandas as pd
+
+from thicket.helpers import _nids_to_nodes, _nodes_to_nids, _to_tuples
+
+ATTRS_FILE = "thicket.json"
+GRAPH_FILE = "graph.parquet"
+DATAFRAME_FILE = "dataframe.parquet"
+METADATA_FILE = "metadata.parquet"
+STATSFRAME_FILE = "statsframe.parquet"
+
+
+def _encode_attr(value):
+    """Convert a frame attribute value to JSON, tagging the tuples, dictionaries and
+    numpy scalars so _decode_attr restores their types.
+
+    Raises:
+        TypeError: if the value has a type that can not be stored
+    """
+    if value is None or type(value) in (str, bool, int, float):
+        return value
+    if isinstance(value, list):
+        return [_encode_attr(v) for v in value]
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode_attr(v) for v in value]}
+    if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        return {"__dict__": {k: _encode_attr(v) for k, v in value.items()}}
+    if isinstance(value, (np.bool_, np.integer, np.floating, np.str_)):
+        return {"__numpy__": value.dtype.str, "value": value.item()}
+    raise TypeError(
+        "Frame attribute value {!r} of type '{}' can not be written to Parquet".format(
+            value, type(value).__name__
+        )
+    )
+
+
+def _decode_attr(value):
+    """Inverse of _encode_attr."""
+    if isinstance(value, list):
+        return [_decode_attr(v) for v in value]
+    if isinstance(value, dict):
+        if "__tuple__" in value:
+            return tuple(_decode_attr(v) for v in value["__tuple__"])
+        if "__numpy__" in value:
+            return np.dtype(value["__numpy__"]).type(value["value"])
+        # Untagged dictionaries were written before the types were tagged
+        items = value["__dict__"] if "__dict__" in value else value
+        return {k: _decode_attr(v) for k, v in items.items()}
+    return value
+
+
+def _graph_to_table(graph):
+    """Flatten a graph into a node table with one row per node.
+
+    Arguments:
+        graph (hatchet.Graph): graph to flatten
+
+    Returns:
+        (DataFrame): node table with the hatchet nid, depth, frame attributes (as JSON)
+            and the nid's of the parents and children of each node, in traversal order
+
+    Raises:
+        TypeError: if a frame attribute has a type that can not be stored
+    """
+    nodes = list(graph.traverse())
+    return pd.DataFrame(
+        {
+            "nid": np.array([n._hatchet_nid for n in nodes], dtype=np.int64),
+            "depth": np.array([n._depth for n in nodes], dtype=np.int64),
+            "frame": [json.dumps(_encode_attr(n.frame.attrs)) for n in nodes],
+            "parents": [[p._hatchet_nid for p in n.parents] for n in nodes],
+            "children": [[c._hatchet_nid for c in n.children] for n in nodes],
+        }
+    )
+
+
+def _table_to_graph(node_table):
+    """Rebuild a graph from the node table created by _graph_to_table.
+
+    Arguments:
+        node_table (DataFrame): node table
+
+    Returns:
+        (tuple): tuple containing:
+            (hatchet.Graph): rebuilt graph
+            (ndarray): array of Node objects indexed by nid
+    """
+    nids = node_table["nid"].to_numpy()
+    nodes = np.empty(nids.max() + 1 if len(nids) > 0 else 0, dtype=object)
+    for nid, depth, frame in zip(nids, node_table["depth"], node_table["frame"]):
+        nodes[nid] = Node(
+            Frame(_decode_attr(json.loads(frame))), hnid=int(nid), depth=int(depth)
+        )
+
+    roots = []
+    for nid, parents, children in zip(
+        nids, node_table["parents"], node_table["children"]
+    ):
+        node = nodes[nid]
+        node.parents = list(nodes[parents])
+        node.children = list(nodes[children])
+        if len(parents) == 0:
+            roots.append(node)
+
+    return Graph(roots), nodes
+
+
+def _write_table(df, path, chunk_level=None, chunk_size=None):
+    """Write a DataFrame to Parquet with the node index converted to nid's.
+
+    Arguments:
+        df (DataFrame): DataFrame to write
+        path (str): file to write to
+        chunk_level (str, optional): index level to store the rows in chunks of. If
+            the index is sorted, rows are reordered by this level and chunk_size of
+            its values are written per row group, so reads filtering on the level
+            can skip the other row groups.
+        chunk_size (int, optional): number of chunk_level values per row group
+
+    Returns:
+        (bool): whether the rows were reordered by chunk_level
+    """
+    df = df.copy(deep=False)
+    if "node" in df.index.names:
+        df.index = _nodes_to_nids(df.index)
+    if chunk_level is None or not df.index.is_monotonic_increasing:
+        df.to_parquet(path)
+        return False
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = df.sort_index(level=chunk_level, sort_remaining=True)
+    # Row group boundaries from the number of rows of each value, which differ for
+    # tables that are not filled
+    counts = (
+        pd.Series(df.index.get_level_values(chunk_level))
+        .value_counts(sort=False, dropna=False)
+        .reindex(df.index.unique(level=chunk_level))
+        .to_numpy()
+    )
+    bounds = np.append(np.cumsum(counts)[chunk_size - 1 :: chunk_size], len(df))
+    table = pa.Table.from_pandas(df)
+    with pq.ParquetWriter(path, table.schema) as writer:
+        start = 0
+        for end in np.unique(bounds):
+            if end > start:
+                writer.write_table(
+                    table.slice(start, end - start), row_group_size=end - start
+                )
+            start = end
+    return True
+
+
+def _read_table(path, nodes, columns=None, filters=None):
+    """Read a DataFrame from Parquet and restore the Node objects in its index."""
+    df = pd.read_parquet(path, columns=columns, filters=filters, memory_map=True)
+    # Arrow reads list columns back as arrays
+    for col in df.columns[df.dtypes == object]:
+        valid = df[col].dropna()
+        if len(valid) > 0 and isinstance(valid.iloc[0], np.ndarray):
+            df[col] = [x.tolist() if isinstance(x, np.ndarray) else x for x in df[col]]
+    if "node" in df.index.names:
+        df.index = _nids_to_nodes(df.index, nodes)
+    return df
+
+
+def write_parquet(tk, path, profiles_per_chunk=64):
+    """Write a Thicket to a directory of Parquet files.
+
+    The graph is stored as a flat node table and the performance data, metadata and
+    aggregated statistics tables are stored as columnar tables indexed by integer node
+    id's. The performance data table is stored in chunks of profiles, so open_parquet
+    can load a subset of the profiles without reading the whole table.
+
+    Arguments:
+        tk (Thicket): Thicket to write
+        path (str): directory to write to. Created if it does not exist
+        profiles_per_chunk (int): number of profiles per chunk of the performance
+            data table
+    """
+    os.makedirs(path, exist_ok=True)
+
+    _graph_to_table(tk.graph).to_parquet(os.path.join(path, GRAPH_FILE))
+    chunked = _write_table(
+        tk.dataframe,
+        os.path.join(path, DATAFRAME_FILE),
+        chunk_level=tk.dataframe.index.names[-1],
+        chunk_size=profiles_per_chunk,
+    )
+    _write_table(tk.metadata, os.path.join(path, METADATA_FILE))
+    _write_table(tk.statsframe.dataframe, os.path.join(path, STATSFRAME_FILE))
+
+    attrs = {
+        "exc_metrics": tk.exc_metrics,
+        "inc_metrics": tk.inc_metrics,
+        "default_metric": tk.default_metric,
+        "performance_cols": tk.performance_cols,
+        "profile": tk.profile,
+        "profile_idx_name": tk.profile_idx_name,
+        # Stored as pairs since profiles are not necessarily strings
+        "profile_mapping": list(tk.profile_mapping.items()),
+        "statsframe_exc_metrics": tk.statsframe.exc_metrics,
+        "statsframe_inc_metrics": tk.statsframe.inc_metrics,
+        "node_ordering": tk.graph.node_ordering,
+        "chunked": chunked,
+        "dataframe_columns": tk.dataframe.columns.tolist(),
+        "dataframe_index_names": tk.dataframe.index.names,
+    }
+    with open(os.path.join(path, ATTRS_FILE), "w") as f:
+        json.dump(attrs, f)
+
+
+def _read_attrs_and_graph(path):
+    """Read the Thicket attributes and the graph of a Parquet directory."""
+    with open(os.path.join(path, ATTRS_FILE), "r") as f:
+        attrs = json.load(f)
+
+    graph, nodes = _table_to_graph(pd.read_parquet(os.path.join(path, GRAPH_FILE)))
+    graph.node_ordering = attrs["node_ordering"]
+
+    return attrs, graph, nodes
+
+
+def read_parquet(path):
+    """Read a Thicket from a directory written by write_parquet.
+
+    Arguments:
+        path (str): directory to read from
+
+    Returns:
+        (Thicket): Thicket object
+    """
+    # Avoid circular import
+    from thicket import Thicket
+
+    attrs, graph, nodes = _read_attrs_and_graph(path)
+
+    dataframe = _read_table(os.path.join(path, DATAFRAME_FILE), nodes)
+    if attrs["chunked"]:
+        # Restore (node, profile) order
+        dataframe.sort_index(inplace=True)
+    metadata = _read_table(os.path.join(path, METADATA_FILE), nodes)
+    stats_df = _read_table(os.path.join(path, STATSFRAME_FILE), nodes)
+
+    statsframe = GraphFrame(
+        graph=graph,
+        dataframe=stats_df,
+        exc_metrics=[_to_tuples(m) for m in attrs["statsframe_exc_metrics"]],
+        inc_metrics=[_to_tuples(m) for m in attrs["statsframe_inc_metrics"]],
+    )
+
+    tk = Thicket(
+        graph=graph,
+        dataframe=dataframe,
+        exc_metrics=[_to_tuples(m) for m in attrs["exc_metrics"]],
+        inc_metrics=[_to_tuples(m) for m in attrs["inc_metrics"]],
+        default_metric=attrs["default_metric"],
+        metadata=metadata,
+        profile=[_to_tuples(p) for p in attrs["profile"]],
+        profile_idx_name=attrs["profile_idx_name"],
+        profile_mapping=OrderedDict(
+            (_to_tuples(k), v) for k, v in attrs["profile_mapping"]
+        ),
+        statsframe=statsframe,
+    )
+    tk.performance_cols = [_to_tuples(c) for c in attrs["performance_cols"]]
+
+    return tk
+
+
+def open_parquet(path, profiles=None, columns=None, metadata_filter=None):
+    """Open a subset of a Thicket from a directory written by write_parquet.
+
+    Only the selected profiles and columns of the performance data table are read
+    from disk (memory-mapped), together with the matching metadata rows. The graph
+    is squashed to the nodes present in the selected data.
+
+    Arguments:
+        path (str): directory to read from
+        profiles (list, optional): profiles to load, as values of the innermost index
+            level of the performance data table. All profiles if None.
+        columns (list, optional): columns of the performance data table to load. The
+            "name" column is always loaded. All columns if None.
+        metadata_filter (function, optional): filter applied to each row of the
+            metadata table, like Thicket.filter_metadata. Only the profiles where it is
+            True are loaded.
+
+    Returns:
+        (Thicket): Thicket object
+    """
+    # Avoid circular import
+    from thicket import Thicket
+    from thicket.thicket import EmptyMetadataTable
+    from thicket.utils import validate_profile
+
+    attrs, graph, nodes = _read_attrs_and_graph(path)
+
+    metadata = _read_table(os.path.join(path, METADATA_FILE), nodes)
+
+    # Select profiles
+    if metadata_filter is not None:
+        selected = metadata.index[metadata.apply(metadata_filter, axis=1)]
+        if profiles is not None:
+            selected = selected[selected.isin(profiles)]
+        profiles = selected.tolist()
+    if profiles is not None:
+        metadata = metadata[metadata.index.isin(profiles)]
+        if metadata.empty:
+            raise EmptyMetadataTable(
+                "The provided profiles and metadata_filter resulted in an empty MetadataTable."
+            )
+        profiles = metadata.index.tolist()
+
+    # Select columns. The "name" column is needed to rebuild the statsframe.
+    exc_metrics = [_to_tuples(m) for m in attrs["exc_metrics"]]
+    inc_metrics = [_to_tuples(m) for m in attrs["inc_metrics"]]
+    performance_cols = [_to_tuples(c) for c in attrs["performance_cols"]]
+    read_columns = None
+    if columns is not None:
+        columns = [
+            c
+            for c in map(_to_tuples, attrs["dataframe_columns"])
+            if c in columns or c == "name" or (isinstance(c, tuple) and c[0] == "name")
+        ]
+        # Arrow stores MultiIndex column names as strings
+        read_columns = [str(c) if isinstance(c, tuple) else c for c in columns]
+        exc_metrics = [m for m in exc_metrics if m in columns]
+        inc_metrics = [m for m in inc_metrics if m in columns]
+        performance_cols = [c for c in performance_cols if c in columns]
+
+    profile_level = attrs["dataframe_index_names"][-1]
+    dataframe = _read_table(
+        os.path.join(path, DATAFRAME_FILE),
+        nodes,
+        columns=read_columns,
+        filters=None if profiles is None else [(profile_level, "in", profiles)],
+    )
+    if attrs["chunked"]:
+        dataframe.sort_index(inplace=True)
+
+    if profiles is None:
+        stats_df = _read_table(os.path.join(path, STATSFRAME_FILE), nodes)
+        statsframe = GraphFrame(
+            graph=graph,
+            dataframe=stats_df,
+            exc_metrics=[_to_tuples(m) for m in attrs["statsframe_exc_metrics"]],
+            inc_metrics=[_to_tuples(m) for m in attrs["statsframe_inc_metrics"]],
+        )
+    else:
+        # Aggregated statistics are not valid for a subset of the profiles
+        statsframe = None
+
+    tk = Thicket(
+        graph=graph,
+        dataframe=dataframe,
+        exc_metrics=exc_metrics,
+        inc_metrics=inc_metrics,
+        default_metric=attrs["default_metric"],
+        metadata=metadata,
+        profile=[_to_tuples(p) for p in attrs["profile"]],
+        profile_idx_name=attrs["profile_idx_name"],
+        profile_mapping=OrderedDict(
+            (_to_tuples(k), v) for k, v in attrs["profile_mapping"]
+        ),
+        statsframe=statsframe,
+    )
+    tk.performance_cols = performance_cols
+
+    if profiles is not None:
+        tk._sync_profile_components(tk.metadata)
+        validate_profile(tk)
+
+    # If fill_perfdata was False, may need to squash
+    if len(tk.graph) != len(tk.dataframe.index.unique(level="node")):
+        tk = tk.squash()
+
+    return tk
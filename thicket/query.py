@@ -6,6 +6,15 @@
 # make flake8 unused names in this file.
 # flake8: noqa: F401
 
+import ast
+from numbers import Real
+import re
+
+from hatchet.node import traversal_order
+from hatchet.query import QueryEngine
+import numpy as np
+import pandas as pd
+
 from hatchet.query import (
     # New style queries
     # #################
@@ -70,3 +79,267 @@ def is_new_style_query(query_obj):
 
 def is_old_style_query(query_obj):
     return issubclass(type(query_obj), AbstractQuery)
+
+
+_COMPARISON = re.compile(r"(<=|>=|==|!=|<|>)(.*)", re.DOTALL)
+_COMPARISON_OPS = {
+    "<": np.less,
+    ">": np.greater,
+    "==": np.equal,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    "!=": np.not_equal,
+}
+
+
+class _Fallback(Exception):
+    """Raised when a predicate can not be evaluated over the whole table the same
+    way Hatchet evaluates it per node."""
+
+
+def object_query(query, multi_index_mode="off"):
+    """Build an ObjectQuery from an object dialect query, and keep its attribute
+    filters so ThicketQueryEngine can evaluate them over the whole table.
+
+    Arguments:
+        query (list): object dialect query
+        multi_index_mode (str): "off", "all" or "any"
+
+    Returns:
+        (ObjectQuery): the query
+    """
+    query_obj = ObjectQuery(query, multi_index_mode=multi_index_mode)
+    # Expand the quantifiers like Query._add_node, one filter per query node
+    filters = []
+    for qnode in query:
+        quantifier, attr_filter = ".", {}
+        if isinstance(qnode, dict):
+            attr_filter = qnode
+        elif isinstance(qnode, tuple):
+            quantifier, attr_filter = qnode
+        else:
+            quantifier = qnode
+        if isinstance(quantifier, int):
+            filters.extend([attr_filter] * quantifier)
+        elif quantifier == "+":
+            filters.extend([attr_filter] * 2)
+        else:
+            filters.append(attr_filter)
+    if len(filters) == len(query_obj.query_pattern):
+        query_obj._thicket_filters = (filters, multi_index_mode)
+    return query_obj
+
+
+def node_predicate(nodes):
+    """Build a query predicate that matches a set of nodes, e.g. from a lookup in
+    Thicket.node_index.
+
+    Arguments:
+        nodes (list): nodes to match
+
+    Returns:
+        (function): predicate for Query.match and Query.rel
+    """
+    node_set = set(nodes)
+
+    def predicate(row):
+        if isinstance(row, pd.DataFrame):
+            return row.index.get_level_values("node")[0] in node_set
+        return row.name in node_set
+
+    predicate._thicket_nodes = node_set
+    return predicate
+
+
+def _parse_comparison(value):
+    """Split a comparison like "> 5" into a numpy comparison and a number, or raise
+    _Fallback if it is not a comparison to a numeric literal."""
+    match = _COMPARISON.match(value)
+    if match is None:
+        raise _Fallback
+    try:
+        number = ast.literal_eval(match.group(2).strip())
+    except (ValueError, SyntaxError):
+        raise _Fallback
+    if isinstance(number, bool) or not isinstance(number, (int, float)):
+        raise _Fallback
+    return _COMPARISON_OPS[match.group(1)], number
+
+
+class ThicketQueryEngine(QueryEngine):
+    """QueryEngine that evaluates the predicates of a query for all of the nodes
+    before matching the query paths.
+
+    Attribute filters of object dialect queries (see object_query) are evaluated over
+    the whole performance data table at once, and reduced to one value per node
+    across the profiles. Predicates from node_predicate are evaluated on the nodes.
+    Other predicates are applied to the rows of each node, which are split from the
+    table once for all of the predicates. Filters that Hatchet would evaluate
+    differently than the vectorized form, e.g. comparisons with NaN values, fall back
+    to the per-node predicate, so the results are the same as QueryEngine.
+    """
+
+    def apply(self, query, graph, dframe):
+        """Apply the query to a graph and its table. See QueryEngine.apply.
+
+        Arguments:
+            query (Query or CompoundQuery): the query being applied
+            graph (Graph): the Graph to which the query is being applied
+            dframe (pandas.DataFrame): the DataFrame associated with the graph
+
+        Returns:
+            (list): A list representing the set of nodes from paths that match the query
+        """
+        if not isinstance(query, Query) or not isinstance(dframe.index, pd.MultiIndex):
+            return super().apply(query, graph, dframe)
+
+        self.reset_cache()
+        self._cache_nodes(query, dframe)
+        matches = []
+        visited = set()
+        for root in sorted(graph.roots, key=traversal_order):
+            self._apply_impl(query, dframe, root, visited, matches)
+        assert len(visited) == len(graph)
+        return list(set().union(*matches))
+
+    def _cache_nodes(self, query, dframe):
+        """Cache the parts of the query that each node of the table matches, like
+        QueryEngine._cache_node for all of the nodes."""
+        index = dframe.index.remove_unused_levels()
+        level_num = index.names.index("node")
+        nodes = index.levels[level_num]
+        codes = index.codes[level_num]
+
+        filters, multi_index_mode = getattr(query, "_thicket_filters", (None, None))
+        node_slices = None
+        results = {}
+        for i, (_, predicate) in enumerate(query):
+            if id(predicate) in results:
+                continue
+            result = None
+            if hasattr(predicate, "_thicket_nodes"):
+                result = np.array([n in predicate._thicket_nodes for n in nodes])
+            elif filters is not None and multi_index_mode in ("all", "any"):
+                try:
+                    result = self._eval_filter(
+                        filters[i], multi_index_mode, dframe, nodes, codes
+                    )
+                except _Fallback:
+                    pass
+            if result is None:
+                if node_slices is None:
+                    node_slices = _node_slices(dframe, codes, len(nodes))
+                result = np.array([bool(predicate(rows)) for rows in node_slices])
+            results[id(predicate)] = result
+
+        matched = np.array(
+            [results[id(predicate)] for _, predicate in query], dtype=bool
+        ).reshape(len(query), len(nodes))
+        for j, node in enumerate(nodes):
+            self.search_cache[node._hatchet_nid] = np.flatnonzero(
+                matched[:, j]
+            ).tolist()
+
+    @staticmethod
+    def _eval_filter(attr_filter, multi_index_mode, dframe, nodes, codes):
+        """Evaluate an object dialect attribute filter for all of the nodes.
+
+        Keys and values are evaluated in order, and later ones only for the nodes
+        that still match, like Hatchet's per-node evaluation.
+
+        Returns:
+            (numpy.ndarray): whether each node matches the filter
+        """
+        matched = np.ones(len(nodes), dtype=bool)
+        for key, value in attr_filter.items():
+            if isinstance(key, (tuple, list)) and len(key) == 1:
+                key = key[0]
+            values = value
+            if isinstance(value, str) or not hasattr(value, "__iter__"):
+                values = [value]
+            for single_value in values:
+                if not matched.any():
+                    return matched
+                matched &= ThicketQueryEngine._eval_single(
+                    key, single_value, multi_index_mode, dframe, nodes, codes, matched
+                )
+        return matched
+
+    @staticmethod
+    def _eval_single(key, value, multi_index_mode, dframe, nodes, codes, active):
+        """Evaluate one key and value of an attribute filter for all of the nodes,
+        or raise _Fallback. active are the nodes Hatchet would evaluate it for."""
+        if key in ("depth", "node_id"):
+            attr = "_depth" if key == "depth" else "_hatchet_nid"
+            node_values = np.array([getattr(node, attr) for node in nodes])
+            if node_values.dtype == object:
+                raise _Fallback
+            if isinstance(value, str):
+                op, number = _parse_comparison(value)
+                return op(node_values, number)
+            if isinstance(value, Real):
+                return node_values == value
+            raise _Fallback
+
+        if key not in dframe.columns:
+            return np.zeros(len(nodes), dtype=bool)
+        column = dframe[key]
+        if not isinstance(column, pd.Series):
+            raise _Fallback
+        active_rows = active[codes]
+
+        dtype = column.dtype
+        if dtype == object:
+            if not isinstance(value, str):
+                raise _Fallback
+            # Match the regex once per distinct value
+            value_codes, uniques = pd.factorize(column.to_numpy())
+            is_str = np.array([isinstance(x, str) for x in uniques] + [False])
+            if not is_str[value_codes][active_rows].all():
+                raise _Fallback
+            try:
+                pattern = re.compile(value + r"\Z")
+            except re.error:
+                raise _Fallback
+            unique_matches = np.array(
+                [isinstance(x, str) and pattern.match(x) is not None for x in uniques]
+                + [False]
+            )
+            row_matches = unique_matches[value_codes]
+        elif isinstance(dtype, np.dtype) and (
+            dtype.kind in "biu" or dtype == np.float64
+        ):
+            column_values = column.to_numpy()
+            if isinstance(value, str):
+                op, number = _parse_comparison(value)
+                # Hatchet can not compare NaN or infinite values
+                if (
+                    dtype.kind == "f"
+                    and not np.isfinite(column_values[active_rows]).all()
+                ):
+                    raise _Fallback
+                row_matches = op(column_values, number)
+            elif isinstance(value, Real):
+                # Hatchet reduces equality with "any" in both modes
+                return np.bincount(
+                    codes[column_values == value], minlength=len(nodes)
+                ).astype(bool)
+            else:
+                raise _Fallback
+        else:
+            raise _Fallback
+
+        if multi_index_mode == "any":
+            return np.bincount(codes[row_matches], minlength=len(nodes)) > 0
+        return np.bincount(codes[~row_matches], minlength=len(nodes)) == 0
+
+
+def _node_slices(dframe, codes, num_nodes):
+    """Split a table into the rows of each node, in the order of the node level.
+
+    Returns:
+        (list): DataFrame of the rows of each node, in table order
+    """
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(num_nodes + 1))
+    return [dframe.take(order[bounds[j] : bounds[j + 1]]) for j in range(num_nodes)]
@@ -13,6 +13,8 @@ from .minimum import minimum
 from .percentiles import percentiles
 from .std import std
 from .variance import variance
+from .describe import describe
+from .running_stats import RunningStats
 from .calc_boxplot_statistics import calc_boxplot_statistics
 from .correlation_nodewise import correlation_nodewise
 from .check_normality import check_normality
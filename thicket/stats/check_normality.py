@@ -62,7 +62,7 @@ def check_normality(thicket, columns=None):
                         df.index[i], column + "_normality"
                     ] = "True"
                 else:
-                    thicket.stataframe.dataframe.loc[
+                    thicket.statsframe.dataframe.loc[
                         df.index[i], column + "_normality"
                     ] = pd.NA
                 # check to see if exclusive metric
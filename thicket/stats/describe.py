@@ -0,0 +1,155 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+import pandas as pd
+
+from ..utils import verify_thicket_structures
+from .maximum import maximum
+from .mean import mean
+from .median import median
+from .minimum import minimum
+from .percentiles import percentiles as percentiles_op
+from .std import std
+from .variance import variance
+from .stats_utils import register_stats_op
+
+# Stats function, pandas reduction and output column suffix of each statistic
+_REDUCTIONS = {
+    "mean": (mean, "mean", "_mean"),
+    "median": (median, "median", "_median"),
+    "std": (std, "std", "_std"),
+    "variance": (variance, "var", "_var"),
+    "minimum": (minimum, "min", "_min"),
+    "maximum": (maximum, "max", "_max"),
+}
+
+
+def describe(thicket, columns=None, stats=None, percentiles=[0.25, 0.50, 0.75]):
+    """Calculate several statistics for each node in the performance data table in one
+    pass.
+
+    Designed to take in a thicket, and append the same columns to the aggregated
+    statistics table as calling each of the stats functions named in stats, like
+    thicket.stats.mean, on columns. The performance data is grouped by node once and
+    every statistic is computed from the same groups, and the statistics table is
+    updated in one assignment. Each statistic is inserted in the statsframe_ops_cache
+    under its stats function, so reapply_stats_operations recomputes it like the
+    individual function.
+
+    Arguments:
+        thicket (thicket): Thicket object
+        columns (list): List of hardware/timing metrics to perform the calculations on.
+            Note, if using a columnar joined thicket a list of tuples must be passed in
+            with the format (column index, column name).
+        stats (list): Statistics to calculate, among "mean", "median", "std",
+            "variance", "minimum", "maximum" and "percentiles". All of them if None.
+        percentiles (list): List of percentile values to calculate for each column if
+            "percentiles" is in stats, like thicket.stats.percentiles
+
+    Returns:
+        (list): returns a list of output statsframe column names
+    """
+    if stats is None:
+        stats = list(_REDUCTIONS) + ["percentiles"]
+    for stat in stats:
+        if stat not in _REDUCTIONS and stat != "percentiles":
+            raise ValueError(
+                "Invalid statistic '{}'. Valid statistics are {}".format(
+                    stat, list(_REDUCTIONS) + ["percentiles"]
+                )
+            )
+
+    if not percentiles:
+        percentiles = [0.25, 0.50, 0.75]
+
+    # Enforce that percentiles are in range of [0.0, 1.0]
+    for percentile in percentiles:
+        if percentile < 0.0 or percentile > 1.0:
+            raise ValueError(
+                "Percentile {} is out of range of [0.0, 1.0]".format(percentile)
+            )
+
+    if columns is None:
+        raise ValueError(
+            "To see a list of valid columns, run 'Thicket.performance_cols'."
+        )
+
+    verify_thicket_structures(thicket.dataframe, index=["node"], columns=columns)
+
+    columnar = thicket.dataframe.columns.nlevels > 1
+
+    def _output_name(column, suffix):
+        if columnar:
+            return (column[0], column[1] + suffix)
+        return column + suffix
+
+    # Single grouped pass over the performance data
+    grouped = thicket.dataframe[columns].groupby(level="node")
+    reductions = [_REDUCTIONS[stat][1] for stat in stats if stat in _REDUCTIONS]
+    if len(reductions) > 0:
+        reduced = grouped.agg(reductions)
+    if "percentiles" in stats:
+        quantiles = grouped.quantile(percentiles)
+
+    output = {}
+    # Stats function, (column, output column) pairs and keyword arguments of each
+    # statistic
+    ops = []
+    for stat in stats:
+        if stat == "percentiles":
+            pairs = []
+            for column in columns:
+                for percentile in percentiles:
+                    name = _output_name(
+                        column, "_percentiles_" + str(int(percentile * 100))
+                    )
+                    pairs.append((column, name))
+                    output[name] = quantiles[column].xs(percentile, level=-1)
+            ops.append((percentiles_op, pairs, {"percentiles": percentiles}))
+        else:
+            func, reduction, suffix = _REDUCTIONS[stat]
+            pairs = []
+            for column in columns:
+                name = _output_name(column, suffix)
+                pairs.append((column, name))
+                key = column + (reduction,) if columnar else (column, reduction)
+                output[name] = reduced[key]
+            ops.append((func, pairs, {}))
+
+    # Write all the statistics in one assignment, keeping the position of the
+    # columns that are recomputed
+    stats_df = thicket.statsframe.dataframe
+    order = list(stats_df.columns) + [
+        name for name in output if name not in stats_df.columns
+    ]
+    stats_df = pd.concat(
+        [
+            stats_df.drop(columns=[name for name in output if name in stats_df]),
+            pd.DataFrame(output).reindex(stats_df.index),
+        ],
+        axis=1,
+    )[order]
+    if columnar:
+        # sort columns in index
+        stats_df = stats_df.sort_index(axis=1)
+    thicket.statsframe.dataframe = stats_df
+
+    output_column_names = []
+    for func, pairs, kwargs in ops:
+        for column, name in pairs:
+            # check to see if exclusive metric
+            if column in thicket.exc_metrics:
+                if name not in thicket.statsframe.exc_metrics:
+                    thicket.statsframe.exc_metrics.append(name)
+            # check to see if inclusive metric. Percentiles of other columns are
+            # neither, like in thicket.stats.percentiles
+            elif func is not percentiles_op or column in thicket.inc_metrics:
+                if name not in thicket.statsframe.inc_metrics:
+                    thicket.statsframe.inc_metrics.append(name)
+        names = [name for _, name in pairs]
+        register_stats_op(thicket, func.__wrapped__, names, (columns,), kwargs)
+        output_column_names.extend(names)
+
+    return output_column_names
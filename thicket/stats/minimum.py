@@ -7,7 +7,7 @@ from ..utils import verify_thicket_structures
 from .stats_utils import cache_stats_op
 
 
-@cache_stats_op
+@cache_stats_op(nodewise=True)
 def minimum(thicket, columns=None):
     """Determine the minimum for each node in the performance data table.
 
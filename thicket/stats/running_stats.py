@@ -0,0 +1,340 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from functools import reduce
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .maximum import maximum
+from .mean import mean
+from .minimum import minimum
+from .std import std
+from .variance import variance
+from .stats_utils import _op_columns, _op_key, _ordered_ops, register_stats_op
+
+
+class RunningStats:
+    """Mergeable running statistics of performance data columns, by node.
+
+    For each column, the count, mean, sum of squared differences from the mean
+    ("m2"), minimum and maximum of the values of each node are kept, so the
+    statistics of two disjoint sets of profiles are merged without reading their
+    values again (the parallel form of Welford's algorithm, by Chan et al.). NaN
+    values are not counted, like in the stats functions.
+
+    Concatenating thickets on the index merges the running statistics of the
+    thickets, and computes the mean, variance, std, minimum and maximum columns of
+    the aggregated statistics table from them. The running statistics of a thicket
+    are computed the first time it is concatenated, and kept by the concatenated
+    thicket, so appending more profiles to it only reads the new profiles. Running
+    statistics are only used for the profiles and the performance data table they
+    were computed on: they are computed again if the table is replaced, its number
+    of rows changes or one of its columns is assigned. Values modified in place in
+    the table (e.g., with DataFrame.loc) are not detected, so call
+    Thicket.running_stats.clear() after such edits.
+    """
+
+    fields = ["count", "mean", "m2", "min", "max"]
+
+    def __init__(self, profiles=(), state=None):
+        """Create running statistics.
+
+        Arguments:
+            profiles (iterable): profiles the statistics were computed on
+            state (dict): statistics of each column, as a DataFrame indexed by node
+                with the fields as columns
+        """
+        self.profiles = frozenset(profiles)
+        self.state = {} if state is None else state
+        # Performance data table the statistics are valid for (see bind)
+        self._source = None
+
+    def __len__(self):
+        return len(self.state)
+
+    def __getstate__(self):
+        # The table the statistics were computed on can not be checked once
+        # unpickled, so they are computed again
+        return {"profiles": frozenset()}
+
+    def __setstate__(self, state):
+        self.__init__(state["profiles"])
+
+    def __contains__(self, column):
+        return column in self.state
+
+    @classmethod
+    def from_dataframe(cls, dataframe, columns, profiles=()):
+        """Compute the running statistics of columns of a performance data table.
+
+        Arguments:
+            dataframe (DataFrame): performance data table, with a "node" index level
+            columns (list): columns to compute the statistics of. Columns missing from
+                dataframe have no values.
+            profiles (iterable): profiles of dataframe
+
+        Returns:
+            (RunningStats): running statistics
+        """
+        present = [c for c in columns if c in dataframe.columns]
+        state = {
+            column: pd.DataFrame(columns=cls.fields, dtype=float)
+            for column in columns
+            if column not in present
+        }
+        if len(present) > 0:
+            grouped = dataframe[present].groupby(level="node", sort=False)
+            count = grouped.count()
+            reductions = {
+                "count": count,
+                "mean": grouped.mean(),
+                "m2": grouped.var(ddof=0) * count,
+                "min": grouped.min(),
+                "max": grouped.max(),
+            }
+            for column in present:
+                state[column] = pd.DataFrame(
+                    {field: reductions[field][column] for field in cls.fields}
+                )
+        return cls(profiles, state)
+
+    @staticmethod
+    def _signature(dataframe, columns):
+        """Number of rows of a table and address of the values of its columns."""
+        return (
+            len(dataframe),
+            tuple(
+                (
+                    dataframe[column].to_numpy().__array_interface__["data"][0]
+                    if column in dataframe.columns
+                    else None
+                )
+                for column in columns
+            ),
+        )
+
+    def bind(self, dataframe):
+        """Mark the running statistics as computed on a performance data table.
+
+        Arguments:
+            dataframe (DataFrame): performance data table
+        """
+        self._source = (
+            weakref.ref(dataframe),
+            RunningStats._signature(dataframe, list(self.state)),
+        )
+
+    def is_valid(self, dataframe):
+        """Check whether the running statistics were computed on a performance data
+        table, that was not replaced, resized or had a column assigned since.
+
+        Arguments:
+            dataframe (DataFrame): performance data table
+
+        Returns:
+            (bool): True if the statistics can be used for dataframe
+        """
+        if len(self.state) == 0:
+            return True
+        if self._source is None or self._source[0]() is not dataframe:
+            return False
+        return self._source[1] == RunningStats._signature(dataframe, list(self.state))
+
+    def update(self, thicket, columns):
+        """Compute the running statistics of the columns of a thicket that are missing.
+        All of the statistics are computed again if the thicket profiles changed, or
+        if they are not valid for its performance data table (see is_valid).
+
+        Arguments:
+            thicket (thicket): Thicket object
+            columns (list): columns to compute the statistics of
+        """
+        profiles = frozenset(thicket.profile if thicket.profile is not None else ())
+        if profiles != self.profiles or not self.is_valid(thicket.dataframe):
+            self.clear()
+            self.profiles = profiles
+        missing = [c for c in columns if c not in self.state]
+        if len(missing) > 0:
+            self.state.update(
+                RunningStats.from_dataframe(thicket.dataframe, missing).state
+            )
+        self.bind(thicket.dataframe)
+
+    def merge(self, other):
+        """Merge with the running statistics of other profiles. Only the columns in
+        both are kept.
+
+        Arguments:
+            other (RunningStats): running statistics of other profiles
+
+        Returns:
+            (RunningStats): running statistics of the profiles of self and other
+        """
+        if len(self.profiles & other.profiles) > 0:
+            raise ValueError(
+                "Running statistics of the same profiles can not be merged."
+            )
+        return RunningStats(
+            self.profiles | other.profiles,
+            {
+                column: _merge_states([self.state[column], other.state[column]])
+                for column in self.state
+                if column in other.state
+            },
+        )
+
+    def remap(self, old_to_new):
+        """Get the running statistics indexed by new nodes.
+
+        Arguments:
+            old_to_new (dict): mapping of id() of the old nodes to the new nodes
+
+        Returns:
+            (RunningStats): running statistics indexed by the new nodes
+        """
+        state = {}
+        for column, df in self.state.items():
+            df = df.copy(deep=False)
+            df.index = pd.Index(
+                [old_to_new.get(id(n), n) for n in df.index], dtype=object, name="node"
+            )
+            # Different old nodes can map to the same new node
+            state[column] = _merge_states([df]) if df.index.has_duplicates else df
+        return RunningStats(self.profiles, state)
+
+    def clear(self):
+        """Remove all of the running statistics."""
+        self.profiles = frozenset()
+        self.state = {}
+        self._source = None
+
+    def count(self, column):
+        """Number of values of each node in a column."""
+        return self.state[column]["count"]
+
+    def mean(self, column):
+        """Mean of each node in a column."""
+        df = self.state[column]
+        return df["mean"].where(df["count"] > 0)
+
+    def variance(self, column):
+        """Sample variance of each node in a column."""
+        df = self.state[column]
+        return (df["m2"] / (df["count"] - 1)).where(df["count"] > 1)
+
+    def std(self, column):
+        """Sample standard deviation of each node in a column."""
+        return np.sqrt(self.variance(column))
+
+    def minimum(self, column):
+        """Minimum of each node in a column."""
+        return self.state[column]["min"]
+
+    def maximum(self, column):
+        """Maximum of each node in a column."""
+        return self.state[column]["max"]
+
+
+def _merge_states(states):
+    """Merge the statistics of each node in a list of running statistics tables."""
+    states = [df for df in states if len(df) > 0]
+    if len(states) == 0:
+        return pd.DataFrame(columns=RunningStats.fields, dtype=float)
+    stacked = pd.concat(states)
+    stacked = stacked[stacked["count"] > 0]
+    grouped = stacked.groupby(level="node", sort=False)
+    count = grouped["count"].sum()
+    mean = (stacked["count"] * stacked["mean"]).groupby(
+        level="node", sort=False
+    ).sum() / count
+    delta = stacked["mean"] - mean.reindex(stacked.index)
+    m2 = (
+        (stacked["m2"] + stacked["count"] * delta**2)
+        .groupby(level="node", sort=False)
+        .sum()
+    )
+    return pd.DataFrame(
+        {
+            "count": count,
+            "mean": mean,
+            "m2": m2,
+            "min": grouped["min"].min(),
+            "max": grouped["max"].max(),
+        }
+    )
+
+
+# Stats functions whose output columns are computed from running statistics, with
+# the suffix of their output columns and the RunningStats method computing them
+_MERGEABLE_OPS = {
+    mean.__wrapped__: ("_mean", RunningStats.mean),
+    variance.__wrapped__: ("_var", RunningStats.variance),
+    std.__wrapped__: ("_std", RunningStats.std),
+    minimum.__wrapped__: ("_min", RunningStats.minimum),
+    maximum.__wrapped__: ("_max", RunningStats.maximum),
+}
+
+
+def _mergeable_ops(thickets):
+    """Get the distinct stats operations applied to the thickets whose output columns
+    are computed from running statistics.
+
+    Returns:
+        (list): (function, StatsOp) of each operation
+    """
+    ops = {}
+    for thicket in thickets:
+        if thicket.dataframe.columns.nlevels != 1:
+            continue
+        for func, op, _ in _ordered_ops(thicket.statsframe_ops_cache):
+            if func in _MERGEABLE_OPS:
+                ops.setdefault(_op_key(func, op.args, op.kwargs), (func, op))
+    return list(ops.values())
+
+
+def _ops_columns(ops):
+    """Get the distinct performance data columns read by stats operations."""
+    columns = []
+    for func, op in ops:
+        for column in _op_columns(func, op.args, op.kwargs):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def _merge_thickets(thickets, columns):
+    """Merge the running statistics of columns of thickets with disjoint profiles,
+    computing the ones they are missing from their performance data tables.
+
+    Returns:
+        (RunningStats): merged running statistics
+    """
+    if len(columns) == 0:
+        return RunningStats()
+    for thicket in thickets:
+        thicket.running_stats.update(thicket, columns)
+    return reduce(lambda a, b: a.merge(b), [th.running_stats for th in thickets])
+
+
+def _apply_ops(thicket, ops):
+    """Compute the output columns of stats operations from the running statistics of
+    a thicket, and insert the operations in its statsframe_ops_cache."""
+    for func, op in ops:
+        suffix, statistic = _MERGEABLE_OPS[func]
+        output_column_names = []
+        for column in _op_columns(func, op.args, op.kwargs):
+            output_column_names.append(column + suffix)
+            thicket.statsframe.dataframe[column + suffix] = statistic(
+                thicket.running_stats, column
+            )
+            # check to see if exclusive metric
+            if column in thicket.exc_metrics:
+                thicket.statsframe.exc_metrics.append(column + suffix)
+            # check to see if inclusive metric
+            else:
+                thicket.statsframe.inc_metrics.append(column + suffix)
+        register_stats_op(thicket, func, output_column_names, op.args, op.kwargs)
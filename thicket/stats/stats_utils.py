@@ -1,17 +1,189 @@
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
 from functools import wraps
+import inspect
 
+# Arguments of a cached stats operation, the statsframe columns written by the stats
+# operations it called, which it reads, and the statsframe columns it added besides
+# its output columns, like the t-test columns of preference
+StatsOp = namedtuple("StatsOp", ["args", "kwargs", "reads", "writes"], defaults=[()])
 
-def cache_stats_op(func):
-    """Python decorator that handles insertion of stats operations in the thicket statsframe_ops_cache."""
+
+class StatsSession:
+    """State of the stats operations running on a Thicket, kept by the Thicket so
+    stats operations on different Thickets do not share it."""
+
+    def __init__(self):
+        # Stack of the output columns of the stats operations called by each running
+        # stats operation
+        self.running_ops = []
+        # Output columns of the stats operations already applied by the running
+        # reapply_stats_operations, by _op_key, or None if it is not running
+        self.reapplied_ops = None
+
+
+def _stats_session(thicket):
+    """Get the StatsSession of a thicket, creating it for thickets unpickled from
+    versions without it."""
+    session = getattr(thicket, "stats_session", None)
+    if session is None:
+        session = thicket.stats_session = StatsSession()
+    return session
+
+
+def _op_key(func, args, kwargs):
+    """Key identifying a stats operation by its function and arguments."""
+    return (func, repr(args), repr(sorted(kwargs.items(), key=lambda x: x[0])))
+
+
+def _op_columns(func, args, kwargs):
+    """Get the performance data columns read by a stats operation, from its columns,
+    column1 and column2 arguments.
+
+    Returns:
+        (list): columns, or None if the operation has none of these arguments
+    """
+    try:
+        bound = inspect.signature(func).bind(None, *args, **kwargs)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    columns = []
+    found = False
+    for name in ["columns", "column1", "column2"]:
+        if name not in bound.arguments:
+            continue
+        found = True
+        value = bound.arguments[name]
+        if isinstance(value, list):
+            columns.extend(value)
+        elif value is not None:
+            columns.append(value)
+    return columns if found else None
+
+
+def _ordered_ops(ops_cache):
+    """Get the distinct stats operations of a statsframe_ops_cache, each after the
+    operations that write the statsframe columns it reads.
+
+    Returns:
+        (list): (function, StatsOp, output columns) of each operation
+    """
+    ops = OrderedDict()
+    for func, arg_dict in ops_cache.items():
+        for column, op in arg_dict.items():
+            key = _op_key(func, op.args, op.kwargs)
+            if key not in ops:
+                ops[key] = (func, op, [])
+            ops[key][2].append(column)
+    writers = {
+        column: key for key, (_, _, columns) in ops.items() for column in columns
+    }
+
+    ordered = []
+    visited = set()
+
+    def _visit(key):
+        if key in visited:
+            return
+        visited.add(key)
+        for column in ops[key][1].reads:
+            if column in writers:
+                _visit(writers[column])
+        ordered.append(ops[key])
+
+    for key in ops:
+        _visit(key)
+    return ordered
+
+
+@contextmanager
+def _reapply_session(thicket):
+    """Context in which the stats operations applied to thicket are applied once.
+
+    Yields:
+        (dict): output columns of the applied stats operations, by _op_key. Stats
+            operations called again with the same arguments, like the mean and std
+            called by preference, return the recorded output columns.
+    """
+    session = _stats_session(thicket)
+    old_reapplied_ops = session.reapplied_ops
+    session.reapplied_ops = {}
+    try:
+        yield session.reapplied_ops
+    finally:
+        session.reapplied_ops = old_reapplied_ops
+
+
+def register_stats_op(thicket, func, output_columns, args, kwargs, reads=(), writes=()):
+    """Insert the output columns of a stats operation in the thicket
+    statsframe_ops_cache, so reapply_stats_operations calls func(thicket, *args,
+    **kwargs) again.
+
+    Arguments:
+        thicket (thicket): Thicket object
+        func (function): stats function, without the cache_stats_op decorator
+        output_columns (list): statsframe columns written by the operation
+        args (tuple): positional arguments of the operation, after thicket
+        kwargs (dict): keyword arguments of the operation
+        reads (list): statsframe columns written by other stats operations that the
+            operation reads
+        writes (list): statsframe columns added by the operation besides
+            output_columns
+    """
+    if func not in thicket.statsframe_ops_cache:
+        thicket.statsframe_ops_cache[func] = {}
+
+    op = StatsOp(args, kwargs, tuple(reads), tuple(writes))
+    for column in output_columns:
+        thicket.statsframe_ops_cache[func][column] = op
+    running_ops = _stats_session(thicket).running_ops
+    if running_ops:
+        running_ops[-1].extend(output_columns)
+    # The aggregated statistics table was modified in place
+    thicket.query_cache.bump()
+
+
+def cache_stats_op(func=None, nodewise=False):
+    """Python decorator that handles insertion of stats operations in the thicket statsframe_ops_cache.
+
+    Arguments:
+        nodewise (bool): whether the output for each node only depends on the rows of
+            the node in the performance data table, so reapply_stats_operations can
+            recompute it for some of the nodes
+    """
+    if func is None:
+        return lambda func: cache_stats_op(func, nodewise=nodewise)
+    func._nodewise = nodewise
 
     @wraps(func)
     def wrapper(thicket, *args, **kwargs):
-        output_columns = func(thicket, *args, **kwargs)
-        if func not in thicket.statsframe_ops_cache:
-            thicket.statsframe_ops_cache[func] = {}
+        session = _stats_session(thicket)
+        reapplied = session.reapplied_ops
+        if reapplied is not None:
+            key = _op_key(func, args, kwargs)
+            if key in reapplied:
+                # Already applied by reapply_stats_operations
+                if session.running_ops:
+                    session.running_ops[-1].extend(reapplied[key])
+                return list(reapplied[key])
 
-        for column in output_columns:
-            thicket.statsframe_ops_cache[func][column] = (args, kwargs)
+        old_columns = set(thicket.statsframe.dataframe.columns)
+        session.running_ops.append([])
+        try:
+            output_columns = func(thicket, *args, **kwargs)
+        finally:
+            reads = session.running_ops.pop()
+        writes = [
+            column
+            for column in thicket.statsframe.dataframe.columns
+            if column not in old_columns
+            and column not in output_columns
+            and column not in reads
+        ]
+        register_stats_op(thicket, func, output_columns, args, kwargs, reads, writes)
+        if reapplied is not None:
+            reapplied[key] = list(output_columns)
         return output_columns
 
     return wrapper
@@ -9,7 +9,7 @@ from ..utils import verify_thicket_structures
 from .stats_utils import cache_stats_op
 
 
-@cache_stats_op
+@cache_stats_op(nodewise=True)
 def variance(thicket, columns=None):
     """Calculate the variance for each node in the performance data table.
 
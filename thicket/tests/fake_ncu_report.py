@@ -0,0 +1,115 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+"""Stand-in for the ncu_report module of Nsight Compute, reading reports from JSON
+files written by write_report. Install with
+monkeypatch.setitem(sys.modules, "ncu_report", fake_ncu_report)."""
+
+import json
+
+
+class IMetric:
+    RollupOperation_AVG = 1
+    RollupOperation_MAX = 2
+    RollupOperation_MIN = 3
+    RollupOperation_SUM = 4
+
+
+class IAction:
+    NameBase_DEMANGLED = 1
+
+
+class _Metric:
+    def __init__(self, name, value, rollup):
+        self._name = name
+        self._value = value
+        self._rollup = rollup
+
+    def name(self):
+        return self._name
+
+    def value(self):
+        return self._value
+
+    def rollup_operation(self):
+        return self._rollup
+
+
+class _Domain:
+    def __init__(self, trace):
+        self._trace = trace
+
+    def push_pop_ranges(self):
+        return iter(self._trace)
+
+
+class _NvtxState:
+    def __init__(self, trace):
+        self._trace = trace
+
+    def domain_by_id(self, id):
+        return _Domain(self._trace)
+
+
+class _Action:
+    def __init__(self, action, rollups):
+        self._action = action
+        self._rollups = rollups
+
+    def name(self, base=None):
+        return self._action["name"]
+
+    def nvtx_state(self):
+        return _NvtxState(self._action["trace"])
+
+    def metric_names(self):
+        return list(self._action["metrics"])
+
+    def __getitem__(self, name):
+        return _Metric(name, self._action["metrics"][name], self._rollups.get(name))
+
+
+class _Range:
+    def __init__(self, actions, rollups):
+        self._actions = [_Action(a, rollups) for a in actions]
+
+    def __len__(self):
+        return len(self._actions)
+
+    def __iter__(self):
+        return iter(self._actions)
+
+    def action_by_idx(self, idx):
+        return self._actions[idx]
+
+
+class _Report:
+    def __init__(self, report):
+        self._ranges = [_Range(r, report["rollups"]) for r in report["ranges"]]
+
+    def num_ranges(self):
+        return len(self._ranges)
+
+    def __iter__(self):
+        return iter(self._ranges)
+
+
+def load_report(path):
+    with open(path, "r") as f:
+        return _Report(json.load(f))
+
+
+def write_report(path, actions, rollups, num_ranges=1):
+    """Write a report file.
+
+    Arguments:
+        path (str): file to write
+        actions (list): actions of each range, as dicts with the demangled kernel
+            "name", the NVTX push/pop "trace" and the "metrics" values
+        rollups (dict): rollup operation of each metric
+        num_ranges (int): number of copies of the range of actions
+    """
+    with open(path, "w") as f:
+        json.dump({"rollups": rollups, "ranges": [actions] * num_ranges}, f)
@@ -0,0 +1,201 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+import os
+
+import pytest
+
+import thicket.stats as stats
+from thicket import QueryCache, ReaderCache, Thicket
+from thicket.thicket import EmptyQuery
+
+
+def test_reader_cache(mpi_scaling_cali, tmpdir):
+    cache_dir = str(tmpdir.join("cache"))
+
+    tk = Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True)
+    tk_miss = Thicket.from_caliperreader(
+        mpi_scaling_cali, disable_tqdm=True, cache=cache_dir
+    )
+    cache = ReaderCache(cache_dir)
+    assert len(cache) == len(mpi_scaling_cali)
+    assert sorted(cache.info()["file"]) == sorted(mpi_scaling_cali)
+
+    # Second read loads every file from the cache
+    tk_hit = Thicket.from_caliperreader(
+        mpi_scaling_cali, disable_tqdm=True, cache=cache_dir
+    )
+    assert tk == tk_miss
+    assert tk == tk_hit
+
+    # Modified files get a new entry
+    stat = os.stat(mpi_scaling_cali[0])
+    os.utime(mpi_scaling_cali[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    tk_changed = Thicket.from_caliperreader(
+        mpi_scaling_cali, disable_tqdm=True, cache=cache_dir
+    )
+    assert tk == tk_changed
+    assert len(ReaderCache(cache_dir)) == len(mpi_scaling_cali) + 1
+
+    # Single file
+    tk_single = Thicket.from_caliperreader(
+        mpi_scaling_cali[1], disable_tqdm=True, cache=cache_dir
+    )
+    assert tk_single.profile_mapping[tk_single.profile[0]] == mpi_scaling_cali[1]
+
+    cache = ReaderCache(cache_dir)
+    cache.clear()
+    assert len(cache) == 0
+    assert os.listdir(cache_dir) == [ReaderCache.index_file]
+
+
+def test_reader_cache_corrupt_entry(mpi_scaling_cali, tmpdir):
+    cache_dir = str(tmpdir.join("cache"))
+
+    tk = Thicket.from_caliperreader(
+        mpi_scaling_cali, disable_tqdm=True, cache=cache_dir
+    )
+    cache = ReaderCache(cache_dir)
+    key = cache.info().index[0]
+
+    # Truncated entry, like one left by an interrupted write
+    with open(os.path.join(cache_dir, key + ".pkl"), "r+b") as f:
+        f.truncate(10)
+    assert cache.load(key) is None
+    assert key not in cache
+
+    # The file is read again and stored
+    tk_reread = Thicket.from_caliperreader(
+        mpi_scaling_cali, disable_tqdm=True, cache=cache_dir
+    )
+    assert tk == tk_reread
+    assert len(ReaderCache(cache_dir)) == len(mpi_scaling_cali)
+    assert not any(f.endswith(".tmp") for f in os.listdir(cache_dir))
+
+
+def test_reader_cache_key(mpi_scaling_cali):
+    key = ReaderCache.key(Thicket.from_caliperreader, mpi_scaling_cali[0])
+    assert key == ReaderCache.key(
+        Thicket.from_caliperreader, mpi_scaling_cali[0], (), {}
+    )
+    assert key != ReaderCache.key(
+        Thicket.from_caliperreader, mpi_scaling_cali[0], (), {"a": 1}
+    )
+    # Objects without a stable repr can not be cached
+    assert (
+        ReaderCache.key(
+            Thicket.from_caliperreader, mpi_scaling_cali[0], (), {"a": object()}
+        )
+        is None
+    )
+
+
+def test_reader_cache_eviction(mpi_scaling_cali, tmpdir):
+    cache_dir = str(tmpdir.join("cache"))
+
+    Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True, cache=cache_dir)
+    sizes = ReaderCache(cache_dir).info()["size"]
+
+    # Only room for the two most recently used entries
+    cache = ReaderCache(cache_dir, max_size=sizes.iloc[-2:].sum())
+    cache.evict()
+    assert len(cache) == 2
+    assert cache.size() <= cache.max_size
+    assert list(cache.info()["file"]) == mpi_scaling_cali[-2:]
+
+
+def test_query_cache_disabled(mpi_scaling_cali):
+    tk = Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True)
+    query = [(".", {"name": "CalcQForElems"}), "*"]
+
+    expected = tk.query(query, multi_index_mode="all")
+    assert len(tk.query_cache) == 0
+
+    # Values modified in place are seen by the next query
+    rows = tk.dataframe["name"] == "CalcQForElems"
+    tk.dataframe.loc[rows, "name"] = "Renamed"
+    assert len(expected.graph) > 0
+    with pytest.raises(EmptyQuery):
+        tk.query(query, multi_index_mode="all")
+
+
+def test_query_cache(mpi_scaling_cali, tmpdir):
+    tk = Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True)
+    tk.query_cache = QueryCache(max_size=128)
+    string_query = """MATCH (".", p)->("*")
+    WHERE p."name" = "CalcQForElems"
+    """
+    object_query = [(".", {"name": "CalcQForElems"}), "*"]
+
+    expected = tk.query(string_query, multi_index_mode="all")
+    assert (tk.query_cache.hits, tk.query_cache.misses) == (0, 1)
+    # Repeated queries are taken from the cache
+    assert tk.query(string_query, multi_index_mode="all") == expected
+    assert (tk.query_cache.hits, tk.query_cache.misses) == (1, 1)
+    assert tk.query(object_query, multi_index_mode="all") == expected
+    assert (
+        tk.query([(".", {"name": "CalcQForElems"}), "*"], multi_index_mode="all")
+        == expected
+    )
+    assert (tk.query_cache.hits, tk.query_cache.misses) == (2, 2)
+    assert len(tk.query_cache) == 2
+
+    # Equal values of different types have different fingerprints
+    assert QueryCache.fingerprint([{"depth": 1}]) != QueryCache.fingerprint(
+        [{"depth": True}]
+    )
+    # Query objects are not cached
+    assert QueryCache.fingerprint([{"name": lambda x: True}]) is None
+
+    # Modifying the Thicket invalidates the cache
+    tk.update_inclusive_columns()
+    assert len(tk.query_cache) == 0
+    assert tk.query(string_query, multi_index_mode="all").graph == expected.graph
+    assert tk.query_cache.misses == 3
+
+    # Stats operations invalidate the cache, and query_stats uses separate entries
+    stats.mean(tk, columns=["Total time"])
+    assert len(tk.query_cache) == 0
+    stats_query = [(".", {"name": "CalcQForElems"})]
+    tk.query_stats(stats_query)
+    tk.query_stats(stats_query)
+    tk.query(stats_query, multi_index_mode="all")
+    assert tk.query_cache.hits == 3
+    assert len(tk.query_cache) == 2
+
+    # Replaced tables are not matched
+    tk.dataframe = tk.dataframe.copy()
+    tk.query(string_query, multi_index_mode="all")
+    assert tk.query_cache.misses == 6
+
+    # Copies and pickles start with an empty cache
+    assert len(tk.copy().query_cache) == 0
+    pickle_file = str(tmpdir.join("tk.pkl"))
+    tk.to_pickle(pickle_file)
+    assert len(Thicket.from_pickle(pickle_file).query_cache) == 0
+
+
+def test_query_cache_eviction(mpi_scaling_cali):
+    tk = Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True)
+    tk.query_cache = QueryCache(max_size=2)
+    queries = [[(".", {"name": name})] for name in ["main", "lulesh.cycle", "main"]]
+    for query in queries:
+        tk.query(query, multi_index_mode="all")
+    assert len(tk.query_cache) == 2
+    tk.query(queries[1], multi_index_mode="all")
+    assert tk.query_cache.hits == 2
+
+    # Least recently used entry is evicted
+    tk.query([(".", {"name": "TimeIncrement"})], multi_index_mode="all")
+    tk.query(queries[0], multi_index_mode="all")
+    assert len(tk.query_cache) == 2
+    assert tk.query_cache.misses == 4
+
+    tk.query_cache.clear()
+    assert (len(tk.query_cache), tk.query_cache.hits, tk.query_cache.misses) == (
+        0,
+        0,
+        0,
+    )
@@ -13,7 +13,7 @@ from test_filter_metadata import filter_one_column
 from test_filter_metadata import filter_multiple_and
 from test_filter_stats import check_filter_stats
 from test_query import check_query
-from thicket import Thicket
+from thicket import stats, Thicket
 from thicket.utils import DuplicateIndexError
 
 
@@ -58,6 +58,89 @@ def test_concat_thickets_index(mpi_scaling_cali, intersection, fill_perfdata):
         )
 
 
+def test_concat_thickets_index_running_stats(mpi_scaling_cali, monkeypatch):
+    tks = [Thicket.from_caliperreader(f, disable_tqdm=True) for f in mpi_scaling_cali]
+    columns = ["Min time/rank", "Avg time/rank"]
+
+    def apply_stats(tk):
+        stats.mean(tk, columns=columns)
+        stats.std(tk, columns=columns)
+        stats.variance(tk, columns=columns)
+        stats.minimum(tk, columns=columns)
+        stats.maximum(tk, columns=["Min time/rank"])
+
+    ensemble = Thicket.concat_thickets(tks[:2], disable_tqdm=True)
+    apply_stats(ensemble)
+    stats.median(ensemble, columns=columns)
+    ensemble = Thicket.concat_thickets([ensemble, tks[2]], disable_tqdm=True)
+    assert len(ensemble.running_stats) == len(columns)
+
+    # Only the performance data of the appended thickets is read
+    rows = []
+    from_dataframe = stats.RunningStats.from_dataframe.__func__
+
+    def count_rows(cls, dataframe, *args, **kwargs):
+        rows.append(len(dataframe))
+        return from_dataframe(cls, dataframe, *args, **kwargs)
+
+    monkeypatch.setattr(stats.RunningStats, "from_dataframe", classmethod(count_rows))
+    ensemble = Thicket.concat_thickets([ensemble] + tks[3:], disable_tqdm=True)
+    monkeypatch.undo()
+    assert sum(rows) == sum(len(tk.dataframe) for tk in tks[3:])
+    assert ensemble.running_stats.profiles == set(ensemble.profile)
+
+    full = Thicket.concat_thickets(tks, disable_tqdm=True)
+    apply_stats(full)
+
+    # Mergeable stats operations are kept, the median is not
+    assert set(ensemble.statsframe_ops_cache) == set(full.statsframe_ops_cache)
+    assert ensemble.statsframe.exc_metrics == full.statsframe.exc_metrics
+    assert ensemble.statsframe.inc_metrics == full.statsframe.inc_metrics
+
+    def by_name(df):
+        df.index = [n.frame["name"] + str(n._hatchet_nid) for n in df.index]
+        return df.sort_index()
+
+    pd.testing.assert_frame_equal(
+        by_name(ensemble.statsframe.dataframe.copy()),
+        by_name(full.statsframe.dataframe.copy()),
+        check_exact=False,
+        rtol=1e-10,
+    )
+
+
+def test_concat_thickets_index_running_stats_edited(mpi_scaling_cali):
+    tks = [Thicket.from_caliperreader(f, disable_tqdm=True) for f in mpi_scaling_cali]
+    column = "Avg time/rank"
+
+    def expected_mean(thickets):
+        full = Thicket.concat_thickets(thickets, disable_tqdm=True)
+        stats.mean(full, columns=[column])
+        return sorted(full.statsframe.dataframe[column + "_mean"].dropna())
+
+    ensemble = Thicket.concat_thickets(tks[:2], disable_tqdm=True)
+    stats.mean(ensemble, columns=[column])
+    ensemble = Thicket.concat_thickets([ensemble, tks[2]], disable_tqdm=True)
+    assert ensemble.running_stats.is_valid(ensemble.dataframe)
+
+    # Assigning a column invalidates the running statistics
+    ensemble.dataframe[column] = ensemble.dataframe[column] * 2
+    assert not ensemble.running_stats.is_valid(ensemble.dataframe)
+    result = Thicket.concat_thickets([ensemble, tks[3]], disable_tqdm=True)
+    assert sorted(result.statsframe.dataframe[column + "_mean"].dropna()) == (
+        pytest.approx(expected_mean([ensemble, tks[3]]))
+    )
+
+    # Values modified in place need clear()
+    ensemble = result
+    ensemble.dataframe.loc[:, column] = 1.0
+    ensemble.running_stats.clear()
+    result = Thicket.concat_thickets([ensemble, tks[4]], disable_tqdm=True)
+    assert sorted(result.statsframe.dataframe[column + "_mean"].dropna()) == (
+        pytest.approx(expected_mean([ensemble, tks[4]]))
+    )
+
+
 def test_concat_thickets_columns(thicket_axis_columns):
     thickets, thickets_cp, combined_th = thicket_axis_columns
     # Check no original objects modified
@@ -99,6 +182,42 @@ def test_concat_thickets_columns(thicket_axis_columns):
     ).all()
 
 
+def test_concat_thickets_columns_many_headers(rajaperf_cuda_block128_1M_cali):
+    tk = Thicket.from_caliperreader(rajaperf_cuda_block128_1M_cali, disable_tqdm=True)
+    thickets = [tk.deepcopy() for _ in range(12)]
+    thickets_cp = [th.deepcopy() for th in thickets]
+    headers = [f"run {i}" for i in range(len(thickets))]
+
+    combined_th = Thicket.concat_thickets(
+        thickets=thickets, axis="columns", headers=headers, disable_tqdm=True
+    )
+
+    # Check no original objects modified
+    for th, th_cp in zip(thickets, thickets_cp):
+        assert th.dataframe.equals(th_cp.dataframe)
+        assert th.metadata.equals(th_cp.metadata)
+        assert th.graph == th_cp.graph
+
+    # Check the "name" column is filled from the nodes
+    nodes = combined_th.dataframe.index.get_level_values("node")
+    assert combined_th.dataframe[("name", "")].tolist() == [
+        n.frame["name"] for n in nodes
+    ]
+
+    # Check each header holds the values of its thicket by position
+    assert combined_th.dataframe.index.names == ["node", "profile"]
+    for header in headers:
+        assert (
+            combined_th.dataframe[header]["Avg time/rank"].to_numpy()
+            == tk.dataframe["Avg time/rank"].to_numpy()
+        ).all()
+    assert combined_th.metadata.shape == (
+        len(tk.metadata),
+        len(headers) * tk.metadata.shape[1],
+    )
+    assert len(combined_th.profile) == len(headers) * len(tk.profile)
+
+
 def test_filter_concat_thickets_columns(thicket_axis_columns):
     thickets, thickets_cp, combined_th = thicket_axis_columns
     # columns and corresponding values to filter by
@@ -134,3 +134,31 @@ def test_deepcopy(rajaperf_seq_O3_1M_cali, intersection, fill_perfdata):
 
     # Check new graph is statsframe graph
     assert other.graph is other.statsframe.graph
+
+
+def test_view(rajaperf_cuda_block128_1M_cali):
+    tk = Thicket.from_caliperreader(rajaperf_cuda_block128_1M_cali, disable_tqdm=True)
+    tk_cp = tk.deepcopy()
+
+    views = list(tk.groupby("ProblemSizeRunParam").values()) + [
+        tk.filter_profile(tk.profile[:2]),
+        tk.filter_metadata(lambda x: x["ProblemSizeRunParam"] > 0),
+    ]
+    for view in views:
+        # Graph nodes are shared, data is not
+        assert view.graph.roots[0] is tk.graph.roots[0]
+        assert view.dataframe.index.get_level_values("node")[0] is next(
+            tk.graph.traverse()
+        )
+        view.dataframe.iloc[0, 0] = 0
+        view.metadata.iloc[0, 0] = 0
+        assert tk.dataframe.equals(tk_cp.dataframe)
+        assert tk.metadata.equals(tk_cp.metadata)
+
+    # Modifying the graph of a view copies it first
+    view = views[0]
+    view.add_root_node({"name": "Test", "type": "function"})
+    assert view.graph.roots[0] is not tk.graph.roots[0]
+    assert len(view.graph) == len(tk.graph) + 1
+    assert tk.graph == tk_cp.graph
+    assert len(tk.dataframe) == len(tk_cp.dataframe)
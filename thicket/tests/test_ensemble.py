@@ -23,3 +23,27 @@ def test_unify(literal_thickets):
         [hash(n) for n in _thickets[i].dataframe.index.get_level_values("node")]
         for i in range(3)
     ] == tk_hashes
+
+    # Dataframe nodes are the nodes of the union graph
+    union_nodes = {id(n) for n in union_graph.traverse()}
+    for th in _thickets:
+        assert all(
+            id(n) in union_nodes for n in th.dataframe.index.get_level_values("node")
+        )
+
+
+def test_union_graphs(literal_thickets):
+    graphs = [tk.graph for tk in literal_thickets]
+
+    union_graph, old_to_new = Ensemble._union_graphs(graphs)
+
+    # Same graph as unioning pairwise
+    pairwise = graphs[0].union(graphs[1]).union(graphs[2])
+    assert [n.frame for n in union_graph.traverse()] == [
+        n.frame for n in pairwise.traverse()
+    ]
+
+    # Every node is mapped to a union node with the same frame
+    for g in graphs:
+        for n in g.traverse():
+            assert old_to_new[id(n)].frame == n.frame
@@ -5,6 +5,9 @@
 
 import pytest
 
+from thicket import Thicket
+from thicket.query import Query, node_predicate
+
 
 def test_get_node(literal_thickets):
     tk, _, _ = literal_thickets
@@ -26,3 +29,50 @@ def test_get_node(literal_thickets):
     # Check case which="all"
     qux_all = tk.get_node("Qux", which="all")
     assert len(qux_all) == 2
+
+
+def test_node_index(mpi_scaling_cali):
+    tk = Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True)
+    nodes = list(tk.graph.traverse())
+    index = tk.node_index
+    assert len(index) == len(nodes)
+    # Built once per graph
+    assert tk.node_index is index
+
+    # Names
+    expected = [n for n in nodes if n.frame["name"] == "MPI_Irecv"]
+    assert index.by_name("MPI_Irecv") == expected
+    assert tk.get_node("MPI_Irecv", which="all") == expected
+    assert index.by_name("Foo") == []
+    assert index.by_name_prefix("MPI_") == [
+        n for n in nodes if n.frame["name"].startswith("MPI_")
+    ]
+    assert index.by_name_regex("MPI_Wait(all)?") == [
+        n for n in nodes if n.frame["name"] in ("MPI_Wait", "MPI_Waitall")
+    ]
+
+    # Call paths
+    calc_q = tk.get_node("CalcQForElems")
+    path = tuple(n.frame["name"] for n in calc_q.path())
+    assert index.by_path(path) == [calc_q]
+    assert index.by_path("/".join(path)) == [calc_q]
+    subtree = list(calc_q.traverse())
+    assert index.by_path_prefix(path) == [n for n in nodes if n in subtree]
+    assert index.by_path_regex(".*/CalcQForElems/MPI_.*") == [
+        n for n in calc_q.children if n.frame["name"].startswith("MPI_")
+    ]
+
+    # Rebuilt for new and modified graphs
+    squashed = tk.query([{"name": "main"}, "*"], multi_index_mode="all")
+    assert squashed.node_index is not index
+    assert squashed.node_index.graph is squashed.graph
+    # Copies share the graph object and its index
+    assert tk.copy().node_index is index
+    tk.add_root_node({"name": "Test", "type": "function"})
+    assert tk.node_index is not index
+    assert len(tk.node_index.by_name("Test")) == 1
+
+    # Usable as a query predicate
+    query = Query().match(".", node_predicate(tk.node_index.by_name("main"))).rel("*")
+    result = tk.query(query)
+    assert len(result.graph) == len(tk.node_index.by_path_prefix(("main",)))
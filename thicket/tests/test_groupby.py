@@ -139,6 +139,33 @@ def test_groupby(rajaperf_seq_O3_1M_cali, intersection, fill_perfdata):
     check_groupby(th, columns_values)
 
 
+def test_groupby_squash(rajaperf_unique_tunings, fill_perfdata):
+    th = Thicket.from_caliperreader(
+        rajaperf_unique_tunings,
+        intersection=False,
+        fill_perfdata=fill_perfdata,
+        disable_tqdm=True,
+    )
+    gb = th.groupby("tuning")
+
+    for key, sub_th in gb.items():
+        # Same result as filtering the profiles of the group
+        filtered_th = th.filter_metadata(lambda x: x["tuning"] == key)
+        assert sub_th.dataframe.equals(filtered_th.dataframe)
+        assert sub_th.metadata.equals(filtered_th.metadata)
+        assert sorted(sub_th.profile) == sorted(filtered_th.profile)
+        assert sub_th.profile_mapping == filtered_th.profile_mapping
+
+        nodes = sub_th.dataframe.dropna(subset=["name"]).index.unique(level="node")
+        if len(nodes) == len(th.graph):
+            # Sub-thickets with all of the nodes are not squashed
+            assert sub_th.graph.roots[0] is th.graph.roots[0]
+        elif not fill_perfdata:
+            # Sub-thickets missing nodes are squashed
+            assert len(sub_th.graph) == len(nodes)
+            assert sub_th.graph.roots[0] is not th.graph.roots[0]
+
+
 def test_groupby_concat_thickets_columns(
     rajaperf_seq_O3_1M_cali, intersection, fill_perfdata
 ):
@@ -32,3 +32,38 @@ def test_intersection(rajaperf_cali_1trial, fill_perfdata):
     # Check that nodes are synced between graph and dataframe
     assert helpers._are_synced(tk.graph, tk.dataframe)
     assert helpers._are_synced(intersected_tk.graph, intersected_tk.dataframe)
+
+
+def test_intersection_columns(rajaperf_unique_tunings, fill_perfdata):
+    tk = th.from_caliperreader(
+        rajaperf_unique_tunings,
+        intersection=False,
+        fill_perfdata=fill_perfdata,
+        disable_tqdm=True,
+    )
+    gb = tk.groupby("tuning")
+    ctk = th.concat_thickets(
+        thickets=list(gb.values()),
+        axis="columns",
+        headers=list(gb.keys()),
+        disable_tqdm=True,
+    )
+    ctk_cp = ctk.deepcopy()
+    intersected_ctk = ctk.intersection()
+
+    intersected_tk_other = th.from_caliperreader(
+        rajaperf_unique_tunings, intersection=True, disable_tqdm=True
+    )
+
+    # Check other methodology
+    assert len(intersected_ctk.graph) == len(intersected_tk_other.graph)
+    assert len(intersected_ctk.graph) < len(ctk.graph)
+
+    # Only nodes with values for every header remain
+    assert intersected_ctk.dataframe.notna().all().all()
+
+    # Check original thicket not modified
+    assert ctk.dataframe.equals(ctk_cp.dataframe)
+    assert ctk.metadata.equals(ctk_cp.metadata)
+
+    assert helpers._are_synced(intersected_ctk.graph, intersected_ctk.dataframe)
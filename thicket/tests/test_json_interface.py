@@ -29,3 +29,41 @@ def test_write_json(example_json):
     assert "".join(sorted("".join(sorted(jgs.split())))) == "".join(
         sorted("".join(json_out.split()))
     )
+
+
+def test_json_split(rajaperf_cali_1trial, tmpdir):
+    tk = Thicket.from_caliperreader(rajaperf_cali_1trial, disable_tqdm=True)
+    th_stats = tk.statsframe.dataframe
+    th_stats["test"] = range(len(th_stats))
+
+    json_split = tk.to_json(orient="split")
+    tk_split = Thicket.from_json(json_split)
+
+    assert tk == tk_split
+    assert tk_split.statsframe.dataframe.equals(tk.statsframe.dataframe)
+    assert tk_split.statsframe.graph is tk_split.graph
+    # More compact than the records layout
+    assert len(json_split) < len(tk.to_json())
+
+    # Streaming writer produces the same document
+    json_file = str(tmpdir.join("tk.json"))
+    tk.to_json(orient="split", file=json_file)
+    with open(json_file, "r") as f:
+        assert f.read() == json_split
+
+
+def test_json_split_columns(rajaperf_cuda_block128_1M_cali):
+    tk1 = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    tk2 = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[2:4], disable_tqdm=True
+    )
+    tk = Thicket.concat_thickets(
+        [tk1, tk2], axis="columns", headers=["A", "B"], disable_tqdm=True
+    )
+
+    tk_split = Thicket.from_json(tk.to_json(orient="split"))
+
+    assert tk == tk_split
+    assert tk_split.profile == tk.profile
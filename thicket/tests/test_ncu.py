@@ -3,9 +3,18 @@
 #
 # SPDX-License-Identifier: MIT
 
+import sys
+
 from hatchet.node import Node
+import pandas as pd
+import pytest
 
+import fake_ncu_report
+import thicket.ncu
+from thicket import KernelMatchCache, Thicket
 from thicket.ncu import (
+    _build_query_from_ncu_trace,
+    _match_ncu_trace,
     _match_call_trace_regex,
     _match_kernel_str_to_cali,
     _multi_match_fallback_similarity,
@@ -179,3 +188,142 @@ def test_multi_match_fallback_similarity():
         matched_node.frame["name"]
         == "void cub::DeviceRadixSortUpsweepKernel<cub::DeviceRadixSortPolicy<double, cub::NullType, int>::Policy700, true, false, double, int>(double const*, int*, int, int, int, cub::GridEvenShare<int>)"
     )
+
+
+def test_match_ncu_trace(rajaperf_cuda_block128_1M_cali):
+    tk = Thicket.from_caliperreader(rajaperf_cuda_block128_1M_cali, disable_tqdm=True)
+
+    traces = [
+        ["RAJAPerf", "Apps", "ENERGY"],
+        # Searches below "Basic"
+        ["RAJAPerf", "DAXPY"],
+        ["Apps", "VOL3D"],
+        ["RAJAPerf", "Apps", "Apps_"],
+        ["RAJAPerf", "Apps"],
+        ["RAJAPerf", "Basic", "Basic_DAXPY", "DAXPY"],
+        ["RAJAPerf", "Apps", "NotAKernel"],
+        ["NotANode", "ENERGY"],
+    ]
+    for trace in traces:
+        expected = _build_query_from_ncu_trace(trace).apply(tk)
+        assert set(_match_ncu_trace(tk.node_index, trace)) == set(expected)
+    # Nodes on the matched paths, filtered by _match_kernel_str_to_cali later
+    assert len(_match_ncu_trace(tk.node_index, ["RAJAPerf", "DAXPY"])) == 4
+
+
+def _write_ncu_reports(tk, path):
+    """Write a fake NCU report per profile of tk and return the report mapping."""
+    rollups = {
+        "time": fake_ncu_report.IMetric.RollupOperation_SUM,
+        "throughput": fake_ncu_report.IMetric.RollupOperation_AVG,
+        "bytes": fake_ncu_report.IMetric.RollupOperation_MAX,
+        "grid": fake_ncu_report.IMetric.RollupOperation_MIN,
+        "device": None,
+        "config": fake_ncu_report.IMetric.RollupOperation_AVG,
+    }
+
+    def _action(name, trace, rep):
+        return {
+            "name": f"void rajaperf::{name}<(unsigned long)128>(double *)",
+            "trace": trace,
+            "metrics": {
+                "time": 1.5 * rep,
+                "throughput": 10.0 * rep,
+                "bytes": 100 * rep,
+                "grid": 4 - rep,
+                "device": f"device{rep}",
+                "config": f"config{rep}",
+            },
+        }
+
+    mapping = {}
+    for i, profile in enumerate(tk.profile):
+        # Warmup kernel without a call trace, then reps of two kernels
+        actions = [{"name": "warmup", "trace": [], "metrics": {m: 0 for m in rollups}}]
+        for rep in range(1, 4):
+            actions.append(_action("ENERGY", ["RAJAPerf", "Apps"], rep))
+            if i == 0:
+                actions.append(_action("DAXPY", ["RAJAPerf", "Basic"], rep))
+        report = str(path / f"report{i}.ncu-rep")
+        fake_ncu_report.write_report(report, actions, rollups)
+        mapping[report] = tk.profile_mapping[profile]
+    return mapping
+
+
+def test_add_ncu(rajaperf_cuda_block128_1M_cali, monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "ncu_report", fake_ncu_report)
+    tk = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    mapping = _write_ncu_reports(tk, tmp_path)
+
+    tk.add_ncu(mapping, disable_tqdm=True)
+    energy = tk.get_node("Apps_ENERGY")
+    daxpy = tk.get_node("Basic_DAXPY")
+    for profile in tk.profile:
+        row = tk.dataframe.loc[(energy, profile)]
+        assert row["time"] == 9.0
+        assert row["throughput"] == 20.0
+        assert row["bytes"] == 300
+        assert row["grid"] == 1
+        # No rollup operation, or not numeric
+        assert row["device"] == "device1"
+        assert row["config"] == "config1"
+    assert tk.dataframe.loc[(daxpy, tk.profile[0]), "time"] == 9.0
+    assert tk.dataframe.loc[(daxpy, tk.profile[1]), ["time", "device"]].isna().all()
+    assert tk.dataframe.loc[tk.get_node("Apps_VOL3D"), "time"].isna().all()
+
+    with pytest.raises(ValueError):
+        tk.add_ncu(mapping, disable_tqdm=True)
+
+    tk.add_ncu(mapping, chosen_metrics=["grid", "time"], overwrite=True)
+    assert tk.dataframe.loc[(energy, tk.profile[0]), "grid"] == 1
+    with pytest.raises(KeyError):
+        tk.add_ncu(mapping, chosen_metrics=["not_a_metric"], overwrite=True)
+    with pytest.raises(ValueError, match="No NCU report files"):
+        tk.add_ncu({}, overwrite=True)
+
+
+def test_add_ncu_parallel_and_cache(
+    rajaperf_cuda_block128_1M_cali, monkeypatch, tmp_path
+):
+    monkeypatch.setitem(sys.modules, "ncu_report", fake_ncu_report)
+    tk = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    mapping = _write_ncu_reports(tk, tmp_path)
+
+    tk_serial = tk.deepcopy()
+    tk_serial.add_ncu(mapping, disable_tqdm=True)
+    tk.add_ncu(mapping, disable_tqdm=True, workers=2)
+    pd.testing.assert_frame_equal(tk.dataframe, tk_serial.dataframe)
+
+    cache_dir = str(tmp_path / "cache")
+    tk = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    tk.add_ncu(mapping, disable_tqdm=True, cache=cache_dir)
+    pd.testing.assert_frame_equal(tk.dataframe, tk_serial.dataframe)
+
+    # A rebuilt Thicket has the same call tree, so the kernels are not matched again
+    def _no_match(*args):
+        raise AssertionError("Kernel matched again")
+
+    monkeypatch.setattr(thicket.ncu, "_match_ncu_trace", _no_match)
+    tk = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    cache = KernelMatchCache(cache_dir)
+    assert len(cache) == 2
+    tk.add_ncu(mapping, disable_tqdm=True, cache=cache)
+    assert cache.hits == 2 and cache.misses == 0
+    pd.testing.assert_frame_equal(tk.dataframe, tk_serial.dataframe)
+
+    # A different call tree misses the cache
+    tk_root = Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    tk_root.add_root_node({"name": "Root", "type": "function"})
+    assert tk_root.node_index.fingerprint() != tk.node_index.fingerprint()
+    with pytest.raises(AssertionError, match="Kernel matched again"):
+        tk_root.add_ncu(mapping, disable_tqdm=True, cache=cache)
@@ -0,0 +1,99 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+import pandas as pd
+
+import thicket as th
+
+
+def check_nid_index(tk_nid, tk):
+    """Check that a Thicket indexed by node id's matches one indexed by Nodes."""
+    assert tk_nid.nid_index
+    assert pd.api.types.is_integer_dtype(
+        tk_nid.dataframe.index.get_level_values("node")
+    )
+    assert tk_nid.to_node_index() == tk
+
+
+def test_nid_index(rajaperf_cali_1trial):
+    tk = th.Thicket.from_caliperreader(rajaperf_cali_1trial, disable_tqdm=True)
+    tk_nid = tk.to_nid_index()
+
+    # Original is not modified
+    assert not tk.nid_index
+    check_nid_index(tk_nid, tk)
+
+    # Stats run on the integer index
+    th.stats.mean(tk, columns=["Avg time/rank"])
+    th.stats.mean(tk_nid, columns=["Avg time/rank"])
+    check_nid_index(tk_nid, tk)
+
+    # Methods working on the graph
+    check_nid_index(tk_nid.deepcopy(), tk.deepcopy())
+    check_nid_index(tk_nid.squash(), tk.squash())
+    assert tk_nid.tree(metric_column="Avg time/rank") == tk.tree(
+        metric_column="Avg time/rank"
+    )
+    assert tk_nid.nid_index
+
+    query = th.query.Query().match(
+        ".", lambda row: row["name"].apply(lambda x: x == "Algorithm").all()
+    )
+    check_nid_index(tk_nid.query(query), tk.query(query))
+
+    # Methods working on the tables
+    variant = tk.metadata["variant"].iloc[0]
+    check_nid_index(
+        tk_nid.filter_metadata(lambda x: x["variant"] == variant),
+        tk.filter_metadata(lambda x: x["variant"] == variant),
+    )
+    gb_nid = tk_nid.groupby("variant")
+    gb = tk.groupby("variant")
+    for key in gb:
+        check_nid_index(gb_nid[key], gb[key])
+    check_nid_index(
+        tk_nid.filter_stats(lambda x: x["Avg time/rank_mean"] > 0),
+        tk.filter_stats(lambda x: x["Avg time/rank_mean"] > 0),
+    )
+    check_nid_index(tk_nid.to_dense(), tk.to_dense())
+    check_nid_index(tk_nid.intersection(), tk.intersection())
+    mask_nid = tk_nid.presence_mask()
+    mask = tk.presence_mask()
+    assert (mask_nid.to_numpy() == mask.to_numpy()).all()
+    assert list(mask_nid.index) == [n._hatchet_nid for n in mask.index]
+    assert tk_nid.get_node("Algorithm").frame == tk.get_node("Algorithm").frame
+
+    # Methods modifying the Thicket in place
+    tk.update_inclusive_columns()
+    tk_nid.update_inclusive_columns()
+    check_nid_index(tk_nid, tk)
+
+    tk.reapply_stats_operations()
+    tk_nid.reapply_stats_operations()
+    check_nid_index(tk_nid, tk)
+
+    tk.metadata_columns_to_perfdata("variant")
+    tk_nid.metadata_columns_to_perfdata("variant")
+    check_nid_index(tk_nid, tk)
+
+    tk.move_metrics_to_statsframe(["variant"], profile=tk.profile[0])
+    tk_nid.move_metrics_to_statsframe(["variant"], profile=tk_nid.profile[0])
+    check_nid_index(tk_nid, tk)
+
+    tk.add_root_node({"name": "Root", "type": "function"})
+    tk_nid.add_root_node({"name": "Root", "type": "function"})
+    check_nid_index(tk_nid, tk)
+
+
+def test_nid_index_concat(mpi_scaling_cali):
+    tk1 = th.Thicket.from_caliperreader(mpi_scaling_cali[0], disable_tqdm=True)
+    tk2 = th.Thicket.from_caliperreader(mpi_scaling_cali[1], disable_tqdm=True)
+
+    tk = th.Thicket.concat_thickets([tk1, tk2], disable_tqdm=True)
+    tk_nid = th.Thicket.concat_thickets(
+        [tk1.to_nid_index(), tk2.to_nid_index()], disable_tqdm=True
+    )
+
+    check_nid_index(tk_nid, tk)
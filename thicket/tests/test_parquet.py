@@ -0,0 +1,177 @@
+# Copyright 2022 Lawrence Livermore National Security, LLC and other
+# Thicket Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from hatchet.frame import Frame
+import numpy as np
+import pytest
+
+import thicket as th
+
+pyarrow_avail = True
+try:
+    import pyarrow  # noqa: F401
+except ModuleNotFoundError:
+    pyarrow_avail = False
+
+if not pyarrow_avail:
+    pytest.skip("pyarrow package not available", allow_module_level=True)
+
+
+def test_parquet(rajaperf_cali_1trial, tmpdir, intersection, fill_perfdata):
+    """Test writing and reading a Thicket in the Parquet format."""
+
+    tk = th.Thicket.from_caliperreader(
+        rajaperf_cali_1trial,
+        intersection=intersection,
+        fill_perfdata=fill_perfdata,
+        disable_tqdm=True,
+    )
+    th.stats.mean(tk, columns=["Avg time/rank"])
+
+    pq_dir = str(tmpdir.join("tk"))
+    tk.to_parquet(pq_dir)
+    ptk = th.Thicket.from_parquet(pq_dir)
+
+    assert tk == ptk
+    assert tk.statsframe.exc_metrics == ptk.statsframe.exc_metrics
+    assert ptk.statsframe.graph is ptk.graph
+    # Writing does not modify the Thicket
+    assert len(tk.statsframe_ops_cache) == 1
+
+
+def test_parquet_frame_attrs(rajaperf_cali_1trial, tmpdir):
+    """Test that frame attributes keep their types."""
+
+    tk = th.Thicket.from_caliperreader(rajaperf_cali_1trial, disable_tqdm=True)
+    node = next(iter(tk.graph.traverse()))
+    node.frame = Frame(
+        dict(
+            node.frame.attrs,
+            line=np.int64(12),
+            callsite=("a", 1, [2.0, None]),
+            info={"x": (1, 2)},
+        )
+    )
+
+    pq_dir = str(tmpdir.join("tk"))
+    tk.to_parquet(pq_dir)
+    ptk = th.Thicket.from_parquet(pq_dir)
+
+    pnode = next(n for n in ptk.graph.traverse() if n._hatchet_nid == node._hatchet_nid)
+    assert pnode.frame == node.frame
+    assert type(pnode.frame["line"]) is np.int64
+    assert pnode.frame["callsite"] == ("a", 1, [2.0, None])
+    assert pnode.frame["info"] == {"x": (1, 2)}
+
+    # Values that can not be stored are rejected before anything is written
+    node.frame = Frame(dict(node.frame.attrs, obj=object()))
+    with pytest.raises(TypeError, match="can not be written to Parquet"):
+        tk.to_parquet(str(tmpdir.join("tk2")))
+    assert len(tmpdir.join("tk2").listdir()) == 0
+
+
+def test_parquet_columns(rajaperf_cuda_block128_1M_cali, tmpdir):
+    """Test writing and reading a columnar-joined Thicket in the Parquet format."""
+
+    tk1 = th.Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    tk2 = th.Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[2:4], disable_tqdm=True
+    )
+    tk = th.Thicket.concat_thickets(
+        [tk1, tk2], axis="columns", headers=["A", "B"], disable_tqdm=True
+    )
+
+    pq_dir = str(tmpdir.join("tk"))
+    tk.to_parquet(pq_dir)
+    ptk = th.Thicket.from_parquet(pq_dir)
+
+    assert tk == ptk
+
+
+def test_open(rajaperf_cali_1trial, tmpdir):
+    """Test opening a subset of the profiles and columns of a Parquet Thicket."""
+
+    tk = th.Thicket.from_caliperreader(rajaperf_cali_1trial, disable_tqdm=True)
+
+    pq_dir = str(tmpdir.join("tk"))
+    tk.to_parquet(pq_dir, profiles_per_chunk=1)
+
+    # Whole Thicket
+    assert tk == th.Thicket.open(pq_dir)
+
+    # Profiles and columns
+    profiles = tk.profile[0:2]
+    otk = th.Thicket.open(pq_dir, profiles=profiles, columns=["Avg time/rank"])
+    ftk = tk.filter_profile(profiles)
+    assert sorted(otk.profile) == sorted(profiles)
+    assert list(otk.profile_mapping.keys()) == list(ftk.profile_mapping.keys())
+    assert otk.metadata.equals(ftk.metadata)
+    assert sorted(otk.dataframe.columns) == ["Avg time/rank", "name"]
+    assert otk.dataframe.equals(ftk.dataframe[otk.dataframe.columns])
+    assert otk.exc_metrics == ["Avg time/rank"]
+    assert otk.inc_metrics == []
+    assert list(otk.statsframe.dataframe.columns) == ["name"]
+
+    # Metadata filter
+    variant = tk.metadata["variant"].iloc[0]
+    otk = th.Thicket.open(pq_dir, metadata_filter=lambda x: x["variant"] == variant)
+    ftk = tk.filter_metadata(lambda x: x["variant"] == variant)
+    assert otk.dataframe.equals(ftk.dataframe)
+    assert otk.metadata.equals(ftk.metadata)
+
+    with pytest.raises(th.EmptyMetadataTable):
+        th.Thicket.open(pq_dir, metadata_filter=lambda x: x["variant"] == "none")
+
+
+def test_open_row_groups(rajaperf_cali_1trial, tmpdir):
+    """Test that the row groups hold whole profiles when profiles have different
+    numbers of rows."""
+    import pyarrow.parquet as pq
+
+    tk = th.Thicket.from_caliperreader(
+        rajaperf_cali_1trial, fill_perfdata=False, disable_tqdm=True
+    )
+    profile_rows = tk.dataframe.groupby(level="profile").size()
+    assert profile_rows.nunique() > 1
+
+    pq_dir = str(tmpdir.join("tk"))
+    tk.to_parquet(pq_dir, profiles_per_chunk=2)
+
+    pq_file = pq.ParquetFile(str(tmpdir.join("tk", "dataframe.parquet")))
+    groups = [
+        pq_file.read_row_group(i, columns=["profile"]).column(0).to_pylist()
+        for i in range(pq_file.num_row_groups)
+    ]
+    assert len(groups) == -(-len(profile_rows) // 2)
+    for group in groups:
+        assert len(set(group)) <= 2
+        assert all(profile_rows[p] == group.count(p) for p in set(group))
+
+    profiles = tk.profile[0:1]
+    otk = th.Thicket.open(pq_dir, profiles=profiles)
+    assert otk.dataframe.equals(tk.filter_profile(profiles).dataframe)
+
+
+def test_open_columns(rajaperf_cuda_block128_1M_cali, tmpdir):
+    """Test opening a subset of a columnar-joined Parquet Thicket."""
+
+    tk1 = th.Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[0:2], disable_tqdm=True
+    )
+    tk2 = th.Thicket.from_caliperreader(
+        rajaperf_cuda_block128_1M_cali[2:4], disable_tqdm=True
+    )
+    tk = th.Thicket.concat_thickets(
+        [tk1, tk2], axis="columns", headers=["A", "B"], disable_tqdm=True
+    )
+
+    pq_dir = str(tmpdir.join("tk"))
+    tk.to_parquet(pq_dir)
+    otk = th.Thicket.open(pq_dir, columns=[("A", "Avg time/rank")])
+
+    assert sorted(otk.dataframe.columns) == [("A", "Avg time/rank"), ("name", "")]
+    assert otk.dataframe.equals(tk.dataframe[otk.dataframe.columns])
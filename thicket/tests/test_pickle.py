@@ -26,3 +26,12 @@ def test_pickle(rajaperf_cali_1trial, tmpdir, intersection, fill_perfdata):
 
     # Compare original and pickled thicket
     assert tk == ptk
+
+
+def test_pickle_keeps_ops_cache(rajaperf_cali_1trial, tmpdir):
+    tk = th.Thicket.from_caliperreader(rajaperf_cali_1trial, disable_tqdm=True)
+    th.stats.mean(tk, columns=["Avg time/rank"])
+
+    tk.to_pickle(tmpdir.join("tk.pkl"))
+
+    assert len(tk.statsframe_ops_cache) == 1
@@ -6,9 +6,12 @@
 import re
 
 import hatchet as ht
+from hatchet.query import ObjectQuery, QueryEngine
 import pandas as pd
+import pytest
 
 from thicket import Thicket
+from thicket.query import ThicketQueryEngine, object_query, parse_string_dialect
 from utils import check_identity
 
 
@@ -173,3 +176,51 @@ def test_string_dialect_column_multi_index(
         (new_th.dataframe.loc[idx[queried_nodes, :], (0, "Avg time/rank")] > 10.0)
         & (new_th.dataframe.loc[idx[queried_nodes, :], (1, "Avg time/rank")] > 10.0)
     ).all()
+
+
+@pytest.mark.parametrize("multi_index_mode", ["all", "any"])
+def test_thicket_query_engine(rajaperf_seq_O3_1M_cali, fill_perfdata, multi_index_mode):
+    th = Thicket.from_caliperreader(
+        rajaperf_seq_O3_1M_cali, fill_perfdata=fill_perfdata, disable_tqdm=True
+    )
+    th.dataframe["over"] = th.dataframe["Avg time/rank"] > 0.001
+
+    queries = [
+        [(".", {"name": "RAJAPerf"}), "*"],
+        ["*", {"name": "Apps_.*"}],
+        [("*", {"name": "Apps.*|RAJAPerf", "Avg time/rank": "> 0.001"})],
+        [{"depth": "<= 1"}, ("+", {"Avg time/rank": ["> 0.0001", "<= 100"]})],
+        [{"over": True}],
+        [{"node_id": 2}, "*"],
+        [{"not_a_column": "x"}],
+        # Falls back to the per-node predicates
+        [{"Avg time/rank": "> np.nan"}],
+    ]
+    for query in queries:
+        expected = QueryEngine().apply(
+            ObjectQuery(query, multi_index_mode=multi_index_mode),
+            th.graph,
+            th.dataframe,
+        )
+        result = ThicketQueryEngine().apply(
+            object_query(query, multi_index_mode=multi_index_mode),
+            th.graph,
+            th.dataframe,
+        )
+        assert set(result) == set(expected)
+
+    # String dialect predicates are applied per node
+    query = """MATCH (".", p)->("*", q)
+    WHERE p."name" = "RAJAPerf" AND q."Avg time/rank" > 0.001
+    """
+    expected = QueryEngine().apply(
+        parse_string_dialect(query, multi_index_mode=multi_index_mode),
+        th.graph,
+        th.dataframe,
+    )
+    result = ThicketQueryEngine().apply(
+        parse_string_dialect(query, multi_index_mode=multi_index_mode),
+        th.graph,
+        th.dataframe,
+    )
+    assert set(result) == set(expected)
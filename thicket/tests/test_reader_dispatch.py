@@ -3,7 +3,9 @@
 #
 # SPDX-License-Identifier: MIT
 
+from concurrent.futures import ThreadPoolExecutor
 import os
+
 import pytest
 
 from hatchet import GraphFrame
@@ -120,3 +122,31 @@ def test_error_file(mpi_scaling_cali, data_dir):
 
     # Remove the file
     os.remove(empty_file_path)
+
+
+def test_parallel_read(rajaperf_cali_1trial):
+    tk = Thicket.from_caliperreader(rajaperf_cali_1trial, disable_tqdm=True)
+
+    # Process pool
+    tk_workers = Thicket.from_caliperreader(
+        rajaperf_cali_1trial, disable_tqdm=True, workers=2
+    )
+    assert tk == tk_workers
+
+    # User-provided executor
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        tk_executor = Thicket.from_caliperreader(
+            rajaperf_cali_1trial, disable_tqdm=True, executor=executor
+        )
+    assert tk == tk_executor
+
+
+def test_parallel_error_file(mpi_scaling_cali, tmpdir):
+    empty_file_path = str(tmpdir.join("empty.cali"))
+    with open(empty_file_path, "w"):
+        pass
+
+    with pytest.raises(Exception, match="Failed to read file"):
+        Thicket.from_caliperreader(
+            mpi_scaling_cali + [empty_file_path], disable_tqdm=True, workers=2
+        )
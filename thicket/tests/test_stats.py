@@ -6,9 +6,11 @@
 import math
 
 import numpy as np
+import pandas as pd
 import pytest
 
 import thicket as th
+from thicket.stats.stats_utils import StatsOp, cache_stats_op
 
 
 def test_mean(rajaperf_seq_O3_1M_cali, intersection, fill_perfdata):
@@ -449,6 +451,73 @@ def test_variance_columnar_join(thicket_axis_columns, intersection, fill_perfdat
     assert (idx, "Min time/rank_var") in combined_th.statsframe.show_metric_columns()
 
 
+def test_describe(rajaperf_seq_O3_1M_cali, intersection, fill_perfdata):
+    th_1 = th.Thicket.from_caliperreader(
+        rajaperf_seq_O3_1M_cali,
+        intersection=intersection,
+        fill_perfdata=fill_perfdata,
+        disable_tqdm=True,
+    )
+    th_2 = th.Thicket.from_caliperreader(
+        rajaperf_seq_O3_1M_cali,
+        intersection=intersection,
+        fill_perfdata=fill_perfdata,
+        disable_tqdm=True,
+    )
+    columns = ["Min time/rank", "Avg time/rank"]
+
+    for func in [th.stats.std, th.stats.mean, th.stats.percentiles]:
+        func(th_1, columns=columns)
+    output = th.stats.describe(
+        th_2, columns=columns, stats=["std", "mean", "percentiles"]
+    )
+
+    assert output == list(th_1.statsframe.dataframe.columns[1:])
+    pd.testing.assert_frame_equal(th_1.statsframe.dataframe, th_2.statsframe.dataframe)
+    assert th_1.statsframe.exc_metrics == th_2.statsframe.exc_metrics
+    assert th_1.statsframe.inc_metrics == th_2.statsframe.inc_metrics
+    assert [f.__name__ for f in th_2.statsframe_ops_cache] == [
+        "std",
+        "mean",
+        "percentiles",
+    ]
+    assert th_2.statsframe_ops_cache[th.stats.mean.__wrapped__] == {
+        "Min time/rank_mean": StatsOp((columns,), {}, ()),
+        "Avg time/rank_mean": StatsOp((columns,), {}, ()),
+    }
+
+    # Recomputed columns keep their position
+    th.stats.describe(th_2, columns=columns, stats=["mean"])
+    assert list(th_2.statsframe.dataframe.columns) == list(
+        th_1.statsframe.dataframe.columns
+    )
+
+    with pytest.raises(ValueError):
+        th.stats.describe(th_2, columns=columns, stats=["mode"])
+
+
+def test_describe_columnar_join(thicket_axis_columns):
+    thicket_list, thicket_list_cp, combined_th = thicket_axis_columns
+    idx = list(combined_th.dataframe.columns.levels[0][0:2])
+    columns = [(idx[0], "Min time/rank"), (idx[1], "Min time/rank")]
+
+    output = th.stats.describe(combined_th, columns=columns, percentiles=[0.5])
+
+    assert len(output) == 14
+    statsframe = combined_th.statsframe.dataframe.copy()
+    assert list(statsframe.columns) == sorted(statsframe.columns)
+    for name, suffix in [("minimum", "_min"), ("variance", "_var")]:
+        getattr(th.stats, name)(combined_th, columns=columns)
+        for idx_level, column in columns:
+            assert statsframe[(idx_level, column + suffix)].equals(
+                combined_th.statsframe.dataframe[(idx_level, column + suffix)]
+            )
+    assert (
+        idx[0],
+        "Min time/rank_percentiles_50",
+    ) in combined_th.statsframe.show_metric_columns()
+
+
 def test_normality(rajaperf_cuda_block128_1M_cali, intersection, fill_perfdata):
     th_ens = th.Thicket.from_caliperreader(
         rajaperf_cuda_block128_1M_cali,
@@ -1272,6 +1341,78 @@ def test_reapply_statsframe_operations(
     assert all([comp_val[c].all() for c in comp_val.columns])
 
 
+def test_stats_session_per_thicket(rajaperf_seq_O3_1M_cali):
+    th_1 = th.Thicket.from_caliperreader(rajaperf_seq_O3_1M_cali, disable_tqdm=True)
+    th_2 = th_1.deepcopy()
+    columns = ["Min time/rank"]
+
+    @cache_stats_op
+    def mean_of_other(thicket, columns):
+        # Stats operations on another thicket are not read by this operation
+        th.stats.mean(th_2, columns=columns)
+        thicket.statsframe.dataframe["other_mean"] = 0.0
+        return ["other_mean"]
+
+    mean_of_other(th_1, columns)
+    assert th_1.statsframe_ops_cache[mean_of_other.__wrapped__] == {
+        "other_mean": StatsOp((columns,), {}, (), ())
+    }
+    assert th_1.stats_session is not th_2.stats_session
+    assert th_1.stats_session.running_ops == []
+
+    # Reapplying the operations of th_1 does not skip the operations on th_2
+    th.stats.mean(th_1, columns=columns)
+    th_2.statsframe.dataframe = th.helpers._new_statsframe_df(
+        th_2.dataframe, multiindex=False
+    )
+    th_1.reapply_stats_operations()
+    assert "Min time/rank_mean" in th_2.statsframe.dataframe.columns
+    assert th_1.stats_session.reapplied_ops is None
+
+
+def test_reapply_statsframe_operations_incremental(
+    rajaperf_seq_O3_1M_cali, intersection, fill_perfdata
+):
+    th_1 = th.Thicket.from_caliperreader(
+        rajaperf_seq_O3_1M_cali,
+        intersection=intersection,
+        fill_perfdata=fill_perfdata,
+        disable_tqdm=True,
+    )
+    th_1.update_inclusive_columns()
+
+    columns = ["Min time/rank", th_1.inc_metrics[0]]
+    th.stats.mean(th_1, columns=columns)
+    th.stats.std(th_1, columns=columns)
+    th.stats.percentiles(th_1, columns=columns)
+
+    def check_full_reapply(th_x):
+        full = th_x.copy()
+        full.statsframe.dataframe = th.helpers._new_statsframe_df(
+            full.dataframe, multiindex=False
+        )
+        full.reapply_stats_operations()
+        pd.testing.assert_frame_equal(
+            th_x.statsframe.dataframe,
+            full.statsframe.dataframe[th_x.statsframe.dataframe.columns],
+            check_exact=False,
+            rtol=1e-12,
+        )
+
+    # Removing nodes changes the inclusive metrics of their ancestors
+    names = [n.frame["name"] for n in th_1.graph.traverse()]
+    keep = set(names[: len(names) // 2])
+    th_2 = th_1.query_stats(
+        th.query.Query().match(".", lambda row: row["name"] in keep)
+    )
+    assert len(th_2.statsframe.dataframe) < len(th_1.statsframe.dataframe)
+    check_full_reapply(th_2)
+
+    th_1.add_root_node({"name": "Root", "type": "function"})
+    check_full_reapply(th_1)
+    assert len(th_1.statsframe_ops_cache) == 3
+
+
 def test_cache_decorator(rajaperf_seq_O3_1M_cali, intersection, fill_perfdata):
     th_1 = th.Thicket.from_caliperreader(
         rajaperf_seq_O3_1M_cali,
@@ -12,6 +12,7 @@ import hatchet as ht
 
 from thicket import Thicket
 import thicket.helpers as helpers
+import thicket.utils
 
 
 def test_invalid_constructor():
@@ -230,3 +231,68 @@ def test_different_profile_idx_name():
         profile_idx_name="profile2",
     )
     assert th.profile_idx_name == "profile2"
+
+
+def test_presence_mask(rajaperf_unique_tunings):
+    tk_sparse = Thicket.from_caliperreader(
+        rajaperf_unique_tunings, fill_perfdata=False, disable_tqdm=True
+    )
+    tk_dense = Thicket.from_caliperreader(
+        rajaperf_unique_tunings, fill_perfdata=True, disable_tqdm=True
+    )
+
+    mask = tk_sparse.presence_mask()
+    assert mask.shape == (len(tk_sparse.graph), len(tk_sparse.profile))
+    assert mask.to_numpy().sum() == len(tk_sparse.dataframe)
+    # Filled rows are not present
+    assert mask.equals(tk_dense.presence_mask())
+    assert not mask.all().all()
+
+    assert tk_sparse.to_dense().dataframe.equals(tk_dense.dataframe)
+
+
+def test_fill_perfdata_non_unique():
+    df = pd.DataFrame(
+        {"time": [1.0, 2.0, 3.0]},
+        index=pd.MultiIndex.from_tuples(
+            [("a", 0), ("a", 0), ("b", 1)], names=["node", "profile"]
+        ),
+    )
+    with pytest.warns(RuntimeWarning, match="Non-unique multi-index"):
+        filled = thicket.utils._fill_perfdata(df)
+    # The input is not returned, so modifying the result does not modify it
+    assert filled is not df
+    assert filled.equals(df)
+
+
+def test_squash_merge(mpi_scaling_cali):
+    tk = Thicket.from_caliperreader(mpi_scaling_cali, disable_tqdm=True)
+    # Dropping the parents of the MPI calls makes calls with the same name siblings
+    parents = ["CalcQForElems", "CalcForceForNodes", "LagrangeNodal"]
+    tk.dataframe = tk.dataframe[~tk.dataframe["name"].isin(parents)]
+    # The sum of a group of NaN's is NaN
+    tk.dataframe.loc[tk.dataframe["name"] == "MPI_Irecv", "Total time"] = np.nan
+
+    mpi_calls = ["MPI_Irecv", "MPI_Isend", "MPI_Wait", "MPI_Waitall"]
+    profiles = tk.dataframe.index.get_level_values("profile")
+    expected = (
+        tk.dataframe["Total time"]
+        .groupby([tk.dataframe["name"], profiles])
+        .sum(min_count=1)
+    )
+
+    squashed = tk.squash(update_inc_cols=False)
+    df = squashed.dataframe
+    assert not df.index.duplicated().any()
+    assert len(squashed.graph) < len(tk.graph) - len(parents)
+    for name in mpi_calls:
+        nodes = [n for n in squashed.graph.traverse() if n.frame["name"] == name]
+        # Siblings with the same name are merged
+        parent_paths = [n.parents[0].path() for n in nodes]
+        assert len(parent_paths) == len(set(parent_paths))
+
+    squashed_profiles = df.index.get_level_values("profile")
+    result = df["Total time"].groupby([df["name"], squashed_profiles]).sum(min_count=1)
+    for name in mpi_calls:
+        assert np.allclose(result[name], expected[name], equal_nan=True)
+    assert result["MPI_Irecv"].isna().all()
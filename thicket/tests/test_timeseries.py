@@ -3,9 +3,13 @@
 #
 # SPDX-License-Identifier: MIT
 
+from concurrent.futures import ThreadPoolExecutor
 import re
 
 import hatchet as ht
+import pandas as pd
+from hatchet.frame import Frame
+from hatchet.node import Node
 
 import thicket as tt
 
@@ -50,6 +54,69 @@ def test_from_timeseries_lulesh(example_timeseries):
     )
 
 
+def test_from_timeseries_single_pass(example_timeseries_cxx):
+    """Test that stacking the iterations matches unifying per-iteration thickets"""
+    gf_list = ht.GraphFrame.from_timeseries(example_timeseries_cxx)
+    ens_list = [
+        tt.Thicket.thicketize_timeseries_graphframe(gf.deepcopy()) for gf in gf_list
+    ]
+    th_unified = tt.Thicket.concat_thickets(ens_list)
+    th = tt.Thicket.thicketize_timeseries_graphframes(gf_list)
+
+    assert th.graph is gf_list[0].graph
+    assert th.dataframe.equals(th_unified.dataframe)
+    assert sorted(th.exc_metrics) == sorted(th_unified.exc_metrics)
+    assert th.statsframe.dataframe.equals(th_unified.statsframe.dataframe)
+
+    # Profiles are the iterations
+    assert th.profile == [0, 20, 40, 60, 80]
+    assert th.metadata.index.tolist() == th.profile
+    assert th.profile_idx_name == "iteration"
+
+
+def test_from_timeseries_separate_graphs(example_timeseries_cxx):
+    """Test that GraphFrames with separate graph objects give the same Thicket"""
+    gf_list = ht.GraphFrame.from_timeseries(example_timeseries_cxx)
+    th = tt.Thicket.thicketize_timeseries_graphframes(gf_list, prf="ts")
+
+    # Equal graphs are mapped onto the graph of the first GraphFrame
+    copies = [gf.deepcopy() for gf in gf_list]
+    th_copies = tt.Thicket.thicketize_timeseries_graphframes(copies, prf="ts")
+    assert th_copies.graph is copies[0].graph
+    assert th_copies == th
+
+    # Different graphs are unified
+    copies = [gf.deepcopy() for gf in gf_list]
+    extra = Node(Frame({"name": "extra", "type": "function"}))
+    copies[-1].graph.roots.append(extra)
+    extra_row = (
+        copies[-1]
+        .dataframe.iloc[[0]]
+        .rename(index={copies[-1].dataframe.index[0]: extra})
+    )
+    extra_row["name"] = "extra"
+    copies[-1].dataframe = pd.concat([copies[-1].dataframe, extra_row])
+    th_union = tt.Thicket.thicketize_timeseries_graphframes(copies, prf="ts")
+    assert len(th_union.graph) == len(th.graph) + 1
+    assert len(th_union.dataframe) == len(th.dataframe) + len(th.profile)
+    assert th_union.metadata.equals(th.metadata)
+    assert th_union.profile == th.profile
+    assert th_union.profile_mapping == th.profile_mapping
+    assert set(th_union.profile_mapping.values()) == {"ts"}
+
+
+def test_from_timeseries_files(example_timeseries_cxx, mem_power_timeseries):
+    """Test reading a list of timeseries files in parallel"""
+    files = [example_timeseries_cxx, mem_power_timeseries]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        th_list = tt.Thicket.from_timeseries(files, executor=executor)
+
+    assert len(th_list) == 2
+    for th, file in zip(th_list, files):
+        assert th.dataframe.equals(tt.Thicket.from_timeseries(file).dataframe)
+        assert set(th.profile_mapping.values()) == {file}
+
+
 def test_timeseries_statsframe(example_timeseries):
     """Test the creation of a statsframe with timeseries thicket"""
 
@@ -5,13 +5,14 @@
 
 import collections
 import copy
+import functools
 import os
 import pickle
 import sys
 import json
 import warnings
-import itertools
 from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from hashlib import md5
 
 import pandas as pd
@@ -20,24 +21,33 @@ from hatchet import GraphFrame
 from hatchet.frame import Frame
 from hatchet.graph import Graph
 from hatchet.node import Node
-from hatchet.query import QueryEngine
 from thicket.query import (
-    Query,
-    ObjectQuery,
+    ThicketQueryEngine,
+    object_query,
     parse_string_dialect,
     is_hatchet_query,
     is_old_style_query,
 )
 import tqdm
 
+from thicket.cache import KernelMatchCache, QueryCache, ReaderCache
 from thicket.ensemble import Ensemble
-from thicket.utils import _fill_perfdata
+from thicket.node_index import NodeIndex
+from thicket.parquet import open_parquet, read_parquet, write_parquet
+from thicket.utils import _fill_perfdata, _presence_mask, validate_dataframe
 
 try:
     from .ncu import NCUReader
 except ModuleNotFoundError:
     pass
 import thicket.helpers as helpers
+from thicket.stats import stats_utils
+from thicket.stats.running_stats import (
+    RunningStats,
+    _apply_ops,
+    _mergeable_ops,
+    _ops_columns,
+)
 from .groupby import GroupBy
 from .utils import (
     verify_thicket_structures,
@@ -48,6 +58,33 @@ from .utils import (
 from .external.console import ThicketRenderer
 
 
+def _node_objects(method):
+    """Decorator for Thicket methods that need Node objects in the "node" index level.
+
+    If the Thicket is indexed by integer node id's (see Thicket.to_nid_index), its
+    tables are switched to Node objects for the call and back afterwards. Thicket
+    results are returned indexed by integer node id's as well.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.nid_index:
+            return method(self, *args, **kwargs)
+        self._set_node_index()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self._set_nid_index()
+        if isinstance(result, Thicket) and result is not self:
+            result._set_nid_index()
+        elif isinstance(result, GroupBy):
+            for tk in result.values():
+                tk._set_nid_index()
+        return result
+
+    return wrapper
+
+
 class Thicket(GraphFrame):
     """Ensemble of profiles, includes a graph and three dataframes, performance data,
     metadata, and aggregated statistics.
@@ -67,6 +104,7 @@ class Thicket(GraphFrame):
         profile_mapping=None,
         statsframe=None,
         statsframe_ops_cache=None,
+        running_stats=None,
     ):
         """Create a new thicket from a graph and a dataframe.
 
@@ -85,6 +123,8 @@ class Thicket(GraphFrame):
             profile_idx_name (str): name of the profile index in the dataframe
             profile_mapping (dict): mapping of hashed profile strings to original strings
             statsframe (DataFrame): pandas DataFrame indexed by Nodes from the graph
+            running_stats (RunningStats): mergeable statistics of dataframe, updated
+                when thickets are concatenated
         """
         super().__init__(
             graph, dataframe, exc_metrics, inc_metrics, default_metric, metadata
@@ -99,7 +139,8 @@ class Thicket(GraphFrame):
             )
         else:
             self.statsframe = statsframe
-        self.query_engine = QueryEngine()
+        self.query_engine = ThicketQueryEngine()
+        self.query_cache = QueryCache()
         self.performance_cols = helpers._get_perf_columns(self.dataframe)
 
         if statsframe_ops_cache is None:
@@ -107,6 +148,13 @@ class Thicket(GraphFrame):
         else:
             self.statsframe_ops_cache = statsframe_ops_cache
 
+        if running_stats is None:
+            self.running_stats = RunningStats()
+        else:
+            self.running_stats = running_stats
+            self.running_stats.bind(self.dataframe)
+        self.stats_session = stats_utils.StatsSession()
+
     def __eq__(self, other):
         """Compare two thicket objects.
 
@@ -253,6 +301,81 @@ class Thicket(GraphFrame):
 
         return th
 
+    @staticmethod
+    def thicketize_timeseries_graphframes(
+        gf_list, iter_column="loop.start_iteration", prf=None
+    ):
+        """Build a single Thicket from the per-iteration GraphFrames of a timeseries.
+
+        The dataframes are stacked into one (node, iteration) dataframe in a single
+        concatenation, instead of creating one Thicket per iteration and unifying their
+        graphs. The GraphFrames created by hatchet's timeseries reader share the same
+        graph, which is kept. Graphs with the same structure are mapped onto the graph
+        of the first GraphFrame, and other graphs are unified.
+
+        Arguments:
+            gf_list (list): list of hatchet GraphFrame objects, one per iteration
+            iter_column (str): column name on which the timeseries was split. Used as the
+                iteration of each GraphFrame, then deleted
+            prf (str, optional): name of the timeseries file, used in the profile
+                mapping
+
+        Returns:
+            (thicket): Thicket object
+        """
+        graph = gf_list[0].graph
+        dataframes = [gf.dataframe for gf in gf_list]
+        if any(gf.graph is not graph for gf in gf_list):
+            indexes = [NodeIndex(gf.graph) for gf in gf_list]
+            if all(i.fingerprint() == indexes[0].fingerprint() for i in indexes):
+                # Same structure, so the nodes at the same positions in traversal
+                # order match
+                old_to_new = {
+                    id(index.node_at(pos)): indexes[0].node_at(pos)
+                    for index in indexes[1:]
+                    for pos in range(len(index))
+                }
+            else:
+                graph, old_to_new = Ensemble._union_graphs([gf.graph for gf in gf_list])
+            dataframes = [
+                df.set_axis(Ensemble._remap_nodes(df.index, old_to_new), axis=0)
+                for df in dataframes
+            ]
+
+        iterations = [int(gf.dataframe[iter_column].dropna().max()) for gf in gf_list]
+
+        # Stack the dataframes with "iteration" as the second index level
+        dataframe = pd.concat(dataframes, keys=iterations, names=["iteration"])
+        dataframe.drop(columns=[iter_column], inplace=True)
+        index_names = list(gf_list[0].dataframe.index.names)
+        index_names.insert(1, "iteration")
+        dataframe = dataframe.reorder_levels(index_names)
+
+        validate_dataframe(dataframe)
+        dataframe = _fill_perfdata(dataframe)
+        dataframe.sort_index(inplace=True)
+
+        metadata = pd.DataFrame(
+            [gf.metadata for gf in gf_list],
+            index=pd.Index(iterations, name="iteration"),
+        )
+        metadata.sort_index(inplace=True)
+
+        return Thicket(
+            graph=graph,
+            dataframe=dataframe,
+            exc_metrics=list(
+                OrderedDict.fromkeys(m for gf in gf_list for m in gf.exc_metrics)
+            ),
+            inc_metrics=list(
+                OrderedDict.fromkeys(m for gf in gf_list for m in gf.inc_metrics)
+            ),
+            metadata=metadata,
+            profile=sorted(iterations),
+            profile_idx_name="iteration",
+            profile_mapping=OrderedDict((it, prf) for it in sorted(iterations)),
+        )
+
     @staticmethod
     def from_pickle(filename, **kwargs):
         """Read in a Thicket from a pickle file."""
@@ -261,10 +384,68 @@ class Thicket(GraphFrame):
     def to_pickle(self, filename, **kwargs):
         """Write a Thicket to a pickle file."""
 
-        # Clear out statsframe to ensure thicket obj is serializable
-        self.statsframe_ops_cache = {}
+        # Pickle a shallow copy without the statsframe_ops_cache, which is not
+        # serializable, so this Thicket's cache is kept
+        tk = copy.copy(self)
+        tk.statsframe_ops_cache = {}
 
-        pickle.dump(self, open(filename, "wb"), **kwargs)
+        pickle.dump(tk, open(filename, "wb"), **kwargs)
+
+    @staticmethod
+    def from_parquet(path):
+        """Read in a Thicket from a directory written by Thicket.to_parquet.
+
+        Requires pyarrow.
+
+        Arguments:
+            path (str): directory to read from
+
+        Returns:
+            (thicket): Thicket object
+        """
+        return read_parquet(path)
+
+    @staticmethod
+    def open(path, profiles=None, columns=None, metadata_filter=None):
+        """Open a subset of a Thicket from a directory written by Thicket.to_parquet.
+
+        Only the selected profiles and columns of the performance data table are read
+        from disk, so a slice of a large Thicket can be loaded without reading all of
+        it. Requires pyarrow.
+
+        Arguments:
+            path (str): directory to read from
+            profiles (list, optional): profiles to load, as values of the profile level
+                of the performance data table. All profiles if None.
+            columns (list, optional): performance data columns to load. The "name"
+                column is always loaded. All columns if None.
+            metadata_filter (lambda function, optional): filter to apply to the
+                metadata table, like Thicket.filter_metadata. Only the profiles it
+                selects are loaded.
+
+        Returns:
+            (thicket): Thicket object
+        """
+        return open_parquet(
+            path, profiles=profiles, columns=columns, metadata_filter=metadata_filter
+        )
+
+    @_node_objects
+    def to_parquet(self, path, profiles_per_chunk=64):
+        """Write a Thicket to a directory of Parquet files.
+
+        The graph is stored as a flat node table, and the performance data, metadata
+        and aggregated statistics tables are stored as columnar tables indexed by
+        integer node id's. The performance data table is stored in chunks of profiles
+        so Thicket.open can read a subset of the profiles. Requires pyarrow. The
+        statsframe_ops_cache is not written.
+
+        Arguments:
+            path (str): directory to write to
+            profiles_per_chunk (int): number of profiles per chunk of the performance
+                data table
+        """
+        write_parquet(self, path, profiles_per_chunk=profiles_per_chunk)
 
     @staticmethod
     def from_caliper(
@@ -273,6 +454,9 @@ class Thicket(GraphFrame):
         intersection=False,
         fill_perfdata=True,
         disable_tqdm=False,
+        workers=None,
+        executor=None,
+        cache=None,
     ):
         """Read in a Caliper .cali or .json file.
 
@@ -281,8 +465,15 @@ class Thicket(GraphFrame):
                 `.cali` or JSON-split format, or an open file object to read one
             query (str): cali-query in CalQL format
             intersection (bool): whether to perform intersection or union (default)
-            fill_perfdata (bool): whether to fill missing performance data with NaNs
+            fill_perfdata (bool): whether to fill missing performance data with NaNs.
+                If False, missing rows are not stored (see Thicket.presence_mask and
+                Thicket.to_dense), which uses much less memory for sparse ensembles
             disable_tqdm (bool): whether to display tqdm progress bar
+            workers (int, optional): number of processes used to read multiple files
+            executor (concurrent.futures.Executor, optional): executor used to read
+                multiple files. Takes precedence over workers
+            cache (str or ReaderCache, optional): cache directory, or ReaderCache
+                object, to store parsed files in and load unchanged files from
         """
         return Thicket.reader_dispatch(
             GraphFrame.from_caliper,
@@ -291,11 +482,20 @@ class Thicket(GraphFrame):
             disable_tqdm,
             filename_or_stream,
             query,
+            workers=workers,
+            executor=executor,
+            cache=cache,
         )
 
     @staticmethod
     def from_hpctoolkit(
-        dirname, intersection=False, fill_perfdata=True, disable_tqdm=False
+        dirname,
+        intersection=False,
+        fill_perfdata=True,
+        disable_tqdm=False,
+        workers=None,
+        executor=None,
+        cache=None,
     ):
         """Create a GraphFrame using hatchet's HPCToolkit reader and use its attributes
         to make a new thicket.
@@ -303,8 +503,15 @@ class Thicket(GraphFrame):
         Arguments:
             dirname (str): parent directory of an HPCToolkit experiment.xml file
             intersection (bool): whether to perform intersection or union (default)
-            fill_perfdata (bool): whether to fill missing performance data with NaNs
+            fill_perfdata (bool): whether to fill missing performance data with NaNs.
+                If False, missing rows are not stored (see Thicket.presence_mask and
+                Thicket.to_dense), which uses much less memory for sparse ensembles
             disable_tqdm (bool): whether to display tqdm progress bar
+            workers (int, optional): number of processes used to read multiple files
+            executor (concurrent.futures.Executor, optional): executor used to read
+                multiple files. Takes precedence over workers
+            cache (str or ReaderCache, optional): cache directory, or ReaderCache
+                object, to store parsed files in and load unchanged files from
 
         Returns:
             (thicket): new thicket containing HPCToolkit profile data
@@ -315,6 +522,9 @@ class Thicket(GraphFrame):
             fill_perfdata,
             disable_tqdm,
             dirname,
+            workers=workers,
+            executor=executor,
+            cache=cache,
         )
 
     @staticmethod
@@ -323,6 +533,9 @@ class Thicket(GraphFrame):
         intersection=False,
         fill_perfdata=True,
         disable_tqdm=False,
+        workers=None,
+        executor=None,
+        cache=None,
         **kwargs,
     ):
         """Helper function to read one caliper file.
@@ -331,8 +544,15 @@ class Thicket(GraphFrame):
             filename_or_caliperreader (str or CaliperReader): name of a Caliper output
                 file in `.cali` format, or a CaliperReader object
             intersection (bool): whether to perform intersection or union (default)
-            fill_perfdata (bool): whether to fill missing performance data with NaNs
+            fill_perfdata (bool): whether to fill missing performance data with NaNs.
+                If False, missing rows are not stored (see Thicket.presence_mask and
+                Thicket.to_dense), which uses much less memory for sparse ensembles
             disable_tqdm (bool): whether to display tqdm progress bar
+            workers (int, optional): number of processes used to read multiple files
+            executor (concurrent.futures.Executor, optional): executor used to read
+                multiple files. Takes precedence over workers
+            cache (str or ReaderCache, optional): cache directory, or ReaderCache
+                object, to store parsed files in and load unchanged files from
         """
         return Thicket.reader_dispatch(
             GraphFrame.from_caliperreader,
@@ -340,6 +560,9 @@ class Thicket(GraphFrame):
             fill_perfdata,
             disable_tqdm,
             filename_or_caliperreader,
+            workers=workers,
+            executor=executor,
+            cache=cache,
             **kwargs,
         )
 
@@ -379,31 +602,64 @@ class Thicket(GraphFrame):
 
         return tk
 
+    @staticmethod
     def from_timeseries(
-        filename_or_caliperreader, level="loop.start_iteration", intersection=False
+        filename_or_caliperreader,
+        level="loop.start_iteration",
+        intersection=False,
+        workers=None,
+        executor=None,
     ):
         """Read in a single Caliper .cali file that has timeseries records
         gets split into a list of graphframes by hatchet.
 
         Arguments:
-            filename_or_stream (str or file-like): name of a Caliper timeseries output file in
-                `.cali` format, or an open file object to read one
+            filename_or_stream (str or file-like or list): name of a Caliper timeseries output file in
+                `.cali` format, or an open file object to read one. A list of files
+                reads one Thicket per file.
             level (str): level to split the timeseries, default "loop.start_iteration"
             intersection (bool): whether to perform intersection or union (default)
+            workers (int, optional): number of processes used to read a list of files.
+                Files are read serially if None or 1.
+            executor (concurrent.futures.Executor, optional): executor used to read a
+                list of files. Takes precedence over workers.
+
+        Returns:
+            (thicket or list): Thicket object, or list of Thicket objects in the order
+                of the files if a list of files is given
         """
+        if isinstance(filename_or_caliperreader, (list, tuple)):
+            return list(
+                _thicketize_files(
+                    _read_timeseries_file,
+                    list(filename_or_caliperreader),
+                    (level,),
+                    {},
+                    workers,
+                    executor,
+                )
+            )
+
         # if we are reading a timeseries file we will expect a list back from the reader
-        ens_list = []
         gf_list = GraphFrame.from_timeseries(filename_or_caliperreader)
-        for gf in gf_list:
-            ens_list.append(Thicket.thicketize_timeseries_graphframe(gf, level))
-
-        # Perform unify ensemble
-        thicket_object = Thicket.concat_thickets(ens_list)
-        return thicket_object
+        prf = (
+            filename_or_caliperreader
+            if isinstance(filename_or_caliperreader, str)
+            else None
+        )
+        return Thicket.thicketize_timeseries_graphframes(gf_list, level, prf)
 
     @staticmethod
     def reader_dispatch(
-        func, intersection, fill_perfdata, disable_tqdm, *args, **kwargs
+        func,
+        intersection,
+        fill_perfdata,
+        disable_tqdm,
+        *args,
+        workers=None,
+        executor=None,
+        cache=None,
+        **kwargs,
     ):
         """Create a thicket from a list, directory of files, or a single file.
 
@@ -412,6 +668,14 @@ class Thicket(GraphFrame):
             intersection (bool): whether to perform intersection or union (default).
             tdmq_output (bool): whether to display tqdm progress bar
             args (list): list of args; args[0] should be an object that can be read from
+            workers (int, optional): number of processes used to read the files. Files
+                are read serially if None or 1.
+            executor (concurrent.futures.Executor, optional): executor used to read the
+                files. Takes precedence over workers. Results are collected in input
+                order, so the Thicket is the same as when reading serially.
+            cache (str or ReaderCache, optional): cache directory, or ReaderCache
+                object. Files that are unchanged since they were cached are loaded from
+                the cache instead of being parsed again.
         """
 
         ens_list = []
@@ -437,54 +701,50 @@ class Thicket(GraphFrame):
         # Parse the input object
         # if a list of files
         if isinstance(obj, (list, tuple)):
-            pbar = tqdm.tqdm(obj, disable=disable_tqdm)
-            for file in pbar:
-                pbar.set_description(pbar_desc)
-                try:
-                    gf = func(file, *extra_args, **kwargs)
-                except Exception as e:
-                    raise Exception(f"Failed to read file: {file}") from e
-                ens_list.append(Thicket.thicketize_graphframe(gf, file))
+            files = list(obj)
         # if directory of files
         elif os.path.isdir(obj):
-            pbar = tqdm.tqdm(os.listdir(obj), disable=disable_tqdm)
-            for file in pbar:
-                pbar.set_description(pbar_desc)
-                f = os.path.join(obj, file)
-                try:
-                    gf = func(f, *extra_args, **kwargs)
-                except Exception as e:
-                    raise Exception(f"Failed to read file: {f}") from e
-                ens_list.append(Thicket.thicketize_graphframe(gf, f))
+            files = [os.path.join(obj, file) for file in os.listdir(obj)]
         # if single file
         elif os.path.isfile(obj):
-            return Thicket.thicketize_graphframe(func(*args, **kwargs), args[0])
+            if cache is None:
+                return Thicket.thicketize_graphframe(func(*args, **kwargs), args[0])
+            files = [obj]
 
-        # Perform ensembling operation
+        if isinstance(cache, str):
+            cache = ReaderCache(cache)
+
+        pbar = tqdm.tqdm(
+            _thicketize_files(
+                func, files, extra_args, kwargs, workers, executor, cache
+            ),
+            total=len(files),
+            disable=disable_tqdm,
+        )
+        for tk in pbar:
+            pbar.set_description(pbar_desc)
+            ens_list.append(tk)
+
+        # Perform ensembling operation. All of the thickets are ensembled in a single
+        # pass, so the graphs are unified and the tables are concatenated, filled and
+        # sorted once.
         calltree = "union"
         if intersection:
             calltree = "intersection"
-        # Consider a binary tree with t leaves (Thickets) and 2t-1 total nodes (Full tree)
-        # This implies t-1 parents (Knuth 1997).
-        # Each non-leaf Thicket (parent) is a result of a concat_thickets, therefore
-        # we have t-1 concat_thickets operations. t == len(ens_list)
-        pbar = tqdm.tqdm(total=len(ens_list) - 1, disable=disable_tqdm)
-        # We start with t Thickets with 1 prof each until 1 Thicket with t profs.
-        # Each iteration is concatenating 2 Thickets with n, m profs into 1 Thicket
-        # with n+m profs, appending the new Thicket to the back of the ens_list.
-        while len(ens_list) > 1:
-            pbar.set_description("(2/2) Creating Thicket")
-            new_tk = Thicket.concat_thickets(
-                thickets=[ens_list.pop(0), ens_list.pop(0)],
-                axis="index",
-                calltree=calltree,
-                fill_perfdata=fill_perfdata,
-                disable_tqdm=disable_tqdm,
-            )
-            ens_list.append(new_tk)
-            pbar.update(1)
+        if len(ens_list) == 1:
+            return ens_list[0]
+        pbar = tqdm.tqdm(total=1, disable=disable_tqdm)
+        pbar.set_description("(2/2) Creating Thicket")
+        tk = Thicket.concat_thickets(
+            thickets=ens_list,
+            axis="index",
+            calltree=calltree,
+            fill_perfdata=fill_perfdata,
+            disable_tqdm=disable_tqdm,
+        )
+        pbar.update(1)
 
-        return ens_list.pop(0)
+        return tk
 
     @staticmethod
     def concat_thickets(
@@ -494,6 +754,15 @@ class Thicket(GraphFrame):
 
         The calltree can either be unioned or intersected which will affect the other structures.
 
+        When concatenating on the index, the mean, variance, std, minimum and maximum
+        computed on the thickets are merged from their running statistics (see
+        RunningStats), so appending profiles to a large thicket does not compute them
+        over all of its profiles again. The other stats operations are not kept.
+        Running statistics are computed again for a thicket whose performance data
+        table was replaced, resized or had a column assigned, but not for values
+        modified in place (e.g., with DataFrame.loc), so call
+        Thicket.running_stats.clear() after such edits.
+
         Arguments:
             thickets (list): list of thicket objects
             axis (str): axis to concatenate on -> "index" or "column"
@@ -516,14 +785,19 @@ class Thicket(GraphFrame):
             fill_perfdata=True,
             disable_tqdm=disable_tqdm,
         ):
+            # Stats operations whose output is merged from the running statistics
+            # of the thickets, instead of computed over all of the profiles
+            ops = [] if from_statsframes else _mergeable_ops(thickets)
+
             thicket_parts = Ensemble._index(
                 thickets=thickets,
                 from_statsframes=from_statsframes,
                 fill_perfdata=fill_perfdata,
                 disable_tqdm=disable_tqdm,
+                running_stats_columns=_ops_columns(ops),
             )
 
-            return Thicket(
+            ct = Thicket(
                 graph=thicket_parts[0],
                 dataframe=thicket_parts[1],
                 exc_metrics=thicket_parts[2],
@@ -533,7 +807,11 @@ class Thicket(GraphFrame):
                 profile_mapping=thicket_parts[6],
                 # Cache must be cleared since two caches cannot be merged
                 statsframe_ops_cache={},
+                running_stats=thicket_parts[7],
             )
+            _apply_ops(ct, ops)
+
+            return ct
 
         def _columns(
             thickets, headers=None, metadata_key=None, disable_tqdm=disable_tqdm
@@ -552,6 +830,10 @@ class Thicket(GraphFrame):
         if calltree not in ["union", "intersection"]:
             raise ValueError("calltree must be 'union' or 'intersection'")
 
+        # Graphs are unified on Node objects
+        nid_index = all(tk.nid_index for tk in thickets)
+        thickets = [tk.to_node_index() if tk.nid_index else tk for tk in thickets]
+
         if axis == "index":
             ct = _index(thickets, **kwargs)
         elif axis == "columns":
@@ -562,6 +844,9 @@ class Thicket(GraphFrame):
         if calltree == "intersection":
             ct = ct.intersection()
 
+        if nid_index:
+            ct._set_nid_index()
+
         return ct
 
     @staticmethod
@@ -578,50 +863,72 @@ class Thicket(GraphFrame):
 
     @staticmethod
     def from_json(json_thicket):
-        # deserialize the json
-        thicket_dict = json.loads(json_thicket)
-        hatchet_spec = {
-            "graph": thicket_dict["graph"],
-            "dataframe": thicket_dict["dataframe"],
-            "dataframe_indices": thicket_dict["dataframe_indices"],
-            "exclusive_metrics": thicket_dict["inclusive_metrics"],
-            "inclusive_metrics": thicket_dict["exclusive_metrics"],
-        }
+        """Read in a Thicket from a JSON string written by Thicket.to_json, in either
+        the "records" or the "split" layout.
 
-        gf = GraphFrame.from_json(json.dumps(hatchet_spec))
+        Arguments:
+            json_thicket (str): JSON string
 
-        th = Thicket(
-            graph=gf.graph,
-            dataframe=gf.dataframe,
-            exc_metrics=thicket_dict["exclusive_metrics"],
-            inc_metrics=thicket_dict["inclusive_metrics"],
-            profile=thicket_dict[thicket_dict["profile_idx_name"]],
-            profile_idx_name=thicket_dict["profile_idx_name"],
-            profile_mapping=thicket_dict["profile_mapping"],
-        )
+        Returns:
+            (thicket): Thicket object
+        """
+        # deserialize the json
+        thicket_dict = json.loads(json_thicket)
 
-        if "metadata" in thicket_dict:
-            mf = pd.DataFrame(thicket_dict["metadata"])
-            mf.set_index(mf[th.profile_idx_name], inplace=True)
-            if th.profile_idx_name in mf.columns:
-                mf = mf.drop(columns=[th.profile_idx_name])
-            th.metadata = mf
+        graph_spec = {}
+        for spec in thicket_dict["graph"]:
+            graph_spec.update(spec)
+        graph, nodes = helpers._graph_from_json(graph_spec)
+
+        metadata = {}
+        statsframe = None
+        if thicket_dict.get("orient") == "split":
+            dataframe = helpers._json_split_to_table(thicket_dict["dataframe"], nodes)
+            if "metadata" in thicket_dict:
+                metadata = helpers._json_split_to_table(thicket_dict["metadata"], nodes)
+            if "stats" in thicket_dict:
+                stats_df = helpers._json_split_to_table(thicket_dict["stats"], nodes)
+            profile_mapping = OrderedDict(
+                (helpers._to_tuples(k), v) for k, v in thicket_dict["profile_mapping"]
+            )
+        else:
+            dataframe = pd.DataFrame(thicket_dict["dataframe"])
+            dataframe["node"] = nodes[dataframe["node"].to_numpy(dtype=np.int64)]
+            dataframe.set_index(thicket_dict["dataframe_indices"], inplace=True)
+            if "metadata" in thicket_dict:
+                metadata = pd.DataFrame(thicket_dict["metadata"])
+                metadata.set_index(thicket_dict["profile_idx_name"], inplace=True)
+            if "stats" in thicket_dict:
+                stats_df = pd.DataFrame(thicket_dict["stats"])
+                stats_df["node"] = nodes[stats_df["node"].to_numpy(dtype=np.int64)]
+                stats_df.set_index("node", inplace=True)
+            profile_mapping = thicket_dict["profile_mapping"]
 
         # catch condition where there are no stats
         if "stats" in thicket_dict:
-            sf_spec = {
-                "graph": thicket_dict["graph"],
-                "dataframe": thicket_dict["stats"],
-                "dataframe_indices": ["node"],
-                "exclusive_metrics": [],
-                "inclusive_metrics": [],
-            }
-            th.statsframe = GraphFrame.from_json(json.dumps(sf_spec))
-            th.statsframe.graph = th.graph
+            statsframe = GraphFrame(graph=graph, dataframe=stats_df)
 
-        # make and return thicket?
-        return th
+        return Thicket(
+            graph=graph,
+            dataframe=dataframe,
+            exc_metrics=[
+                helpers._to_tuples(m) for m in thicket_dict["exclusive_metrics"]
+            ],
+            inc_metrics=[
+                helpers._to_tuples(m) for m in thicket_dict["inclusive_metrics"]
+            ],
+            default_metric=thicket_dict.get("default_metric", "time"),
+            metadata=metadata,
+            profile=[
+                helpers._to_tuples(p)
+                for p in thicket_dict[thicket_dict["profile_idx_name"]]
+            ],
+            profile_idx_name=thicket_dict["profile_idx_name"],
+            profile_mapping=profile_mapping,
+            statsframe=statsframe,
+        )
 
+    @_node_objects
     def add_ncu(
         self,
         ncu_report_mapping,
@@ -629,6 +936,9 @@ class Thicket(GraphFrame):
         overwrite=False,
         debug=False,
         disable_tqdm=False,
+        workers=None,
+        executor=None,
+        cache=None,
     ):
         """Add NCU data into the PerformanceDataFrame
 
@@ -638,21 +948,15 @@ class Thicket(GraphFrame):
             overwrite (bool): whether to overwrite existing columns in the Thicket.DataFrame
             debug (bool): whether to print debug information
             disable_tqdm (bool): whether to display tqdm progress bar
+            workers (int, optional): number of processes used to load the reports.
+                Reports are loaded serially if None or 1.
+            executor (concurrent.futures.Executor, optional): executor used to load the
+                reports. Takes precedence over workers.
+            cache (str or KernelMatchCache, optional): cache directory, or
+                KernelMatchCache object. Kernels matched to the same call tree before
+                are not matched again.
         """
 
-        def _rep_agg_func(col):
-            """Aggregate function for repition data.
-
-            Arguments:
-                col (pd.Series): column of data
-            """
-            rollup_operation = rollup_dict[col.name]
-            agg_func = ncureader.rollup_operations[rollup_operation]
-            if agg_func is not None and pd.api.types.is_numeric_dtype(col):
-                return agg_func(col)
-            else:
-                return col[0]
-
         # If list, check for duplicate metrics
         if isinstance(chosen_metrics, list):
             # Remove duplicate metrics in chosen_metrics if the user provided duplicates
@@ -674,29 +978,28 @@ class Thicket(GraphFrame):
                 f"If provided, chosen_metrics ({type(chosen_metrics)}) must be a list"
             )
 
+        if isinstance(cache, str):
+            cache = KernelMatchCache(cache)
+
         # Initialize reader
         ncureader = NCUReader()
 
-        # Dictionary of NCU data
-        data_dict, rollup_dict = ncureader._read_ncu(
+        # One row per kernel action, with only the chosen metrics
+        nodes, profiles, values, rollup_dict = ncureader._read_ncu(
             thicket=self,
             ncu_report_mapping=ncu_report_mapping,
+            chosen_metrics=chosen_metrics,
             debug=debug,
             disable_tqdm=disable_tqdm,
+            workers=workers,
+            executor=executor,
+            cache=cache,
         )
 
-        # Create empty df
-        ncu_df = pd.DataFrame()
-        # Loop to aggregate data across reps
-        for node_profile, rep_data in data_dict.items():
-            # Aggregate data using _rep_agg_func
-            agg_data = pd.DataFrame.from_records(rep_data).agg(_rep_agg_func)
-            # Add node and profile
-            agg_data["node"] = node_profile[0]
-            agg_data[self.profile_idx_name] = node_profile[1]
-            # Append to main df
-            ncu_df = pd.concat([ncu_df, pd.DataFrame([agg_data])], ignore_index=True)
-        ncu_df = ncu_df.set_index(["node", self.profile_idx_name])
+        # Aggregate data across reps
+        ncu_df = ncureader._rollup(
+            nodes, profiles, values, rollup_dict, ["node", self.profile_idx_name]
+        )
 
         # Apply chosen metrics
         if chosen_metrics:
@@ -770,6 +1073,7 @@ class Thicket(GraphFrame):
         if drop:
             self.metadata.drop(metadata_columns, axis=1, inplace=True)
 
+    @_node_objects
     def squash(self, update_inc_cols=True, new_statsframe=True):
         """Rewrite the Graph to include only nodes present in the performance
         data table's rows.
@@ -784,15 +1088,23 @@ class Thicket(GraphFrame):
         Returns:
             (thicket): a newly squashed Thicket object
         """
+        return self._squash(update_inc_cols, new_statsframe)[0]
+
+    def _squash(self, update_inc_cols=True, new_statsframe=True):
+        """Squash the Thicket, see Thicket.squash.
+
+        Returns:
+            (tuple): tuple containing:
+                (thicket): a newly squashed Thicket object
+                (dict): mapping from the id of each node of the performance data table
+                    to its node in the squashed Thicket
+        """
 
         #####
         # Hatchet's squash code
         #####
-        index_names = self.dataframe.index.names
-        self.dataframe.reset_index(inplace=True)
-
         # create new nodes for each unique node in the old dataframe
-        old_to_new = {n: n.copy() for n in set(self.dataframe["node"])}
+        old_to_new = {n: n.copy() for n in helpers._unique_nodes(self.dataframe.index)}
         for i in old_to_new:
             old_to_new[i]._hatchet_nid = i._hatchet_nid
 
@@ -844,31 +1156,42 @@ class Thicket(GraphFrame):
             graph.node_ordering = True
         graph.enumerate_traverse()
 
-        # reindex new dataframe with new nodes
-        df = self.dataframe.copy()
-        df["node"] = df["node"].apply(lambda x: old_to_new[x])
-
         # at this point, the graph is potentially invalid, as some nodes
         # may have children with identical frames.
         merges = graph.normalize()
-        df["node"] = df["node"].apply(lambda n: merges.get(n, n))
-
-        self.dataframe.set_index(index_names, inplace=True)
-        df.set_index(index_names, inplace=True)
-        # create dict that stores aggregation function for each column
-        agg_dict = {}
-        for col in df.columns.tolist():
-            if col in self.exc_metrics + self.inc_metrics:
+
+        # reindex new dataframe with new nodes. Each distinct node is mapped once and
+        # the mapping is applied to the rows through the index codes.
+        node_map = {id(old): merges.get(new, new) for old, new in old_to_new.items()}
+        df = self.dataframe.copy()
+        df.index = Ensemble._remap_nodes(df.index, node_map)
+
+        if merges:
+            # merge rows of nodes with the same callpath. Groups are numbered in
+            # order of appearance, so the first row of each group and the group sums
+            # line up.
+            first_rows = np.flatnonzero(~df.index.duplicated(keep="first"))
+            agg_df = df.take(first_rows)
+            metrics = [
+                col for col in df.columns if col in self.exc_metrics + self.inc_metrics
+            ]
+            if len(metrics) > 0:
                 # use min_count=1 (default is 0) here, so sum of an all-NA
                 # series is NaN, not 0
                 # when min_count=1, sum([NaN, NaN)] = NaN
                 # when min_count=0, sum([NaN, NaN)] = 0
-                agg_dict[col] = lambda x: x.sum(min_count=1)
-            else:
-                agg_dict[col] = lambda x: x.iloc[0]
-
-        # perform a groupby to merge nodes with the same callpath
-        agg_df = df.groupby(index_names).agg(agg_dict)
+                sums = (
+                    df[metrics]
+                    .groupby(
+                        level=list(range(df.index.nlevels)), sort=False, dropna=False
+                    )
+                    .sum(min_count=1)
+                )
+                for col in metrics:
+                    agg_df[col] = sums[col].to_numpy()
+        else:
+            # no nodes were merged, so the rows are already unique
+            agg_df = df
         agg_df.sort_index(inplace=True)
 
         #####
@@ -887,13 +1210,15 @@ class Thicket(GraphFrame):
         else:
             # Update the node objects in the old statsframe.
             sframe = self.statsframe
-            sframe.dataframe = sframe.dataframe.reset_index()
-            replace_dict = {}
-            for node in sframe.dataframe["node"]:
-                if node in old_to_new:
-                    replace_dict[node] = old_to_new[node]
-            sframe.dataframe["node"] = sframe.dataframe["node"].replace(replace_dict)
-            sframe.dataframe = sframe.dataframe.set_index("node")
+            sframe.dataframe = sframe.dataframe.copy(deep=False)
+            sframe.dataframe.index = Ensemble._remap_nodes(
+                sframe.dataframe.index,
+                {
+                    id(node): old_to_new[node]
+                    for node in helpers._unique_nodes(sframe.dataframe.index)
+                    if node in old_to_new
+                },
+            )
 
         new_tk = Thicket(
             graph,
@@ -915,7 +1240,7 @@ class Thicket(GraphFrame):
         validate_profile(new_tk)
         validate_nodes(new_tk)
 
-        return new_tk
+        return new_tk, node_map
 
     def copy(self):
         """Return a partially shallow copy of the Thicket.
@@ -948,6 +1273,7 @@ class Thicket(GraphFrame):
             statsframe_ops_cache=self.statsframe_ops_cache.copy(),
         )
 
+    @_node_objects
     def deepcopy(self):
         """Return a deep copy of the Thicket.
 
@@ -979,8 +1305,123 @@ class Thicket(GraphFrame):
                 graph=gf.graph, dataframe=self.statsframe.dataframe.copy(deep=True)
             ),
             statsframe_ops_cache=self.statsframe_ops_cache.copy(),
+            running_stats=self._copy_running_stats(gf.dataframe),
+        )
+
+    def _copy_running_stats(self, dataframe):
+        """Copy the running statistics, indexed by the nodes of a copy of the
+        performance data table with the same rows."""
+        if len(self.running_stats) == 0 or not self.running_stats.is_valid(
+            self.dataframe
+        ):
+            return RunningStats()
+        old_to_new = dict(
+            zip(
+                map(id, self.dataframe.index.get_level_values("node")),
+                dataframe.index.get_level_values("node"),
+            )
         )
+        return self.running_stats.remap(old_to_new)
+
+    def _view(self):
+        """Return a Thicket that shares the graph nodes and the performance data
+        table of self, for operations that select a subset of it.
+
+        The operations replace the performance data table of the view with the
+        selected rows, so the full table is never copied. The nodes are shared until
+        the graph is modified in place (see _own_graph). The metadata and aggregated
+        statistics tables are small and are copied.
+
+        Returns:
+            (thicket): view of self
+        """
+        view = self.copy()
+        view.graph = self._shared_graph()
+        view.statsframe.graph = view.graph
+        view.metadata = self.metadata.copy()
+        view.statsframe.dataframe = self.statsframe.dataframe.copy()
+        return view
+
+    def _shared_graph(self):
+        """Return a new Graph object over the nodes of self.graph, and mark both as
+        shared (see _own_graph)."""
+        graph = Graph(list(self.graph.roots))
+        graph.node_ordering = self.graph.node_ordering
+        self.graph._thicket_shared = graph._thicket_shared = True
+        return graph
+
+    def _own_graph(self):
+        """Copy the graph, and the tables indexed by its nodes, if its nodes are
+        shared with another Thicket, so it can be modified in place."""
+        if getattr(self.graph, "_thicket_shared", False):
+            tk = self.deepcopy()
+            self.graph = tk.graph
+            self.dataframe = tk.dataframe
+            self.statsframe = tk.statsframe
+            self.running_stats = tk.running_stats
+
+    @property
+    def node_index(self):
+        """Index of the nodes of the graph by name and call path (see NodeIndex).
+
+        Built on first use, and kept with the graph until it is modified.
+        """
+        index = getattr(self.graph, "_thicket_node_index", None)
+        if index is None:
+            index = NodeIndex(self.graph)
+            self.graph._thicket_node_index = index
+        return index
+
+    @property
+    def nid_index(self):
+        """Whether the performance data table is indexed by integer node id's."""
+        return helpers._has_nid_index(self.dataframe)
+
+    def to_nid_index(self):
+        """Return a copy of the Thicket whose performance data and aggregated
+        statistics tables are indexed by integer node id's instead of Node objects.
+
+        Grouping, sorting, filtering and joining on the "node" level then use pandas'
+        integer code paths instead of hashing and comparing Node objects. Methods that
+        need the Node objects, like squash, query and tree, switch to them for the
+        call and back, so the Thicket API works the same on both representations.
+
+        Returns:
+            (thicket): copy of self indexed by integer node id's
+        """
+        tk = self.copy()
+        tk.performance_cols = copy.copy(self.performance_cols)
+        tk._set_nid_index()
+        return tk
+
+    def to_node_index(self):
+        """Return a copy of the Thicket whose performance data and aggregated
+        statistics tables are indexed by Node objects. Inverse of to_nid_index.
+
+        Returns:
+            (thicket): copy of self indexed by Node objects
+        """
+        tk = self.copy()
+        tk.performance_cols = copy.copy(self.performance_cols)
+        tk._set_node_index()
+        return tk
 
+    def _set_nid_index(self):
+        """Replace the Node objects in the node index levels with their nid's,
+        in place."""
+        for df in [self.dataframe, self.statsframe.dataframe]:
+            if "node" in df.index.names and not helpers._has_nid_index(df):
+                df.index = helpers._nodes_to_nids(df.index)
+
+    def _set_node_index(self):
+        """Replace the nid's in the node index levels with the Node objects of the
+        graph, in place."""
+        nodes = helpers._node_table(self.graph)
+        for df in [self.dataframe, self.statsframe.dataframe]:
+            if helpers._has_nid_index(df):
+                df.index = helpers._nids_to_nodes(df.index, nodes)
+
+    @_node_objects
     def tree(
         self,
         metric_column=None,
@@ -1227,8 +1668,44 @@ class Thicket(GraphFrame):
             tk_copy_list, from_statsframes=True, disable_tqdm=disable_tqdm
         )
 
-    def to_json(self, ensemble=True, metadata=True, stats=True):
-        jsonified_thicket = {}
+    @_node_objects
+    def to_json(
+        self, ensemble=True, metadata=True, stats=True, orient="records", file=None
+    ):
+        """Serialize a Thicket to JSON.
+
+        Arguments:
+            ensemble (bool): whether to write the performance data table
+            metadata (bool): whether to write the metadata table
+            stats (bool): whether to write the aggregated statistics table
+            orient (str): layout of the tables. "records" writes one object per row.
+                "split" writes the index levels and columns as arrays, which is much
+                more compact and faster for large Thickets.
+            file (str or file, optional): path or file object to stream the JSON to,
+                instead of building the whole string in memory
+
+        Returns:
+            (str): JSON string, or None if file is given
+        """
+        if orient not in ["records", "split"]:
+            raise ValueError("orient must be either 'records' or 'split'.")
+
+        chunks = self._json_chunks(ensemble, metadata, stats, orient)
+        if file is None:
+            return "".join(chunks)
+        if isinstance(file, str):
+            with open(file, "w") as f:
+                f.writelines(chunks)
+        else:
+            file.writelines(chunks)
+
+    def _json_chunks(self, ensemble, metadata, stats, orient):
+        """Generate the fragments of the JSON document written by Thicket.to_json."""
+
+        def _table_chunks(df):
+            if orient == "split":
+                return helpers._table_to_json_split(df)
+            return helpers._table_to_json_records(df)
 
         # jsonify graph
         """
@@ -1243,79 +1720,109 @@ class Thicket(GraphFrame):
                 "parents": [c._hatchet_nid for c in n.parents],
             }
 
-        jsonified_thicket["graph"] = [formatted_graph_dict]
+        yield '{"graph": ' + json.dumps([formatted_graph_dict])
+        if orient == "split":
+            yield ', "orient": "split"'
 
         if ensemble:
-            jsonified_thicket["dataframe_indices"] = list(self.dataframe.index.names)
-            ef = self.dataframe.reset_index()
-            ef["node"] = ef["node"].apply(lambda n: n._hatchet_nid)
-            jsonified_thicket["dataframe"] = ef.replace({np.nan: None}).to_dict(
-                "records"
-            )
+            if orient == "records":
+                yield ', "dataframe_indices": ' + json.dumps(
+                    list(self.dataframe.index.names)
+                )
+            yield ', "dataframe": '
+            yield from _table_chunks(self.dataframe)
         if metadata:
-            jsonified_thicket["metadata"] = (
-                self.metadata.reset_index().replace({np.nan: None}).to_dict("records")
-            )
+            yield ', "metadata": '
+            yield from _table_chunks(self.metadata)
         if stats:
-            sf = self.statsframe.dataframe.copy(deep=True)
-            sf.index = sf.index.map(lambda n: n._hatchet_nid)
-            jsonified_thicket["stats"] = (
-                sf.replace({np.nan: None}).reset_index().to_dict("records")
-            )
+            yield ', "stats": '
+            yield from _table_chunks(self.statsframe.dataframe)
 
+        jsonified_thicket = {}
         jsonified_thicket["inclusive_metrics"] = self.inc_metrics
         jsonified_thicket["exclusive_metrics"] = self.exc_metrics
         jsonified_thicket[self.profile_idx_name] = self.profile
         jsonified_thicket["profile_idx_name"] = self.profile_idx_name
-        jsonified_thicket["profile_mapping"] = self.profile_mapping
+        if orient == "split":
+            # Stored as pairs since profiles are not necessarily strings
+            jsonified_thicket["profile_mapping"] = list(self.profile_mapping.items())
+            jsonified_thicket["default_metric"] = self.default_metric
+        else:
+            jsonified_thicket["profile_mapping"] = self.profile_mapping
 
-        return json.dumps(jsonified_thicket)
+        yield ", " + json.dumps(jsonified_thicket)[1:]
 
+    @_node_objects
     def intersection(self):
         """Perform an intersection operation on a thicket.
 
-        Nodes not contained in all profiles are removed.
+        Nodes not contained in all profiles are removed. Which nodes to keep is
+        computed with one grouped reduction over the rows of the performance data
+        table, and the graph is squashed once.
 
         Returns:
             (thicket): intersected thicket
         """
+        index = self.dataframe.index
+        node_level = index.names.index("node")
+        node_codes = index.codes[node_level]
+        num_nodes = len(index.levels[node_level])
 
-        # if concat_thickets(axis="columns")
+        # if concat_thickets(axis="columns"), the rows of a node must have values for
+        # every header
         if isinstance(self.dataframe.columns, pd.MultiIndex):
-            rows = []
-            nodes = self.dataframe.index.get_level_values("node").unique()
-            extend_len = len(self.dataframe) // len(nodes)
-            for node in nodes:
-                df = self.dataframe.loc[node]
-                keep = all(
-                    [
-                        df[header]
-                        .notna()  # We are checking for NA
-                        .all()  # For all values in a row
-                        .all()  # For all rows in the slice
-                        for header in self.dataframe.columns.get_level_values(0)
-                    ]  # For each column header df[header] == slice
-                )
-                rows.extend([keep] * extend_len)  # Extend by extend_len for MultiIndex
-            tkc = self.deepcopy()
-            tkc.dataframe = tkc.dataframe[rows]
-            tkc = tkc.squash()
-            return tkc
+            row_present = self.dataframe.notna().all(axis=1).to_numpy()
+        # Check for padded perfdata. Rows that didn't exist contain "None" in the name
+        # column.
+        elif self.dataframe["name"].isnull().any():
+            row_present = self.dataframe["name"].notna().to_numpy()
         else:
-            # Check for padded perfdata
-            if self.dataframe["name"].isnull().any():
-                # Row that didn't exist will contain "None" in the name column.
-                query = Query().match(
-                    ".", lambda df: df["name"].apply(lambda n: n is not None).all()
-                )
-            else:
-                # If perfdata not padded
-                query = Query().match(".", lambda df: len(df) == len(self.profile))
+            row_present = None
+
+        if row_present is not None:
+            # Nodes without any missing rows
+            num_missing = np.bincount(
+                node_codes, weights=~row_present, minlength=num_nodes
+            )
+            keep_node = num_missing == 0
+        else:
+            # If perfdata not padded, nodes with a row for each profile
+            num_rows = np.bincount(node_codes, minlength=num_nodes)
+            keep_node = num_rows == len(self.profile)
 
-        intersected_th = self.query(query)
+        keep_rows = keep_node[node_codes]
+        if not keep_rows.any():
+            raise EmptyQuery("The intersection would have produced an empty Thicket.")
 
-        return intersected_th
+        intersected_th = self._view()
+        intersected_th.dataframe = self.dataframe[keep_rows]
 
+        return intersected_th.squash()
+
+    def presence_mask(self):
+        """Get which profiles hold data for each node.
+
+        Thickets created with fill_perfdata=False store only the rows that hold data,
+        and the missing (node, profile) rows are virtual. This mask describes them
+        without materializing the full (node, profile) product.
+
+        Returns:
+            (DataFrame): boolean table indexed by node with one column per profile
+        """
+        return _presence_mask(self.dataframe)
+
+    def to_dense(self):
+        """Return a copy of the Thicket with the missing (node, profile) rows of the
+        performance data table filled with NaN's, like fill_perfdata=True.
+
+        Returns:
+            (thicket): filled Thicket
+        """
+        tk = self.copy()
+        tk.dataframe = _fill_perfdata(self.dataframe)
+        return tk
+
+    @_node_objects
     def filter_metadata(self, select_function):
         """Filter thicket object based on a metadata key.
 
@@ -1346,8 +1853,8 @@ class Thicket(GraphFrame):
         # Get index name
         index_name = self.metadata.index.name
 
-        # create a deepcopy of the thicket object
-        new_thicket = self.deepcopy()
+        # create a view of the thicket object
+        new_thicket = self._view()
 
         # filter metadata table
         filtered_rows = new_thicket.metadata.apply(select_function, axis=1)
@@ -1380,6 +1887,7 @@ class Thicket(GraphFrame):
 
         return new_thicket
 
+    @_node_objects
     def filter_profile(self, profile_list):
         """Filter thicket object based on a list of profiles.
 
@@ -1389,7 +1897,7 @@ class Thicket(GraphFrame):
         Returns:
             (thicket): new thicket object with selected profiles
         """
-        new_thicket = self.deepcopy()
+        new_thicket = self._view()
 
         new_thicket._sync_profile_components(profile_list)
         validate_profile(new_thicket)
@@ -1410,25 +1918,30 @@ class Thicket(GraphFrame):
             "Invalid function: thicket.filter(), please use thicket.filter_metadata() or thicket.filter_stats()"
         )
 
-    def query(
-        self, query_obj, squash=True, update_inc_cols=True, multi_index_mode="off"
-    ):
-        """Apply a Hatchet query to the Thicket object.
+    def _query_matches(self, query_obj, graph, dataframe, multi_index_mode, target):
+        """Apply a query to a graph and table of the Thicket, using the query cache for
+        string and object dialect queries.
 
         Arguments:
-            query_obj (AbstractQuery, Query, or CompoundQuery): the query, represented as by Query, CompoundQuery, or (for legacy support)
-                a subclass of Hatchet's AbstractQuery
-            squash (bool): if true, run Thicket.squash before returning the result of
-                the query
-            update_inc_cols (boolean, optional): if True, update inclusive columns when
-                performing squash.
+            query_obj (AbstractQuery, Query, CompoundQuery, str, or list): the query
+            graph (hatchet.Graph): graph to apply the query to
+            dataframe (DataFrame): table to apply the query to
+            multi_index_mode (str): multi_index_mode of string and object dialect
+                queries
+            target (str): name of the table, part of the cache key
 
         Returns:
-            (thicket): a new Thicket object containing the data that matches the query
+            (list): matched nodes
         """
+        fingerprint = QueryCache.fingerprint(query_obj, multi_index_mode, target)
+        if fingerprint is not None:
+            query_matches = self.query_cache.get(fingerprint, graph, dataframe)
+            if query_matches is not None:
+                return query_matches
+
         local_query_obj = query_obj
         if isinstance(query_obj, list):
-            local_query_obj = ObjectQuery(query_obj, multi_index_mode=multi_index_mode)
+            local_query_obj = object_query(query_obj, multi_index_mode=multi_index_mode)
         elif isinstance(query_obj, str):
             local_query_obj = parse_string_dialect(
                 query_obj, multi_index_mode=multi_index_mode
@@ -1439,27 +1952,57 @@ class Thicket(GraphFrame):
                     type(query_obj)
                 )
             )
-        dframe_copy = self.dataframe.copy()
-        index_names = self.dataframe.index.names
-        dframe_copy.reset_index(inplace=True)
         query = (
             local_query_obj
             if not is_old_style_query(query_obj)
             else local_query_obj._get_new_query()
         )
-        query_matches = self.query_engine.apply(query, self.graph, self.dataframe)
-        filtered_df = dframe_copy.loc[dframe_copy["node"].isin(query_matches)]
+        query_matches = self.query_engine.apply(query, graph, dataframe)
+
+        if fingerprint is not None:
+            self.query_cache.put(fingerprint, graph, dataframe, query_matches)
+        return query_matches
+
+    @_node_objects
+    def query(
+        self, query_obj, squash=True, update_inc_cols=True, multi_index_mode="off"
+    ):
+        """Apply a Hatchet query to the Thicket object.
+
+        Arguments:
+            query_obj (AbstractQuery, Query, or CompoundQuery): the query, represented as by Query, CompoundQuery, or (for legacy support)
+                a subclass of Hatchet's AbstractQuery
+            squash (bool): if true, run Thicket.squash before returning the result of
+                the query
+            update_inc_cols (boolean, optional): if True, update inclusive columns when
+                performing squash.
+
+        If the query cache is enabled (e.g., Thicket.query_cache =
+        QueryCache(max_size=128)), the nodes matched by string and object dialect
+        queries are kept in it, so repeated queries are not evaluated again. If the
+        performance data table is then modified in place, call
+        Thicket.query_cache.bump().
+
+        Returns:
+            (thicket): a new Thicket object containing the data that matches the query
+        """
+        query_matches = self._query_matches(
+            query_obj, self.graph, self.dataframe, multi_index_mode, "dataframe"
+        )
+        filtered_df = self.dataframe[
+            self.dataframe.index.get_level_values("node").isin(query_matches)
+        ]
         if filtered_df.shape[0] == 0:
             raise EmptyQuery("The provided query would have produced an empty Thicket.")
-        filtered_df.set_index(index_names, inplace=True)
 
-        filtered_th = self.deepcopy()
+        filtered_th = self._view()
         filtered_th.dataframe = filtered_df
 
         if squash:
             return filtered_th.squash(update_inc_cols=update_inc_cols)
         return filtered_th
 
+    @_node_objects
     def query_stats(self, query_obj, squash=True, update_inc_cols=True):
         """Apply a Hatchet query to the Thicket object.
 
@@ -1474,29 +2017,17 @@ class Thicket(GraphFrame):
         Returns:
             (thicket): a new Thicket object containing the data that matches the query
         """
-        local_query_obj = query_obj
-        if isinstance(query_obj, list):
-            local_query_obj = ObjectQuery(query_obj, multi_index_mode="off")
-        elif isinstance(query_obj, str):
-            local_query_obj = parse_string_dialect(query_obj, multi_index_mode="off")
-        elif not is_hatchet_query(query_obj):
-            raise TypeError(
-                "Encountered unrecognized query type (expected Query, CompoundQuery, or AbstractQuery, got {})".format(
-                    type(query_obj)
-                )
-            )
+        query_matches = self._query_matches(
+            query_obj,
+            self.statsframe.graph,
+            self.statsframe.dataframe,
+            "off",
+            "statsframe",
+        )
         sframe_copy = self.statsframe.dataframe.copy()
         sf_index_names = self.statsframe.dataframe.index.names
         sframe_copy.reset_index(inplace=True)
 
-        query = (
-            local_query_obj
-            if not is_old_style_query(query_obj)
-            else local_query_obj._get_new_query()
-        )
-        query_matches = self.query_engine.apply(
-            query, self.statsframe.graph, self.statsframe.dataframe
-        )
         filtered_sf_df = sframe_copy.loc[sframe_copy["node"].isin(query_matches)]
 
         if filtered_sf_df.shape[0] == 0:
@@ -1524,35 +2055,177 @@ class Thicket(GraphFrame):
         )
 
         if squash:
-            filtered_th = filtered_th.squash(
+            filtered_th, node_map = filtered_th._squash(
                 update_inc_cols=update_inc_cols, new_statsframe=True
             )
             filtered_th.statsframe.graph = filtered_th.graph
 
-            filtered_th.reapply_stats_operations()
+            # Statistics of the nodes whose rows are unchanged by the squash are kept
+            old_dataframe = filtered_df.copy(deep=False)
+            old_dataframe.index = Ensemble._remap_nodes(old_dataframe.index, node_map)
+            old_stats_df = filtered_sf_df.copy(deep=False)
+            old_stats_df.index = pd.Index(
+                [node_map[id(n)] for n in old_stats_df.index], name="node"
+            )
+            filtered_th.reapply_stats_operations(
+                old_dataframe,
+                GraphFrame(
+                    graph=filtered_th.graph,
+                    dataframe=old_stats_df,
+                    exc_metrics=self.statsframe.exc_metrics,
+                    inc_metrics=self.statsframe.inc_metrics,
+                ),
+            )
 
         return filtered_th
 
-    def reapply_stats_operations(self):
-        """Reapply most recent stats operations."""
+    @_node_objects
+    def reapply_stats_operations(self, old_dataframe=None, old_statsframe=None):
+        """Reapply most recent stats operations.
+
+        Each operation in the statsframe_ops_cache is applied once, after the
+        operations whose output columns it reads, and the operations it calls, like
+        the mean and std called by preference, are not applied again.
+
+        If the performance data table and aggregated statistics from before a change
+        are given, indexed by the current node objects, the output columns of an
+        operation are only recomputed for the nodes whose rows changed in the columns
+        the operation reads, and are taken from old_statsframe for the other nodes.
+        Operations that are not computed node by node are recomputed for all the nodes
+        if any node changed.
 
-        for stats_func, arg_dict in self.statsframe_ops_cache.items():
-            # This makes sure the data is comparable
-            sortkey = lambda x: (  # noqa: E731
-                x[0],
-                tuple(sorted(x[1].items(), key=lambda y: y[0])),
+        Arguments:
+            old_dataframe (DataFrame, optional): performance data table before the
+                change
+            old_statsframe (GraphFrame, optional): aggregated statistics before the
+                change
+        """
+        incremental = old_dataframe is not None and old_statsframe is not None
+        if incremental:
+            old_stats_df = old_statsframe.dataframe
+            old_stats_df = old_stats_df[~old_stats_df.index.duplicated()]
+            same_nodes = set(map(id, old_stats_df.index)) == set(
+                map(id, self.statsframe.dataframe.index)
             )
-            for k, g in itertools.groupby(
-                list(sorted(arg_dict.values(), key=sortkey)), key=sortkey
+        # Nodes recomputed by the operations applied so far, by output column
+        recomputed = {}
+
+        with stats_utils._reapply_session(self) as reapplied:
+            for func, op, output_columns in stats_utils._ordered_ops(
+                self.statsframe_ops_cache
             ):
-                arg = list(g)[0]
-                stats_func(self, *arg[0], **arg[1])
+                key = stats_utils._op_key(func, op.args, op.kwargs)
+                if key in reapplied:
+                    continue
+
+                if incremental and all(c in old_stats_df for c in output_columns):
+                    changed = helpers._changed_nodes(
+                        old_dataframe,
+                        self.dataframe,
+                        stats_utils._op_columns(func, op.args, op.kwargs),
+                    )
+                    for column in op.reads:
+                        changed.update(recomputed.get(column, {}))
+                    if (
+                        len(changed) == 0
+                        and (func._nodewise or same_nodes)
+                        and all(c in old_stats_df for c in op.writes)
+                    ):
+                        self._copy_stats_columns(
+                            output_columns + list(op.writes), old_statsframe
+                        )
+                        reapplied[key] = output_columns
+                        continue
+                    if (
+                        func._nodewise
+                        and len(op.writes) == 0
+                        and len(changed) < len(self.statsframe.dataframe)
+                    ):
+                        self._apply_stats_op_to_nodes(
+                            func, op, output_columns, old_statsframe, changed
+                        )
+                        reapplied[key] = output_columns
+                        for column in output_columns:
+                            recomputed[column] = changed
+                        continue
+
+                output_columns = func(self, *op.args, **op.kwargs)
+                reapplied[key] = list(output_columns)
+                for column in output_columns:
+                    recomputed[column] = {
+                        id(n): n for n in self.statsframe.dataframe.index
+                    }
 
-            validate_nodes(self)
+        if incremental and isinstance(self.statsframe.dataframe.columns, pd.MultiIndex):
+            # sort columns in index, like the stats operations
+            self.statsframe.dataframe = self.statsframe.dataframe.sort_index(axis=1)
+
+        validate_nodes(self)
+
+    def _copy_stats_columns(self, columns, old_statsframe, nodes=None):
+        """Copy columns of old_statsframe, indexed by the current node objects, into
+        the aggregated statistics table, except for the rows of nodes, which are left
+        empty."""
+        stats_df = self.statsframe.dataframe
+        old_stats_df = old_statsframe.dataframe
+        old_stats_df = old_stats_df[~old_stats_df.index.duplicated()]
+        if nodes is not None:
+            old_stats_df = old_stats_df[
+                [id(n) not in nodes for n in old_stats_df.index]
+            ]
+        for column in columns:
+            stats_df[column] = old_stats_df[column].reindex(stats_df.index)
+            if column in old_statsframe.exc_metrics:
+                if column not in self.statsframe.exc_metrics:
+                    self.statsframe.exc_metrics.append(column)
+            elif column in old_statsframe.inc_metrics:
+                if column not in self.statsframe.inc_metrics:
+                    self.statsframe.inc_metrics.append(column)
+
+    def _apply_stats_op_to_nodes(self, func, op, output_columns, old_statsframe, nodes):
+        """Recompute the output columns of a nodewise stats operation for nodes, and
+        copy the other rows from old_statsframe."""
+        self._copy_stats_columns(output_columns, old_statsframe, nodes)
+
+        node_level = self.dataframe.index.get_level_values("node")
+        sub_df = self.dataframe[[id(n) in nodes for n in node_level]]
+        sub_tk = Thicket(
+            graph=self.graph,
+            dataframe=sub_df,
+            exc_metrics=self.exc_metrics,
+            inc_metrics=self.inc_metrics,
+            metadata=self.metadata,
+            profile=self.profile,
+            profile_mapping=self.profile_mapping,
+            statsframe=GraphFrame(
+                graph=self.graph,
+                dataframe=helpers._new_statsframe_df(
+                    sub_df,
+                    multiindex=isinstance(
+                        self.statsframe.dataframe.columns, pd.MultiIndex
+                    ),
+                ).sort_index(),
+            ),
+        )
+        func(sub_tk, *op.args, **op.kwargs)
+
+        stats_df = self.statsframe.dataframe
+        sub_stats_df = sub_tk.statsframe.dataframe
+        for column in output_columns:
+            stats_df[column] = stats_df[column].where(
+                ~stats_df.index.isin(sub_stats_df.index),
+                sub_stats_df[column].reindex(stats_df.index),
+            )
 
+    @_node_objects
     def groupby(self, by):
         """Create sub-thickets based on unique values in metadata column(s).
 
+        The group of every row of the performance data table is computed once from
+        the group of its profile, and each sub-thicket takes its rows in one pass.
+        Sub-thickets share the graph nodes of self, and only the sub-thickets
+        missing some of the nodes are squashed.
+
         Arguments:
             by (mapping, function, label, pd.Grouper or list of such): Used to determine the groups for the groupby. See pandas.DataFrame.groupby() for more details.
 
@@ -1565,40 +2238,78 @@ class Thicket(GraphFrame):
             )
 
         # group metadata table by unique values in a column
-        sub_metadataframes = self.metadata.groupby(by, dropna=False)
+        groups = list(self.metadata.groupby(by, dropna=False))
+
+        # group code of each profile
+        profile_groups = pd.Series(
+            np.repeat(np.arange(len(groups)), [len(df) for _, df in groups]),
+            index=pd.Index(
+                [prof for _, df in groups for prof in df.index],
+                name=self.metadata.index.name,
+            ),
+        )
+
+        # group code of each row of the performance data table
+        index = self.dataframe.index
+        prof_level = index.names.index(self.profile_idx_name)
+        level_groups = profile_groups.reindex(index.levels[prof_level])
+        level_groups = level_groups.fillna(-1).to_numpy(dtype=np.int64)
+        row_groups = level_groups[index.codes[prof_level]]
+
+        # rows of each group, in their original order
+        order = np.argsort(row_groups, kind="stable")
+        bounds = np.searchsorted(row_groups[order], np.arange(len(groups) + 1))
+
+        # number of nodes with rows in each group
+        node_level = index.names.index("node")
+        num_levels = len(index.levels[node_level])
+        in_group = row_groups >= 0
+        group_nodes = np.unique(
+            row_groups[in_group] * num_levels + index.codes[node_level][in_group]
+        )
+        num_nodes = np.bincount(group_nodes // num_levels, minlength=len(groups))
+
+        # Profiles of columnar-joined thickets are synced from the metadata table
+        columnar = isinstance(self.dataframe.columns, pd.MultiIndex)
 
         # dictionary of sub_thickets
         sub_thickets = {}
 
         # for all unique groups of metadata table
-        for key, df in sub_metadataframes:
-            # create a thicket copy
-            sub_thicket = self.deepcopy()
-
-            # return unique group as the metadata table
-            sub_thicket.metadata = df
-
-            # find profiles in current unique group and filter performance data
-            # table
-            profile_id = df.index.values.tolist()
-            sub_thicket.dataframe = sub_thicket.dataframe[
-                sub_thicket.dataframe.index.get_level_values(
-                    self.profile_idx_name
-                ).isin(profile_id)
-            ]
-
-            # clear the aggregated statistics table for current unique group
-            sub_thicket.statsframe.dataframe = helpers._new_statsframe_df(
-                sub_thicket.dataframe
+        for i, (key, df) in enumerate(groups):
+            # find profiles in current unique group and take their rows of the
+            # performance data table
+            sub_df = self.dataframe.take(order[bounds[i] : bounds[i + 1]])
+            graph = self._shared_graph()
+
+            # return unique group as the metadata table, with an empty aggregated
+            # statistics table for the group
+            sub_thicket = Thicket(
+                graph=graph,
+                dataframe=sub_df,
+                exc_metrics=copy.copy(self.exc_metrics),
+                inc_metrics=copy.copy(self.inc_metrics),
+                default_metric=self.default_metric,
+                metadata=df,
+                profile=copy.copy(self.profile) if columnar else list(set(df.index)),
+                profile_mapping=OrderedDict(
+                    (prof, file)
+                    for prof, file in self.profile_mapping.items()
+                    if columnar or prof in df.index
+                ),
+                statsframe=GraphFrame(
+                    graph=graph, dataframe=helpers._new_statsframe_df(sub_df)
+                ),
+                statsframe_ops_cache=self.statsframe_ops_cache.copy(),
             )
 
             # If fill_perfdata is False, may need to squash
-            if len(sub_thicket.graph) != len(
-                sub_thicket.dataframe.index.get_level_values("node").unique()
-            ):
+            squash = num_nodes[i] != len(self.graph)
+            if squash:
                 sub_thicket = sub_thicket.squash()
+            if squash or columnar:
+                sub_thicket._sync_profile_components(sub_thicket.metadata)
 
-            sub_thicket._sync_profile_components(sub_thicket.metadata)
             validate_profile(sub_thicket)
 
             # add thicket to dictionary
@@ -1618,8 +2329,8 @@ class Thicket(GraphFrame):
         Returns:
             (thicket): new thicket object with applied filter function
         """
-        # deepcopy thicket
-        new_thicket = self.deepcopy()
+        # create a view of the thicket
+        new_thicket = self._view()
 
         # filter aggregated statistics table
         filtered_rows = new_thicket.statsframe.dataframe.apply(filter_function, axis=1)
@@ -1708,6 +2419,7 @@ class Thicket(GraphFrame):
 
         return sorted_meta
 
+    @_node_objects
     def add_root_node(self, attrs):
         """Add node at root level with given attributes.
 
@@ -1718,6 +2430,9 @@ class Thicket(GraphFrame):
 
         new_node = Node(frame_obj=Frame(attrs=attrs))
 
+        # Copy the graph if it is shared with a view
+        self._own_graph()
+
         # graph and statsframe.graph
         self.graph.roots.append(new_node)
 
@@ -1725,6 +2440,7 @@ class Thicket(GraphFrame):
         self.graph.enumerate_traverse()
 
         # dataframe
+        old_dataframe = self.dataframe
         idx_levels = self.dataframe.index.names
         new_idx = [[new_node]] + [self.profile]
         new_node_df = pd.DataFrame(
@@ -1734,13 +2450,31 @@ class Thicket(GraphFrame):
         self.dataframe = pd.concat([self.dataframe, new_node_df])
 
         # statsframe.dataframe
+        old_statsframe = GraphFrame(
+            graph=self.graph,
+            dataframe=self.statsframe.dataframe,
+            exc_metrics=self.statsframe.exc_metrics.copy(),
+            inc_metrics=self.statsframe.inc_metrics.copy(),
+        )
         self.statsframe.dataframe = helpers._new_statsframe_df(self.dataframe)
-        # Reapply stats operations after clearing statsframe dataframe
-        self.reapply_stats_operations()
+        # Reapply stats operations after clearing statsframe dataframe. Only the new
+        # node has new rows.
+        self.reapply_stats_operations(old_dataframe, old_statsframe)
+
+        self.query_cache.bump()
+        self.graph._thicket_node_index = None
 
         # Check Thicket state
         validate_nodes(self)
 
+    @_node_objects
+    def update_inclusive_columns(self):
+        """Update the inclusive columns of the performance data table in place. See
+        GraphFrame.update_inclusive_columns()."""
+        super().update_inclusive_columns()
+        self.query_cache.bump()
+        self.running_stats.clear()
+
     def get_node(self, name, which="first"):
         """Get a node object in the Thicket by its Node.frame['name']. If more than one
         node has the same name, use the 'which' argument to specify which node to return.
@@ -1754,7 +2488,7 @@ class Thicket(GraphFrame):
             (Node or list(Node)): Node object with the given name or list of Node objects
             with the given name.
         """
-        nodes = [n for n in self.graph.traverse() if n.frame["name"] == name]
+        nodes = self.node_index.by_name(name)
 
         if len(nodes) == 0:
             raise KeyError(f'Node with name "{name}" not found.')
@@ -1843,6 +2577,98 @@ class Thicket(GraphFrame):
             )
 
 
+def _thicketize_file(func, file, extra_args, kwargs):
+    """Read a single file with a hatchet reader and convert it to a Thicket.
+
+    Defined at module level so it can be pickled and sent to worker processes.
+    """
+    obj = func(file, *extra_args, **kwargs)
+    if isinstance(obj, Thicket):
+        return obj
+    return Thicket.thicketize_graphframe(obj, file)
+
+
+def _read_timeseries_file(file, level):
+    """Read a single timeseries file into a Thicket. Defined at module level so it can
+    be pickled and sent to worker processes."""
+    return Thicket.from_timeseries(file, level)
+
+
+def _thicketize_files(
+    func, files, extra_args, kwargs, workers=None, executor=None, cache=None
+):
+    """Generator reading a list of files into Thickets, yielded in the order of files.
+
+    Arguments:
+        func (function): reader function to be used
+        files (list): list of files to read
+        extra_args (tuple): extra positional arguments to func
+        kwargs (dict): keyword arguments to func
+        workers (int, optional): number of processes to read the files with
+        executor (concurrent.futures.Executor, optional): executor to read the files
+            with. Takes precedence over workers
+        cache (ReaderCache, optional): cache to load unchanged files from and store
+            newly read files in
+
+    Returns:
+        (generator): Thicket objects, one per file
+    """
+    keys = None
+    if cache is not None:
+        keys = [ReaderCache.key(func, file, extra_args, kwargs) for file in files]
+    # Reads with arguments that can not be cached are not cached
+    if keys is not None and None not in keys:
+        # Only the files missing from the cache are parsed
+        missing = {key: file for file, key in zip(files, keys) if key not in cache}
+        read = _thicketize_files(
+            func, list(missing.values()), extra_args, kwargs, workers, executor
+        )
+        try:
+            for file, key in zip(files, keys):
+                if key in missing and key not in cache:
+                    tk = next(read)
+                    cache.store(key, tk, file)
+                else:
+                    tk = cache.load(key)
+                    if tk is None:
+                        # Unreadable entry, which was removed
+                        tk = _thicketize_file(func, file, extra_args, kwargs)
+                        cache.store(key, tk, file)
+                yield tk
+        finally:
+            read.close()
+            cache.evict()
+        return
+
+    if executor is None and (workers is None or workers <= 1):
+        for file in files:
+            try:
+                yield _thicketize_file(func, file, extra_args, kwargs)
+            except Exception as e:
+                raise Exception(f"Failed to read file: {file}") from e
+        return
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    futures = [
+        executor.submit(_thicketize_file, func, file, extra_args, kwargs)
+        for file in files
+    ]
+    try:
+        # Collect in submission order so the result is deterministic
+        for file, future in zip(files, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                raise Exception(f"Failed to read file: {file}") from e
+    finally:
+        for future in futures:
+            future.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
 class InvalidFilter(Exception):
     """Raised when an invalid argument is passed to the filter function."""
 
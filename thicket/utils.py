@@ -3,7 +3,7 @@
 #
 # SPDX-License-Identifier: MIT
 
-from collections import Counter, OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict
 import warnings
 
 import numpy as np
@@ -70,14 +70,13 @@ def validate_dataframe(df):
 
     def _check_duplicate_inner_idx(df):
         """Check for duplicate values in the innermost indices."""
-        for node in set(df.index.get_level_values("node")):
-            inner_idx_values = sorted(df.loc[node].index.tolist())
-            counts = Counter(inner_idx_values)
-            duplicates = [item for item, count in counts.items() if count > 1]
-            if len(duplicates) > 0:
-                raise DuplicateIndexError(
-                    f"Duplicate indices found in DataFrame index.\n\t{duplicates}"
-                )
+        duplicated = df.index.duplicated()
+        if duplicated.any():
+            inner_idx = df.index.droplevel("node")
+            duplicates = list(OrderedDict.fromkeys(inner_idx[duplicated].tolist()))
+            raise DuplicateIndexError(
+                f"Duplicate indices found in DataFrame index.\n\t{duplicates}"
+            )
 
     def _check_missing_hnid(df):
         """Check if there are missing hatchet nid's."""
@@ -92,14 +91,19 @@ def validate_dataframe(df):
 
     def _validate_name_column(df):
         """Check if all of the values in a node's name column are either its name or None."""
-        for node in set(df.index.get_level_values("node")):
-            names = set(df.loc[node]["name"].tolist())
-            node_name = node.frame["name"]
-            for name in names:
-                if name != node_name and name is not None:
-                    raise InvalidNameError(
-                        f"Value in the Thicket.dataframe's 'name' column is not valid. {name} != {node_name}"
-                    )
+        # Compare against each node's name through the index codes, so the node
+        # objects are only visited once.
+        node_level = df.index.names.index("node")
+        node_names = np.array(
+            [node.frame["name"] for node in df.index.levels[node_level]], dtype=object
+        )[df.index.codes[node_level]]
+        names = df["name"].to_numpy(dtype=object)
+        invalid = (names != node_names) & pd.notna(names)
+        if invalid.any():
+            i = np.flatnonzero(invalid)[0]
+            raise InvalidNameError(
+                f"Value in the Thicket.dataframe's 'name' column is not valid. {names[i]} != {node_names[i]}"
+            )
 
     _check_duplicate_inner_idx(df)
     _check_missing_hnid(df)
@@ -123,7 +127,7 @@ def validate_profile(tk):
         return True
 
     def _validate_all_same(tk):
-        df_profs = set(tk.dataframe.index.droplevel(level="node"))
+        df_profs = set(tk.dataframe.index.droplevel(level="node").unique())
         meta_profs = set(tk.metadata.index)
         profs = set(tk.profile)
         pm_profs = set(tk.profile_mapping.keys())
@@ -270,13 +274,14 @@ def _fill_perfdata(df):
     Returns:
         (DataFrame): filled DataFrame
     """
-    new_df = df.copy(deep=True)
+    new_df = df
     try:
         # Value used to fill new rows
         fill_value = np.nan
-        # Fill missing rows in dataframe with NaN's
-        new_df = new_df.reindex(
-            pd.MultiIndex.from_product(new_df.index.levels),
+        # Fill missing rows in dataframe with NaN's. reindex returns a new DataFrame,
+        # so df does not need to be copied first.
+        new_df = df.reindex(
+            pd.MultiIndex.from_product(df.index.levels),
             fill_value=fill_value,
         )
         # Replace "NaN" with "None" in columns of string type
@@ -290,7 +295,35 @@ def _fill_perfdata(df):
                 "Non-unique multi-index for DataFrame in _fill_perfdata. Cannot Fill missing rows.",
                 RuntimeWarning,
             )
+            new_df = df.copy()
         else:
             raise
 
     return new_df
+
+
+def _presence_mask(df):
+    """Compute which (node, profile) rows of a performance data table hold data.
+
+    Rows that were added by _fill_perfdata, which have no "name", are not present, so
+    the mask is the same for filled and unfilled tables.
+
+    Arguments:
+        df (DataFrame): performance data table
+
+    Returns:
+        (DataFrame): boolean table indexed by node with one column per profile
+    """
+    name_col = ("name", "") if isinstance(df.columns, pd.MultiIndex) else "name"
+    if name_col in df.columns:
+        df = df[df[name_col].notna()]
+    index = df.index.remove_unused_levels()
+    node_level = index.names.index("node")
+    nodes = index.levels[node_level]
+    node_codes = index.codes[node_level]
+    profile_codes, profiles = index.droplevel("node").factorize(sort=True)
+
+    mask = np.zeros((len(nodes), len(profiles)), dtype=bool)
+    mask[node_codes, profile_codes] = True
+
+    return pd.DataFrame(mask, index=nodes, columns=profiles)
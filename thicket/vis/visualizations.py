@@ -6,7 +6,8 @@ from hatchet.external import Roundtrip as RT
 
 
 def _thicket_to_json(data):
-    return data.to_json()
+    # The visualizations read the graph, performance data and metadata records
+    return data.to_json(stats=False)
 
 
 def _df_to_json(data):